@@ -1,18 +1,41 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from dotenv import load_dotenv
 import os
 
+# Load environment variables before importing modules that read settings
+load_dotenv()
+
+from .utils import log
+
+# Configure logging before importing modules that log on import
+log.setup_logging()
+
 from .routers import auth, api_keys, proxy, rate_limits, stats
+from .utils import bookkeeping, http_client, redis_client
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Connect to Redis (or fall back to the in-memory mock) before serving
+    await redis_client.start_client()
+    # Share one pooled HTTP client across all proxied requests
+    await http_client.start_client()
+    # Logging and rate limit writes happen after responses are sent
+    await bookkeeping.start()
+    yield
+    await bookkeeping.stop()
+    await http_client.close_client()
+    await redis_client.close()
 
-# Load environment variables
-load_dotenv()
 
 # Create FastAPI app
 app = FastAPI(
     title="Personal API Dashboard",
     description="A centralized web dashboard for managing and testing various APIs",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 # Configure CORS - More permissive for development
@@ -22,8 +45,13 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    # Pagination cursor for GET /api/keys
+    expose_headers=["X-Next-Token"],
 )
 
+# Tag every request (and its log records) with an X-Request-ID
+app.add_middleware(log.RequestIdMiddleware)
+
 # Include routers
 app.include_router(auth.router)
 app.include_router(api_keys.router)
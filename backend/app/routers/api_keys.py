@@ -1,9 +1,27 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from typing import List
-from ..schemas.api_key import ApiKeyCreate, ApiKeyUpdate, ApiKey
-from ..utils import mock_db
+import json
+import logging
+from fastapi import APIRouter, Body, Depends, HTTPException, Query, Response, status
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+from typing import Iterator, List, Optional
+from ..schemas.api_key import (
+    MAX_BULK_API_KEYS,
+    ApiKey,
+    ApiKeyBulkDelete,
+    ApiKeyBulkDeleteResult,
+    ApiKeyCreate,
+    ApiKeyMetadata,
+    ApiKeyUpdate,
+)
+from ..utils import mock_db, redis_client
 from ..utils.auth import get_current_user
 
+logger = logging.getLogger(__name__)
+
+# Page sizes for GET /api/keys when the client asks for pages
+API_KEYS_PAGE_SIZE = 50
+MAX_API_KEYS_PAGE_SIZE = 100
+
 router = APIRouter(
     prefix="/api/keys",
     tags=["API Keys"],
@@ -23,16 +41,12 @@ async def create_api_key(
         # Get user ID from JWT token
         user_id = current_user["sub"]
         
-        # Create API key in mock DynamoDB
-        key_id = mock_db.create_api_key(
+        # Create API key in mock DynamoDB, returning what was written
+        return mock_db.create_api_key_item(
             user_id=user_id,
             api_name=api_key.api_name,
             api_key=api_key.api_key
         )
-        
-        # Retrieve the created key to return
-        created_key = mock_db.get_api_key(key_id)
-        return created_key
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -40,21 +54,143 @@ async def create_api_key(
         )
 
 @router.get("/", response_model=List[ApiKey])
-async def get_user_api_keys(current_user: dict = Depends(get_current_user)):
-    """Get all API keys for the current user"""
+async def get_user_api_keys(
+    response: Response,
+    limit: Optional[int] = Query(None, ge=1, le=MAX_API_KEYS_PAGE_SIZE),
+    next_token: Optional[str] = None,
+    current_user: dict = Depends(get_current_user)
+):
+    """
+    Get API keys for the current user
+    
+    Without `limit` or `next_token` every key is returned. Otherwise one page
+    is returned, and the X-Next-Token header carries the cursor for the next
+    page (absent on the last one).
+    """
     try:
         # Get user ID from JWT token
         user_id = current_user["sub"]
         
-        # Get all API keys for the user
-        user_keys = mock_db.get_user_api_keys(user_id)
+        if limit is None and next_token is None:
+            # Get all API keys for the user
+            return mock_db.get_user_api_keys(user_id)
+        
+        user_keys, token = mock_db.get_user_api_keys_page(
+            user_id, limit or API_KEYS_PAGE_SIZE, next_token
+        )
+        if token:
+            response.headers["X-Next-Token"] = token
         return user_keys
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to retrieve API keys: {str(e)}"
+        )
+
+@router.post("/bulk", response_model=List[ApiKey], status_code=status.HTTP_201_CREATED)
+async def create_api_keys(
+    api_keys: List[ApiKeyCreate] = Body(..., min_length=1, max_length=MAX_BULK_API_KEYS),
+    current_user: dict = Depends(get_current_user)
+):
+    """
+    Create many API keys for the current user with batched writes
+    
+    If the import stops partway, the 500 response lists the keys that were
+    created and the indexes (into the request) of the ones that weren't.
+    """
+    try:
+        # Encryption and batch writes run off the event loop
+        return await run_in_threadpool(
+            mock_db.create_api_keys_bulk,
+            current_user["sub"],
+            [(api_key.api_name, api_key.api_key) for api_key in api_keys]
+        )
+    except mock_db.ApiKeyBulkCreateIncomplete as e:
+        # Say exactly what was written, so a retry only resends the rest
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail={
+                "message": f"Failed to create API keys: {str(e)}",
+                "created": [ApiKey(**item).model_dump(mode="json") for item in e.created],
+                "unprocessed": e.unprocessed,
+            }
+        )
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to create API keys: {str(e)}"
+        )
+
+@router.delete("/bulk", response_model=ApiKeyBulkDeleteResult)
+async def delete_api_keys(
+    request: ApiKeyBulkDelete,
+    current_user: dict = Depends(get_current_user)
+):
+    """Delete many of the current user's API keys with batched writes"""
+    user_id = current_user["sub"]
+    try:
+        result = await run_in_threadpool(mock_db.delete_api_keys_bulk, user_id, request.ids)
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to delete API keys: {str(e)}"
+        )
+    
+    # Also delete associated rate limits, in one round trip
+    api_names = {item["api_name"] for item in result["deleted"] if item["api_name"]}
+    if api_names:
+        try:
+            await redis_client.delete_rate_limits_bulk(
+                {name for api_name in api_names for name in (api_name, api_name.lower())}, user_id=user_id
+            )
+        except Exception as e:
+            # Log error but don't fail the request
+            logger.warning("Error deleting rate limit data: %s", e)
+    
+    return ApiKeyBulkDeleteResult(
+        deleted=[item["id"] for item in result["deleted"]],
+        not_found=result["not_found"],
+        forbidden=result["forbidden"]
+    )
+
+@router.get("/metadata", response_model=List[ApiKeyMetadata])
+async def get_user_api_key_metadata(current_user: dict = Depends(get_current_user)):
+    """List the current user's API keys without their secrets (nothing is decrypted)"""
+    try:
+        return mock_db.list_user_api_key_metadata(current_user["sub"])
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Failed to retrieve API keys: {str(e)}"
         )
 
+@router.get("/export")
+async def export_api_keys(current_user: dict = Depends(get_current_user)):
+    """Stream all of the current user's API keys as NDJSON, one key per line"""
+    user_id = current_user["sub"]
+    
+    def lines() -> Iterator[str]:
+        # Pages are queried as the response is written, so memory stays flat
+        for key in mock_db.iter_user_api_keys(user_id, page_size=100):
+            yield json.dumps({
+                "id": key["id"],
+                "api_name": key["api_name"],
+                "api_key": key["api_key"],
+                "created_at": key["created_at"],
+                "updated_at": key["updated_at"],
+            }) + "\n"
+    
+    return StreamingResponse(
+        lines(),
+        media_type="application/x-ndjson",
+        headers={"Content-Disposition": 'attachment; filename="api-keys.ndjson"'}
+    )
+
 @router.get("/{key_id}", response_model=ApiKey)
 async def get_api_key(
     key_id: str, 
@@ -88,6 +224,18 @@ async def get_api_key(
             detail=f"Failed to retrieve API key: {str(e)}"
         )
 
+def _ownership_error(error: Exception, action: str) -> HTTPException:
+    """Map a failed ownership condition to 404 or 403"""
+    if isinstance(error, mock_db.ApiKeyNotFound):
+        return HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="API key not found"
+        )
+    return HTTPException(
+        status_code=status.HTTP_403_FORBIDDEN,
+        detail=f"Not authorized to {action} this API key"
+    )
+
 @router.put("/{key_id}", response_model=ApiKey)
 async def update_api_key(
     key_id: str, 
@@ -96,33 +244,15 @@ async def update_api_key(
 ):
     """Update an API key"""
     try:
-        # First get the key to check ownership
-        key = mock_db.get_api_key(key_id)
-        
-        # Check if key exists
-        if not key:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="API key not found"
-            )
-        
-        # Check if key belongs to current user
-        if key.get("user_id") != current_user["sub"]:
-            raise HTTPException(
-                status_code=status.HTTP_403_FORBIDDEN,
-                detail="Not authorized to update this API key"
-            )
-        
-        # Update the key
-        updated_key = mock_db.update_api_key(
+        # Ownership is checked by the write itself
+        return mock_db.update_api_key(
             key_id=key_id,
             api_name=api_key_update.api_name,
-            api_key=api_key_update.api_key
+            api_key=api_key_update.api_key,
+            user_id=current_user["sub"]
         )
-        
-        return updated_key
-    except HTTPException:
-        raise
+    except (mock_db.ApiKeyNotFound, mock_db.ApiKeyForbidden) as e:
+        raise _ownership_error(e, "update")
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -136,44 +266,27 @@ async def delete_api_key(
 ):
     """Delete an API key"""
     try:
-        # First get the key to check ownership
-        key = mock_db.get_api_key(key_id)
-        
-        # Check if key exists
-        if not key:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="API key not found"
-            )
-        
-        # Check if key belongs to current user
-        if key.get("user_id") != current_user["sub"]:
-            raise HTTPException(
-                status_code=status.HTTP_403_FORBIDDEN,
-                detail="Not authorized to delete this API key"
-            )
-        
-        # Get API name before deletion
-        api_name = key.get("api_name", "").lower()
-        
-        # Delete the key
-        mock_db.delete_api_key(key_id)
+        # Ownership is checked by the delete itself, which returns the old item
+        key = mock_db.delete_api_key(key_id, user_id=current_user["sub"])
+        api_name = key.get("api_name", "")
         
         # Also delete associated rate limits if any
         try:
-            from ..utils import redis_client
             if api_name:
-                redis_client.delete_rate_limit(api_name=api_name, user_id=current_user["sub"])
-                print(f"Deleted rate limit data for {api_name}")
+                # The proxy stores lowercase names, manual entries keep their case
+                deleted = await redis_client.delete_rate_limits_bulk(
+                    [api_name.lower(), api_name], user_id=current_user["sub"]
+                )
+                logger.info("Deleted rate limit data for %s", ", ".join(deleted) or api_name)
         except Exception as e:
             # Log error but don't fail the request
-            print(f"Error deleting rate limit data: {e}")
+            logger.warning("Error deleting rate limit data: %s", e)
         
         return None
-    except HTTPException:
-        raise
+    except (mock_db.ApiKeyNotFound, mock_db.ApiKeyForbidden) as e:
+        raise _ownership_error(e, "delete")
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Failed to delete API key: {str(e)}"
-        ) 
\ No newline at end of file
+        )
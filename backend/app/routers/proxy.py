@@ -1,14 +1,30 @@
+import asyncio
+import logging
 import time
 import httpx
 from fastapi import APIRouter, Depends, HTTPException
-from typing import Any, Dict, Union, Optional
+from fastapi.responses import StreamingResponse
+from starlette.background import BackgroundTask
+from typing import Any, Awaitable, Callable, Dict, List, Union, Optional, Tuple
+from urllib.parse import urlparse
 import json
 from datetime import datetime, timedelta
 
-from ..schemas.proxy import ProxyRequest, ProxyResponse
+from ..schemas.proxy import (
+    ProxyRequest, ProxyResponse, ProxyBatchRequest, ProxyBatchResponse, ProxyBatchItem, CircuitStatus,
+    KeyCacheStats
+)
 from ..utils.auth import get_current_user
-from ..utils.mock_db import get_api_key, log_request
-from ..utils import redis_client
+from ..utils.mock_db import get_api_key_cached, log_request
+from ..utils import admission, bookkeeping, circuit_breaker, key_cache, pacing, redis_client, response_cache, retry, timeouts
+from ..utils.rate_limit_data import RateLimitData
+from ..utils.rate_limit_headers import is_rate_limit_header, most_constrained, parse_rate_limit_headers
+from ..utils.retry import RetryPolicy, RetryStats, send_with_retry
+from ..utils.http_client import get_http_client, host_semaphore, user_semaphore
+from ..utils.settings import env_bool, env_int
+from ..utils.single_flight import SingleFlight
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter(
     prefix="/api/proxy",
@@ -16,22 +32,541 @@ router = APIRouter(
     dependencies=[Depends(get_current_user)],
 )
 
+# Connection-level headers that only apply to a single hop
+HOP_BY_HOP_HEADERS = {
+    "connection", "keep-alive", "proxy-authenticate", "proxy-authorization",
+    "te", "trailer", "trailers", "transfer-encoding", "upgrade",
+}
+
+# Largest number of requests accepted in one batch
+PROXY_BATCH_MAX_REQUESTS = env_int("PROXY_BATCH_MAX_REQUESTS", 50)
+
+# Concurrent identical reads share a single upstream call
+PROXY_COALESCE = env_bool("PROXY_COALESCE", True)
+COALESCABLE_METHODS = {"GET", "HEAD"}
+_upstream_calls = SingleFlight()
+
 
 @router.post("", response_model=ProxyResponse)
-async def proxy_request(request: ProxyRequest, current_user: dict = Depends(get_current_user)):
+async def proxy_request(
+    request: ProxyRequest,
+    current_user: dict = Depends(get_current_user),
+    client: httpx.AsyncClient = Depends(get_http_client),
+):
     """
     Proxy an API request to an external API
     """
     # Get user ID from token
     user_id = current_user["sub"]
     
+    return await _execute_proxy_request(request, user_id, client)
+
+
+@router.post("/batch", response_model=ProxyBatchResponse)
+async def proxy_request_batch(
+    batch: ProxyBatchRequest,
+    current_user: dict = Depends(get_current_user),
+    client: httpx.AsyncClient = Depends(get_http_client),
+):
+    """
+    Proxy several API requests concurrently
+
+    Requests fan out through the same path as the single proxy endpoint, so
+    each one is logged and has its rate limits tracked. Concurrency is capped
+    per user (and by the optional per-batch ``concurrency``) on top of the
+    per-host cap. Results come back in request order, with per-item errors.
+    """
+    user_id = current_user["sub"]
+    
+    if len(batch.requests) > PROXY_BATCH_MAX_REQUESTS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"A batch can contain at most {PROXY_BATCH_MAX_REQUESTS} requests"
+        )
+    
+    user_slots = user_semaphore(user_id)
+    batch_slots = asyncio.Semaphore(batch.concurrency or len(batch.requests))
+    
+    async def run(index: int, item: ProxyRequest) -> ProxyBatchItem:
+        async with batch_slots, user_slots:
+            try:
+                response = await _execute_proxy_request(item, user_id, client)
+                return ProxyBatchItem(index=index, response=response)
+            except HTTPException as e:
+                return ProxyBatchItem(index=index, error=str(e.detail), error_status_code=e.status_code)
+            except Exception as e:
+                logger.exception("Unexpected error in batch item %d", index)
+                return ProxyBatchItem(index=index, error=str(e), error_status_code=500)
+    
+    results = await asyncio.gather(
+        *(run(index, item) for index, item in enumerate(batch.requests))
+    )
+    return ProxyBatchResponse(responses=list(results))
+
+
+@router.get("/circuits", response_model=List[CircuitStatus])
+async def get_circuits():
+    """
+    Get the circuit breaker state of every upstream the proxy has called
+    """
+    return [CircuitStatus(**circuit) for circuit in await circuit_breaker.list_circuits()]
+
+
+@router.get("/key-cache", response_model=KeyCacheStats)
+async def get_key_cache_stats():
+    """
+    Get hit/miss counters for the decrypted API key cache
+    """
+    return KeyCacheStats(**key_cache.stats())
+
+
+async def _execute_proxy_request(
+    request: ProxyRequest,
+    user_id: str,
+    client: httpx.AsyncClient,
+) -> ProxyResponse:
+    """Send one proxied request upstream, log it and track its rate limits"""
+    start_time = time.time()
+    
+    # Answer idempotent reads from the cache while they are still fresh
+    cache_key = None
+    cached = None
+    if response_cache.is_cacheable_request(request.method, request.headers):
+        cache_key = response_cache.cache_key(
+            user_id, request.method, str(request.url), request.headers, request.api_key_id
+        )
+        cached = await response_cache.get(cache_key)
+        if cached is not None and cached.is_fresh:
+            time_taken = (time.time() - start_time) * 1000
+            bookkeeping.submit(
+                log_request,
+                user_id=user_id,
+                url=str(request.url),
+                method=request.method,
+                status_code=cached.status_code,
+                time_taken=time_taken,
+                attempts=0
+            )
+            return ProxyResponse(
+                status_code=cached.status_code,
+                headers=cached.headers,
+                body=cached.body,
+                time_taken=time_taken,
+                cache_status="hit",
+                attempts=0,
+            )
+    
+    headers, api_name, using_stored_key = _resolve_request_headers(request)
+    
+    coalesced = False
+    try:
+        # Don't spend a round trip on a quota we already know is exhausted
+        rate_limit = None
+        if using_stored_key:
+            rate_limit = await _admit(api_name, user_id)
+        
+        async def fetch() -> ProxyResponse:
+            # Only the caller making the upstream call takes a pacing slot;
+            # coalesced callers ride along on its request
+            if using_stored_key:
+                await _pace(api_name, user_id, rate_limit)
+            
+            # The deadline only starts once the request is cleared to go upstream
+            budget = _timeout_budget(request, api_name)
+            return await _fetch_upstream(
+                request=request,
+                user_id=user_id,
+                client=client,
+                headers=headers,
+                api_name=api_name,
+                using_stored_key=using_stored_key,
+                cache_key=cache_key,
+                cached=cached,
+                start_time=start_time,
+                budget=budget,
+            )
+        
+        if PROXY_COALESCE and request.method in COALESCABLE_METHODS:
+            # Identical concurrent reads share one upstream call
+            flight_key = cache_key or response_cache.cache_key(
+                user_id, request.method, str(request.url), request.headers, request.api_key_id
+            )
+            flight, coalesced = _upstream_calls.join(flight_key, fetch)
+            response = await flight
+            if coalesced:
+                # Hand each caller its own copy, timed from its own start
+                response = response.model_copy(deep=True)
+                response.time_taken = (time.time() - start_time) * 1000
+                response.coalesced = True
+        else:
+            response = await fetch()
+    except HTTPException as e:
+        # Log failed request; local rejections and coalesced callers never
+        # made an upstream call of their own
+        upstream_failure = isinstance(e, UpstreamRequestFailed) and not coalesced
+        bookkeeping.submit(
+            log_request,
+            user_id=user_id,
+            url=str(request.url),
+            method=request.method,
+            status_code=e.status_code,
+            time_taken=(time.time() - start_time) * 1000,
+            coalesced=coalesced,
+            attempts=e.attempts if upstream_failure else 0,
+            retry_backoff=e.retry_backoff if upstream_failure else 0.0
+        )
+        raise
+    
+    # Log the request
+    bookkeeping.submit(
+        log_request,
+        user_id=user_id,
+        url=str(request.url),
+        method=request.method,
+        status_code=response.status_code,
+        time_taken=response.time_taken,
+        coalesced=coalesced,
+        attempts=0 if coalesced else response.attempts,
+        retry_backoff=0.0 if coalesced else response.retry_backoff
+    )
+    
+    return response
+
+
+async def _fetch_upstream(
+    request: ProxyRequest,
+    user_id: str,
+    client: httpx.AsyncClient,
+    headers: Dict[str, str],
+    api_name: Optional[str],
+    using_stored_key: bool,
+    cache_key: Optional[str],
+    cached: Optional[response_cache.CachedResponse],
+    start_time: float,
+    budget: timeouts.TimeoutBudget,
+) -> ProxyResponse:
+    """
+    Make the upstream call, track its rate limits and update the cache
+
+    Logging is left to the caller so coalesced callers each get an entry.
+    """
+    # Revalidate a stale entry instead of downloading it again
+    if cached is not None and cached.can_revalidate:
+        headers = {**headers, **response_cache.conditional_headers(cached)}
+    
+    stats = RetryStats()
+    
+    host = request.url.host or ""
+    
+    async def send() -> httpx.Response:
+        # Make the request to the external API, capped per upstream host. Each
+        # attempt only gets what is left of the overall deadline
+        semaphore = host_semaphore(host)
+        await budget.run(semaphore.acquire())
+        try:
+            return await _guarded_send(
+                host,
+                lambda: client.request(
+                    method=request.method,
+                    url=str(request.url),
+                    headers=headers,
+                    content=_prepare_request_body(request.body, request.method),
+                    timeout=budget.httpx_timeout(),
+                ),
+                budget,
+            )
+        finally:
+            semaphore.release()
+    
+    try:
+        logger.debug("Making %s request to %s", request.method, request.url)
+        response = await send_with_retry(send, request.method, _retry_policy(request, budget), stats)
+        
+        # Calculate time taken
+        time_taken = (time.time() - start_time) * 1000  # Convert to milliseconds
+        
+        # Convert headers to dict
+        response_headers = dict(response.headers)
+        
+        # Track rate limits reported by the upstream
+        _track_rate_limits(response_headers, api_name, user_id, using_stored_key)
+        
+        # Upstream confirmed our cached copy is still current
+        if cached is not None and response.status_code == 304:
+            cached = await response_cache.refresh(cache_key, cached, response_headers)
+            return ProxyResponse(
+                status_code=cached.status_code,
+                headers=cached.headers,
+                body=cached.body,
+                time_taken=time_taken,
+                cache_status="revalidated",
+                attempts=stats.attempts,
+                retry_backoff=stats.backoff_ms,
+            )
+        
+        # Get response body
+        response_body = _parse_response_body(response)
+        
+        cache_status = None
+        if cache_key is not None:
+            await response_cache.store(cache_key, response.status_code, response_headers, response_body)
+            cache_status = "miss"
+        
+        # Return the response
+        return ProxyResponse(
+            status_code=response.status_code,
+            headers=response_headers,
+            body=response_body,
+            time_taken=time_taken,
+            cache_status=cache_status,
+            attempts=stats.attempts,
+            retry_backoff=stats.backoff_ms,
+        )
+        
+    except Exception as e:
+        logger.warning("Upstream request to %s failed: %r", request.url, e)
+        raise _upstream_failure(e, stats)
+
+
+@router.post("/stream")
+async def proxy_request_stream(
+    request: ProxyRequest,
+    current_user: dict = Depends(get_current_user),
+    client: httpx.AsyncClient = Depends(get_http_client),
+):
+    """
+    Proxy an API request and stream the upstream body back unchanged
+
+    Upstream bytes are piped straight through instead of being parsed into a
+    ProxyResponse, so large responses keep memory flat and the first byte
+    reaches the browser before the upstream has finished. The request is
+    logged and rate limits are tracked once the stream closes.
+    """
+    user_id = current_user["sub"]
+    start_time = time.time()
+    headers, api_name, using_stored_key = _resolve_request_headers(request)
+    if using_stored_key:
+        try:
+            rate_limit = await _admit(api_name, user_id)
+            await _pace(api_name, user_id, rate_limit)
+        except HTTPException as e:
+            # Logged like the buffered route; the upstream was never contacted
+            bookkeeping.submit(
+                log_request,
+                user_id=user_id,
+                url=str(request.url),
+                method=request.method,
+                status_code=e.status_code,
+                time_taken=(time.time() - start_time) * 1000,
+                attempts=0
+            )
+            raise
+
+    # Time waiting for a per-host slot counts towards the logged latency too
+    semaphore = host_semaphore(request.url.host or "")
+    await semaphore.acquire()
+
+    stats = RetryStats()
+    budget = _timeout_budget(request, api_name)
+    
+    async def send() -> httpx.Response:
+        upstream_request = client.build_request(
+            method=request.method,
+            url=str(request.url),
+            headers=headers,
+            content=_prepare_request_body(request.body, request.method),
+            timeout=budget.httpx_timeout(),
+        )
+        # The deadline covers getting the response headers; the body is
+        # then bounded by the read timeout between chunks
+        return await _guarded_send(
+            request.url.host or "",
+            lambda: client.send(upstream_request, stream=True),
+            budget,
+        )
+
+    try:
+        logger.debug("Streaming %s request to %s", request.method, request.url)
+        response = await send_with_retry(send, request.method, _retry_policy(request, budget), stats)
+    except Exception as e:
+        semaphore.release()
+        logger.warning("Upstream request to %s failed: %r", request.url, e)
+        failure = _upstream_failure(e, stats)
+        bookkeeping.submit(
+            log_request,
+            user_id=user_id,
+            url=str(request.url),
+            method=request.method,
+            status_code=failure.status_code,
+            time_taken=(time.time() - start_time) * 1000,
+            attempts=stats.attempts,
+            retry_backoff=stats.backoff_ms
+        )
+        raise failure
+
+    finished = False
+
+    async def finish():
+        # Runs from the body iterator and as a background task, whichever is first
+        nonlocal finished
+        if finished:
+            return
+        finished = True
+        await response.aclose()
+        semaphore.release()
+        _record_response(
+            request=request,
+            user_id=user_id,
+            status_code=response.status_code,
+            response_headers=dict(response.headers),
+            time_taken=(time.time() - start_time) * 1000,
+            api_name=api_name,
+            using_stored_key=using_stored_key,
+            attempts=stats.attempts,
+            retry_backoff=stats.backoff_ms,
+        )
+
+    async def body_iterator():
+        try:
+            async for chunk in response.aiter_raw():
+                yield chunk
+        finally:
+            await finish()
+
+    return StreamingResponse(
+        body_iterator(),
+        status_code=response.status_code,
+        headers=_forwardable_headers(response.headers),
+        background=BackgroundTask(finish),
+    )
+
+
+class UpstreamRequestFailed(HTTPException):
+    """An upstream call that failed after all retry attempts"""
+
+    def __init__(self, status_code: int, detail: str, stats: RetryStats, headers: Optional[Dict[str, str]] = None):
+        super().__init__(status_code=status_code, detail=detail, headers=headers)
+        self.attempts = stats.attempts
+        self.retry_backoff = stats.backoff_ms
+
+
+async def _guarded_send(
+    host: str,
+    send: Callable[[], Awaitable[httpx.Response]],
+    budget: timeouts.TimeoutBudget,
+) -> httpx.Response:
+    """
+    Send one attempt through the upstream's circuit breaker, within the budget
+
+    An attempt cut off by the deadline counts as a failed, slow call, so a
+    hung upstream still trips the breaker.
+    """
+    if budget.remaining() <= 0:
+        raise timeouts.DeadlineExceeded(budget.deadline)
+    
+    breaker = circuit_breaker.get_breaker(host)
+    probe = await breaker.before_call()
+    started = time.time()
+    failed = True
+    timed_out = False
+    try:
+        response = await budget.run(send())
+        failed = response.status_code >= 500
+        return response
+    except timeouts.DeadlineExceeded:
+        timed_out = True
+        raise
+    except asyncio.CancelledError:
+        breaker.release(probe)
+        probe = None
+        raise
+    finally:
+        if probe is not None:
+            await breaker.record(probe, failed, (time.time() - started) * 1000, slow=timed_out)
+
+
+def _upstream_failure(error: Exception, stats: RetryStats) -> UpstreamRequestFailed:
+    """Map an error from the upstream call to the HTTP error we return"""
+    if isinstance(error, circuit_breaker.CircuitOpen):
+        return UpstreamRequestFailed(503, str(error), stats, headers={"Retry-After": error.retry_after_header})
+    
+    phase = timeouts.timeout_phase(error)
+    if phase is not None:
+        return UpstreamRequestFailed(
+            504, f"Upstream {phase} timeout", stats, headers={"X-Proxy-Timeout-Phase": phase}
+        )
+    
+    if isinstance(error, httpx.RequestError):
+        return UpstreamRequestFailed(500, f"Request failed: {str(error)}", stats)
+    return UpstreamRequestFailed(500, f"An unexpected error occurred: {str(error)}", stats)
+
+
+def _timeout_budget(request: ProxyRequest, api_name: Optional[str]) -> timeouts.TimeoutBudget:
+    """Timeouts for this call from the request, bounded by server-side maximums"""
+    requested = request.timeouts.model_dump() if request.timeouts else {}
+    return timeouts.resolve_budget(api_name, **requested)
+
+
+def _retry_policy(request: ProxyRequest, budget: timeouts.TimeoutBudget) -> RetryPolicy:
+    """Server defaults, adjusted by the request's retry options within limits"""
+    max_attempts = retry.RETRY_MAX_ATTEMPTS
+    retry_non_idempotent = False
+    if request.retry is not None:
+        max_attempts = request.retry.max_attempts or max_attempts
+        retry_non_idempotent = request.retry.retry_non_idempotent
+    return RetryPolicy(
+        max_attempts=min(max_attempts, retry.RETRY_MAX_ATTEMPTS_LIMIT),
+        # Retries may only spend what is left of the overall deadline
+        deadline=budget.remaining(),
+        retry_non_idempotent=retry_non_idempotent,
+    )
+
+
+async def _admit(api_name: Optional[str], user_id: str) -> Optional[redis_client.RateLimitData]:
+    """
+    Apply admission control, turning a local rejection into a 429
+
+    Returns:
+        The stored rate limit the decision was based on, for pacing
+    """
+    rate_limit = await admission.get_stored_rate_limit(api_name, user_id)
+    try:
+        await admission.admit(api_name, rate_limit)
+    except admission.AdmissionRejected as e:
+        raise _local_rejection(e)
+    return rate_limit
+
+
+async def _pace(api_name: Optional[str], user_id: str, rate_limit: Optional[redis_client.RateLimitData]):
+    """Wait for a pacing slot before an upstream call, turning a local rejection into a 429"""
+    try:
+        await pacing.acquire(api_name, user_id, rate_limit)
+    except admission.AdmissionRejected as e:
+        raise _local_rejection(e)
+
+
+def _local_rejection(error: admission.AdmissionRejected) -> HTTPException:
+    return HTTPException(
+        status_code=429,
+        detail=str(error),
+        headers={"Retry-After": error.retry_after_header},
+    )
+
+
+def _resolve_request_headers(request: ProxyRequest) -> Tuple[Dict[str, str], str, bool]:
+    """
+    Build the outbound headers, injecting a stored API key if one is referenced
+
+    Returns:
+        Tuple of (headers, api_name, using_stored_key)
+    """
     # If an API key ID is provided, fetch it from the database
     headers = dict(request.headers)
     api_name = None
     using_stored_key = False
     
     if request.api_key_id:
-        api_key = get_api_key(request.api_key_id)
+        api_key = get_api_key_cached(request.api_key_id)
         if not api_key:
             raise HTTPException(status_code=404, detail="API key not found")
         
@@ -42,94 +577,79 @@ async def proxy_request(request: ProxyRequest, current_user: dict = Depends(get_
         # Get API name for rate limit tracking
         api_name = api_key.get("api_name")
         using_stored_key = True
-        print(f"Using API key for: {api_name}")
+        logger.debug("Using API key for %s", api_name)
     else:
         # Extract API name from URL if needed for logging
         try:
-            from urllib.parse import urlparse
             domain = urlparse(str(request.url)).netloc
             api_name = domain.split('.')[-2]  # e.g., api.github.com -> github
-            print(f"Making request to {api_name} without stored API key")
+            logger.debug("Making request to %s without stored API key", api_name)
         except Exception as e:
-            print(f"Error extracting API name from URL: {e}")
+            logger.warning("Error extracting API name from URL: %s", e)
             api_name = "unknown"
 
-    # Create a httpx client
-    async with httpx.AsyncClient(timeout=30.0) as client:
-        start_time = time.time()
-        
-        try:
-            print(f"Making {request.method} request to {request.url}")
-            # Make the request to the external API
-            response = await client.request(
-                method=request.method,
-                url=str(request.url),
-                headers=headers,
-                content=_prepare_request_body(request.body, request.method),
-            )
-            
-            # Calculate time taken
-            time_taken = (time.time() - start_time) * 1000  # Convert to milliseconds
-            
-            # Get response body
-            response_body = _parse_response_body(response)
-            
-            # Convert headers to dict
-            response_headers = dict(response.headers)
-            
-            # Log the request
-            log_request(
-                user_id=user_id,
-                url=str(request.url),
-                method=request.method,
-                status_code=response.status_code,
-                time_taken=time_taken
-            )
-            
-            # Only track rate limits if using a stored API key
-            if using_stored_key:
-                # Extract rate limit headers if available
-                rate_limit_headers = _extract_rate_limit_headers(response_headers)
-                
-                if rate_limit_headers:
-                    # Store rate limit information in Redis
-                    rate_limit_info = _store_rate_limit_info(rate_limit_headers, api_name, user_id)
-                    print(f"Stored rate limit info for {api_name}: {rate_limit_info}")
-            
-            # Return the response
-            return ProxyResponse(
-                status_code=response.status_code,
-                headers=response_headers,
-                body=response_body,
-                time_taken=time_taken,
-            )
-            
-        except httpx.RequestError as e:
-            print(f"Request error: {e}")
-            
-            # Log failed request
-            log_request(
-                user_id=user_id,
-                url=str(request.url),
-                method=request.method,
-                status_code=500,  # Use 500 for client errors
-                time_taken=(time.time() - start_time) * 1000
-            )
-            
-            raise HTTPException(status_code=500, detail=f"Request failed: {str(e)}")
-        except Exception as e:
-            print(f"Unexpected error: {e}")
-            
-            # Log failed request
-            log_request(
-                user_id=user_id,
-                url=str(request.url),
-                method=request.method,
-                status_code=500,  # Use 500 for other errors
-                time_taken=(time.time() - start_time) * 1000
-            )
-            
-            raise HTTPException(status_code=500, detail=f"An unexpected error occurred: {str(e)}")
+    return headers, api_name, using_stored_key
+
+
+def _record_response(
+    request: ProxyRequest,
+    user_id: str,
+    status_code: int,
+    response_headers: Dict[str, str],
+    time_taken: float,
+    api_name: Optional[str],
+    using_stored_key: bool,
+    attempts: int = 1,
+    retry_backoff: float = 0.0,
+):
+    """Queue the log entry and rate limit headers for a completed request"""
+    bookkeeping.submit(
+        log_request,
+        user_id=user_id,
+        url=str(request.url),
+        method=request.method,
+        status_code=status_code,
+        time_taken=time_taken,
+        attempts=attempts,
+        retry_backoff=retry_backoff
+    )
+    _track_rate_limits(response_headers, api_name, user_id, using_stored_key)
+
+
+def _track_rate_limits(
+    response_headers: Dict[str, str],
+    api_name: Optional[str],
+    user_id: str,
+    using_stored_key: bool,
+):
+    """Store any rate limit headers returned for a stored API key, after the response"""
+    # Only track rate limits if using a stored API key
+    if not using_stored_key:
+        return
+    
+    # Writes for one API and user supersede each other within a batch, so a
+    # response without a usable window must not displace one that had it
+    rate_limit_headers = _extract_rate_limit_headers(response_headers)
+    if not rate_limit_headers or most_constrained(parse_rate_limit_headers(rate_limit_headers)) is None:
+        return
+    
+    # Only the newest headers per API and user need to reach Redis
+    bookkeeping.submit(
+        _store_rate_limit_info,
+        rate_limit_headers,
+        api_name,
+        user_id,
+        key=("rate_limit", (api_name or "").lower(), user_id),
+    )
+
+
+def _forwardable_headers(headers: httpx.Headers) -> Dict[str, str]:
+    """Drop hop-by-hop headers that must not be relayed to the browser"""
+    return {
+        key: value
+        for key, value in headers.items()
+        if key.lower() not in HOP_BY_HOP_HEADERS
+    }
 
 
 def _prepare_request_body(body: Union[Dict[str, Any], str, None], method: str) -> Union[str, bytes, None]:
@@ -158,138 +678,95 @@ def _parse_response_body(response: httpx.Response) -> Any:
 
 def _extract_rate_limit_headers(headers: Dict[str, str]) -> Dict[str, str]:
     """Extract rate limit related headers from the response"""
-    rate_limit_headers = {}
-    
-    # Common rate limit header patterns
-    rate_limit_keys = [
-        "x-rate-limit", "x-ratelimit", "ratelimit", 
-        "x-rate-limit-limit", "x-rate-limit-remaining", "x-rate-limit-reset",
-        "x-ratelimit-limit", "x-ratelimit-remaining", "x-ratelimit-reset"
-    ]
-    
-    # GitHub-specific headers (case-sensitive)
-    github_headers = [
-        "X-RateLimit-Limit", 
-        "X-RateLimit-Remaining", 
-        "X-RateLimit-Reset", 
-        "X-RateLimit-Used",
-        "X-RateLimit-Resource"
-    ]
-    
-    for key, value in headers.items():
-        # Check for exact GitHub headers (case-sensitive)
-        if key in github_headers:
-            rate_limit_headers[key] = value
-            continue
-            
-        # Check for other common patterns (case-insensitive)
-        key_lower = key.lower()
-        if any(limit_key in key_lower for limit_key in rate_limit_keys):
-            rate_limit_headers[key] = value
-    
-    return rate_limit_headers
+    return {
+        key: value
+        for key, value in headers.items()
+        if is_rate_limit_header(key)
+    }
 
 
-def _store_rate_limit_info(rate_limit_headers: Dict[str, str], api_name: str, user_id: str) -> Optional[Dict[str, Any]]:
+def _parse_rate_limit_info(
+    rate_limit_headers: Dict[str, str],
+    api_name: str,
+    user_id: str,
+) -> Optional[Tuple[RateLimitData, int]]:
     """
-    Parse rate limit headers and store them in Redis
+    Turn rate limit headers into the record to store and its TTL
+
+    When a response reports several dimensions (requests and tokens, say),
+    the one closest to running out is used.
     """
+    # Clean up API name - simple lowercase for consistency
+    api_name = api_name.lower()
+
+    now = datetime.now()
+    window = most_constrained(parse_rate_limit_headers(rate_limit_headers, now))
+    if window is None:
+        return None
+
+    # Without a reset time, assume the usual hourly window
+    reset_time = window.reset_time or now + timedelta(hours=1)
+    ttl = int((reset_time - now).total_seconds())
+    if ttl <= 0:
+        ttl = 3600  # Default to 1 hour if reset_time is in the past
+
+    rate_limit = RateLimitData(
+        api_name=api_name,
+        limit=window.limit,
+        remaining=window.remaining,
+        reset_time=reset_time,
+        user_id=user_id
+    )
+    return rate_limit, ttl
+
+
+async def _store_rate_limit_info(rate_limit_headers: Dict[str, str], api_name: str, user_id: str) -> Optional[Dict[str, Any]]:
+    """Parse rate limit headers and store them in Redis"""
     try:
-        # Initialize with default values
-        limit = None
-        remaining = None
-        reset_time = None
-        
-        # Clean up API name - simple lowercase for consistency
-        api_name = api_name.lower()
-            
-        # Check for GitHub format first (case-sensitive)
-        if "X-RateLimit-Limit" in rate_limit_headers and "X-RateLimit-Remaining" in rate_limit_headers:
-            print("Found GitHub format rate limit headers")
-            try:
-                limit = int(rate_limit_headers["X-RateLimit-Limit"])
-                remaining = int(rate_limit_headers["X-RateLimit-Remaining"])
-                
-                if "X-RateLimit-Reset" in rate_limit_headers:
-                    reset_timestamp = int(rate_limit_headers["X-RateLimit-Reset"])
-                    reset_time = datetime.fromtimestamp(reset_timestamp)
-            except (ValueError, TypeError) as e:
-                print(f"Error parsing GitHub rate limit headers: {e}")
-        
-        # If GitHub format not found, try generic formats
-        if limit is None or remaining is None:
-            # Lowercase all keys for easier matching
-            normalized_headers = {k.lower(): v for k, v in rate_limit_headers.items()}
-            
-            # Try to find limit
-            for key in ["x-ratelimit-limit", "x-rate-limit-limit", "ratelimit-limit"]:
-                if key in normalized_headers:
-                    try:
-                        limit = int(normalized_headers[key])
-                        print(f"Found limit: {limit} from header {key}")
-                        break
-                    except (ValueError, TypeError) as e:
-                        print(f"Error parsing limit from {key}: {e}")
-            
-            # Try to find remaining
-            for key in ["x-ratelimit-remaining", "x-rate-limit-remaining", "ratelimit-remaining"]:
-                if key in normalized_headers:
-                    try:
-                        remaining = int(normalized_headers[key])
-                        print(f"Found remaining: {remaining} from header {key}")
-                        break
-                    except (ValueError, TypeError) as e:
-                        print(f"Error parsing remaining from {key}: {e}")
-            
-            # Try to find reset time
-            for key in ["x-ratelimit-reset", "x-rate-limit-reset", "ratelimit-reset"]:
-                if key in normalized_headers:
-                    try:
-                        # Sometimes reset is in Unix timestamp format
-                        reset_timestamp = int(normalized_headers[key])
-                        reset_time = datetime.fromtimestamp(reset_timestamp)
-                        print(f"Found reset time: {reset_time} from header {key}")
-                        break
-                    except (ValueError, TypeError) as e:
-                        print(f"Error parsing reset time from {key}: {e}")
-        
-        # If we couldn't find reset time but found other rate limit info,
-        # default to 1 hour from now
-        if limit is not None and remaining is not None and reset_time is None:
-            reset_time = datetime.now() + timedelta(hours=1)
-            print(f"No reset time found, defaulting to 1 hour from now: {reset_time}")
-        
-        # Only store if we have at least limit and remaining
-        if limit is not None and remaining is not None:
-            # Calculate TTL from reset_time or default to 1 hour
-            ttl = None
-            if reset_time:
-                ttl = int((reset_time - datetime.now()).total_seconds())
-                if ttl < 0:
-                    ttl = 3600  # Default to 1 hour if reset_time is in the past
-            else:
-                ttl = 3600  # Default to 1 hour
-            
-            # Store in Redis
-            print(f"Storing rate limit for {api_name} (user {user_id}): limit={limit}, remaining={remaining}, reset={reset_time}, ttl={ttl}")
-            rate_limit = redis_client.store_rate_limit(
-                api_name=api_name,
-                limit=limit,
-                remaining=remaining,
-                reset_time=reset_time,
-                user_id=user_id,
-                ttl=ttl
-            )
-            
-            return {
-                "api_name": api_name,
-                "limit": limit,
-                "remaining": remaining,
-                "reset_time": reset_time.isoformat() if reset_time else None,
-                "ttl": ttl
-            }
-    except Exception as e:
+        parsed = _parse_rate_limit_info(rate_limit_headers, api_name, user_id)
+        if parsed is None:
+            return None
+        rate_limit, ttl = parsed
+
+        await redis_client.store_rate_limit(
+            api_name=rate_limit.api_name,
+            limit=rate_limit.limit,
+            remaining=rate_limit.remaining,
+            reset_time=rate_limit.reset_time,
+            user_id=user_id,
+            ttl=ttl
+        )
+
+        return {
+            "api_name": rate_limit.api_name,
+            "limit": rate_limit.limit,
+            "remaining": rate_limit.remaining,
+            "reset_time": rate_limit.reset_time.isoformat(),
+            "ttl": ttl
+        }
+    except Exception:
         # Log error but don't fail the request
-        print(f"Error storing rate limit info: {e}")
-    
-    return None 
\ No newline at end of file
+        logger.exception("Error storing rate limit info for %s", api_name)
+
+    return None
+
+
+async def _store_rate_limit_infos(calls: List[Tuple[Tuple[Any, ...], Dict[str, Any]]]):
+    """Store the rate limits from a bookkeeping batch in one Redis round trip"""
+    records = []
+    ttls = []
+    for args, kwargs in calls:
+        try:
+            parsed = _parse_rate_limit_info(*args, **kwargs)
+        except Exception:
+            # Skip the bad record, keep the rest of the batch
+            logger.exception("Error parsing rate limit info")
+            continue
+        if parsed is not None:
+            records.append(parsed[0])
+            ttls.append(parsed[1])
+
+    await redis_client.store_rate_limits_bulk(records, ttls)
+
+
+bookkeeping.register_batch(_store_rate_limit_info, _store_rate_limit_infos)
@@ -1,10 +1,18 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Body, Depends, HTTPException, status
 from typing import List, Optional
 from datetime import datetime, timedelta
 
-from ..schemas.rate_limit import RateLimit, RateLimitCreate, RateLimitUpdate
+from ..schemas.rate_limit import (
+    MAX_BULK_RATE_LIMITS,
+    RateLimit,
+    RateLimitBulkDelete,
+    RateLimitBulkDeleteResult,
+    RateLimitCreate,
+    RateLimitUpdate,
+)
 from ..utils.auth import get_current_user
 from ..utils import redis_client
+from ..utils.rate_limit_data import RateLimitData
 
 router = APIRouter(
     prefix="/api/rate-limits",
@@ -13,6 +21,16 @@ router = APIRouter(
 )
 
 
+def _ttl_for(reset_time: Optional[datetime]) -> int:
+    """Seconds until reset_time (at least 1), or 1 hour if it's unknown or already past"""
+    if reset_time:
+        seconds = (reset_time - datetime.now(reset_time.tzinfo)).total_seconds()
+        if seconds > 0:
+            # Redis rejects EX 0, so a reset under a second away still gets 1
+            return max(int(seconds), 1)
+    return 3600
+
+
 @router.get("", response_model=List[RateLimit])
 async def get_rate_limits(current_user: dict = Depends(get_current_user)):
     """
@@ -21,7 +39,7 @@ async def get_rate_limits(current_user: dict = Depends(get_current_user)):
     user_id = current_user["sub"]
     
     # Get rate limits from Redis
-    rate_limits = redis_client.get_all_rate_limits(user_id=user_id)
+    rate_limits = await redis_client.get_all_rate_limits(user_id=user_id)
     
     # Create a dictionary to deduplicate by api_name (keeping the most recent)
     deduplicated = {}
@@ -37,17 +55,8 @@ async def get_rate_limits(current_user: dict = Depends(get_current_user)):
             rate_limit.last_updated > deduplicated[normalized_name].last_updated):
             deduplicated[normalized_name] = rate_limit
     
-    # Convert to API schema
-    return [
-        RateLimit(
-            api_name=rate_limit.api_name,
-            limit=rate_limit.limit,
-            remaining=rate_limit.remaining,
-            reset_time=rate_limit.reset_time,
-            last_updated=rate_limit.last_updated
-        )
-        for rate_limit in deduplicated.values()
-    ]
+    # Validated against the response model as-is, no intermediate copy
+    return list(deduplicated.values())
 
 
 @router.get("/{api_name}", response_model=RateLimit)
@@ -58,7 +67,7 @@ async def get_rate_limit(api_name: str, current_user: dict = Depends(get_current
     user_id = current_user["sub"]
     
     # Get rate limit from Redis
-    rate_limit = redis_client.get_rate_limit(api_name=api_name, user_id=user_id)
+    rate_limit = await redis_client.get_rate_limit(api_name=api_name, user_id=user_id)
     
     if not rate_limit:
         raise HTTPException(
@@ -66,14 +75,7 @@ async def get_rate_limit(api_name: str, current_user: dict = Depends(get_current
             detail=f"Rate limit information for {api_name} not found"
         )
     
-    # Convert to API schema
-    return RateLimit(
-        api_name=rate_limit.api_name,
-        limit=rate_limit.limit,
-        remaining=rate_limit.remaining,
-        reset_time=rate_limit.reset_time,
-        last_updated=rate_limit.last_updated
-    )
+    return rate_limit
 
 
 @router.post("", response_model=RateLimit, status_code=status.HTTP_201_CREATED)
@@ -86,33 +88,61 @@ async def create_rate_limit(
     """
     user_id = current_user["sub"]
     
-    # Default TTL is 1 hour if reset_time is not provided
-    ttl = None
-    if rate_limit.reset_time:
-        # Calculate TTL from reset_time
-        ttl = int((rate_limit.reset_time - datetime.now()).total_seconds())
-        if ttl < 0:
-            ttl = 3600  # Default to 1 hour if reset_time is in the past
-    else:
-        ttl = 3600  # Default to 1 hour
-    
     # Store in Redis
-    rate_limit_data = redis_client.store_rate_limit(
+    rate_limit_data = await redis_client.store_rate_limit(
         api_name=rate_limit.api_name,
         limit=rate_limit.limit,
         remaining=rate_limit.remaining,
         reset_time=rate_limit.reset_time,
         user_id=user_id,
-        ttl=ttl
+        ttl=_ttl_for(rate_limit.reset_time)
     )
     
     # Return the created/updated rate limit
-    return RateLimit(
-        api_name=rate_limit_data.api_name,
-        limit=rate_limit_data.limit,
-        remaining=rate_limit_data.remaining,
-        reset_time=rate_limit_data.reset_time,
-        last_updated=rate_limit_data.last_updated
+    return rate_limit_data
+
+
+@router.put("", response_model=List[RateLimit])
+async def store_rate_limits(
+    rate_limits: List[RateLimitCreate] = Body(..., min_length=1, max_length=MAX_BULK_RATE_LIMITS),
+    current_user: dict = Depends(get_current_user)
+):
+    """
+    Create or replace several rate limits in one Redis transaction
+    """
+    user_id = current_user["sub"]
+    
+    records = [
+        RateLimitData(
+            api_name=rate_limit.api_name,
+            limit=rate_limit.limit,
+            remaining=rate_limit.remaining,
+            reset_time=rate_limit.reset_time,
+            user_id=user_id
+        )
+        for rate_limit in rate_limits
+    ]
+    ttls = [_ttl_for(rate_limit.reset_time) for rate_limit in rate_limits]
+    
+    return await redis_client.store_rate_limits_bulk(records, ttls)
+
+
+@router.delete("", response_model=RateLimitBulkDeleteResult)
+async def delete_rate_limits(
+    request: RateLimitBulkDelete,
+    current_user: dict = Depends(get_current_user)
+):
+    """
+    Delete several rate limits in one Redis transaction
+    """
+    user_id = current_user["sub"]
+    
+    deleted = await redis_client.delete_rate_limits_bulk(request.api_names, user_id=user_id)
+    
+    deleted_names = set(deleted)
+    return RateLimitBulkDeleteResult(
+        deleted=deleted,
+        not_found=[api_name for api_name in dict.fromkeys(request.api_names) if api_name not in deleted_names]
     )
 
 
@@ -128,7 +158,7 @@ async def update_rate_limit(
     user_id = current_user["sub"]
     
     # Get existing rate limit
-    existing_rate_limit = redis_client.get_rate_limit(api_name=api_name, user_id=user_id)
+    existing_rate_limit = await redis_client.get_rate_limit(api_name=api_name, user_id=user_id)
     
     if not existing_rate_limit:
         raise HTTPException(
@@ -141,31 +171,18 @@ async def update_rate_limit(
     remaining = rate_limit_update.remaining if rate_limit_update.remaining is not None else existing_rate_limit.remaining
     reset_time = rate_limit_update.reset_time if rate_limit_update.reset_time is not None else existing_rate_limit.reset_time
     
-    # Calculate TTL
-    ttl = None
-    if reset_time:
-        ttl = int((reset_time - datetime.now()).total_seconds())
-        if ttl < 0:
-            ttl = 3600  # Default to 1 hour if reset_time is in the past
-    
     # Store updated rate limit
-    updated_rate_limit = redis_client.store_rate_limit(
+    updated_rate_limit = await redis_client.store_rate_limit(
         api_name=api_name,
         limit=limit,
         remaining=remaining,
         reset_time=reset_time,
         user_id=user_id,
-        ttl=ttl
+        ttl=_ttl_for(reset_time)
     )
     
     # Return updated rate limit
-    return RateLimit(
-        api_name=updated_rate_limit.api_name,
-        limit=updated_rate_limit.limit,
-        remaining=updated_rate_limit.remaining,
-        reset_time=updated_rate_limit.reset_time,
-        last_updated=updated_rate_limit.last_updated
-    )
+    return updated_rate_limit
 
 
 @router.delete("/{api_name}", status_code=status.HTTP_204_NO_CONTENT)
@@ -176,7 +193,7 @@ async def delete_rate_limit(api_name: str, current_user: dict = Depends(get_curr
     user_id = current_user["sub"]
     
     # Delete from Redis
-    deleted = redis_client.delete_rate_limit(api_name=api_name, user_id=user_id)
+    deleted = await redis_client.delete_rate_limit(api_name=api_name, user_id=user_id)
     
     if not deleted:
         raise HTTPException(
@@ -4,7 +4,7 @@ from datetime import datetime, timedelta
 
 from ..schemas.stats import DashboardStats, RequestLog
 from ..utils.auth import get_current_user
-from ..utils.mock_db import get_api_keys_for_user, get_requests_log
+from ..utils.mock_db import count_user_api_keys, get_requests_log
 from ..utils import redis_client
 
 router = APIRouter(
@@ -21,9 +21,8 @@ async def get_dashboard_stats(current_user: dict = Depends(get_current_user)):
     """
     user_id = current_user["sub"]
     
-    # Get API keys for the user
-    api_keys = get_api_keys_for_user(user_id)
-    total_api_keys = len(api_keys) if api_keys else 0
+    # Count API keys for the user (nothing is decrypted)
+    total_api_keys = count_user_api_keys(user_id)
     
     # Get request logs from the last 30 days
     request_logs = get_requests_log(user_id, days=30)
@@ -45,7 +44,7 @@ async def get_dashboard_stats(current_user: dict = Depends(get_current_user)):
     
     # Get rate limit information
     rate_limits = {}
-    rate_limit_data = redis_client.get_all_rate_limits(user_id=user_id)
+    rate_limit_data = await redis_client.get_all_rate_limits(user_id=user_id)
     
     if rate_limit_data:
         for limit in rate_limit_data:
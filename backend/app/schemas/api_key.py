@@ -1,7 +1,10 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from typing import List, Optional
 from datetime import datetime
 
+# Most keys a single bulk request may create or delete
+MAX_BULK_API_KEYS = 1000
+
 class ApiKeyBase(BaseModel):
     api_name: str
     api_key: str
@@ -26,4 +29,18 @@ class ApiKey(ApiKeyBase):
     updated_at: datetime
 
     class Config:
-        from_attributes = True 
\ No newline at end of file
+        from_attributes = True 
+
+class ApiKeyMetadata(BaseModel):
+    id: str
+    api_name: str
+    created_at: datetime
+    updated_at: datetime
+
+class ApiKeyBulkDelete(BaseModel):
+    ids: List[str] = Field(..., min_length=1, max_length=MAX_BULK_API_KEYS)
+
+class ApiKeyBulkDeleteResult(BaseModel):
+    deleted: List[str] = Field(..., description="IDs of the deleted keys")
+    not_found: List[str] = Field(..., description="IDs that don't exist")
+    forbidden: List[str] = Field(..., description="IDs of keys owned by another user, left untouched")
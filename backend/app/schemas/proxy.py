@@ -1,6 +1,7 @@
 from pydantic import BaseModel, HttpUrl, Field
-from typing import Dict, Any, Optional, Union
+from typing import Dict, Any, List, Optional, Union
 from enum import Enum
+from datetime import datetime
 
 
 class HttpMethod(str, Enum):
@@ -13,16 +14,79 @@ class HttpMethod(str, Enum):
     OPTIONS = "OPTIONS"
 
 
+class RetryOptions(BaseModel):
+    # Capped by the server-side PROXY_RETRY_MAX_ATTEMPTS_LIMIT
+    max_attempts: Optional[int] = Field(None, ge=1)
+    # POST/PATCH are only retried when the caller opts in
+    retry_non_idempotent: bool = False
+
+
+class ProxyTimeouts(BaseModel):
+    # Seconds per phase plus an overall deadline, capped server-side
+    connect: Optional[float] = Field(None, gt=0)
+    read: Optional[float] = Field(None, gt=0)
+    write: Optional[float] = Field(None, gt=0)
+    pool: Optional[float] = Field(None, gt=0)
+    deadline: Optional[float] = Field(None, gt=0)
+
+
 class ProxyRequest(BaseModel):
     url: HttpUrl
     method: HttpMethod = HttpMethod.GET
     headers: Dict[str, str] = Field(default_factory=dict)
     body: Optional[Union[Dict[str, Any], str]] = None
     api_key_id: Optional[str] = None
+    retry: Optional[RetryOptions] = None
+    timeouts: Optional[ProxyTimeouts] = None
 
 
 class ProxyResponse(BaseModel):
     status_code: int
     headers: Dict[str, str]
     body: Any
-    time_taken: float 
\ No newline at end of file
+    time_taken: float
+    # "hit", "miss" or "revalidated" for cacheable requests, None otherwise
+    cache_status: Optional[str] = None
+    # True when this response was shared from an identical in-flight request
+    coalesced: bool = False
+    # Upstream attempts made and total time spent backing off (ms)
+    attempts: int = 1
+    retry_backoff: float = 0.0 
+
+
+class ProxyBatchRequest(BaseModel):
+    requests: List[ProxyRequest] = Field(..., min_length=1)
+    concurrency: Optional[int] = Field(None, ge=1)
+
+
+class ProxyBatchItem(BaseModel):
+    index: int
+    response: Optional[ProxyResponse] = None
+    error: Optional[str] = None
+    error_status_code: Optional[int] = None
+
+
+class ProxyBatchResponse(BaseModel):
+    responses: List[ProxyBatchItem]
+
+
+
+class CircuitStatus(BaseModel):
+    name: str
+    state: str
+    opened_at: Optional[datetime] = None
+    open_until: Optional[datetime] = None
+    calls: int = 0
+    failure_rate: float = 0.0
+    slow_call_rate: float = 0.0
+
+
+class KeyCacheStats(BaseModel):
+    hits: int = 0
+    misses: int = 0
+    hit_rate: float = 0.0
+    evictions: int = 0
+    expirations: int = 0
+    invalidations: int = 0
+    size: int = 0
+    max_size: int = 0
@@ -1,7 +1,11 @@
 from pydantic import BaseModel, Field
-from typing import Optional
+from typing import List, Optional
 from datetime import datetime
 
+# Most rate limits a single bulk request may touch, since each bulk write is
+# one Redis transaction
+MAX_BULK_RATE_LIMITS = 1000
+
 
 class RateLimit(BaseModel):
     """Rate limit information for an API"""
@@ -12,6 +16,8 @@ class RateLimit(BaseModel):
     last_updated: datetime = Field(..., description="When this rate limit data was last updated")
     
     class Config:
+        # Routers return RateLimitData records directly
+        from_attributes = True
         json_encoders = {
             datetime: lambda dt: dt.isoformat()
         }
@@ -29,4 +35,17 @@ class RateLimitUpdate(BaseModel):
     """Schema for updating a rate limit entry"""
     limit: Optional[int] = None
     remaining: Optional[int] = None
-    reset_time: Optional[datetime] = None 
\ No newline at end of file
+    reset_time: Optional[datetime] = None 
+
+
+class RateLimitBulkDelete(BaseModel):
+    """Schema for deleting several rate limits at once"""
+    api_names: List[str] = Field(
+        ..., min_length=1, max_length=MAX_BULK_RATE_LIMITS, description="Names of the API services"
+    )
+
+
+class RateLimitBulkDeleteResult(BaseModel):
+    """Outcome of a bulk delete"""
+    deleted: List[str] = Field(..., description="API names whose rate limit was deleted")
+    not_found: List[str] = Field(..., description="API names with no rate limit stored")
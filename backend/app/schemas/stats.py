@@ -17,4 +17,7 @@ class RequestLog(BaseModel):
     url: str
     method: str
     status_code: int
-    time_taken: float 
\ No newline at end of file
+    time_taken: float
+    coalesced: bool = False
+    attempts: int = 1
+    retry_backoff: float = 0.0 
\ No newline at end of file
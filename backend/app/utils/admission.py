@@ -0,0 +1,96 @@
+import asyncio
+import logging
+import math
+from datetime import datetime
+from typing import Optional
+
+from . import redis_client
+from .settings import api_env_float, api_env_str
+
+logger = logging.getLogger(__name__)
+
+# What to do when a stored rate limit shows no remaining requests:
+#   "reject" - fail fast with 429 and Retry-After
+#   "queue"  - wait until the limit resets (up to the max wait), then send
+#   "off"    - always send and let the upstream decide
+ADMISSION_POLICIES = ("reject", "queue", "off")
+DEFAULT_ADMISSION_POLICY = "reject"
+DEFAULT_MAX_QUEUE_WAIT = 30.0
+
+
+class AdmissionRejected(Exception):
+    """Raised when a request is refused locally because its quota is exhausted"""
+
+    def __init__(self, api_name: str, retry_after: float):
+        self.api_name = api_name
+        self.retry_after = retry_after
+        super().__init__(f"Rate limit for {api_name} exhausted, retry in {retry_after:.0f}s")
+
+    @property
+    def retry_after_header(self) -> str:
+        return str(max(1, math.ceil(self.retry_after)))
+
+
+def get_policy(api_name: str) -> str:
+    """Admission policy for an API (PROXY_ADMISSION_POLICY[_<API>])"""
+    policy = (api_env_str("PROXY_ADMISSION_POLICY", api_name, DEFAULT_ADMISSION_POLICY) or "").lower()
+    if policy not in ADMISSION_POLICIES:
+        logger.warning("Unknown admission policy %r for %s, using %s", policy, api_name, DEFAULT_ADMISSION_POLICY)
+        return DEFAULT_ADMISSION_POLICY
+    return policy
+
+
+def get_max_wait(api_name: str) -> float:
+    """Longest a queued request may wait (PROXY_ADMISSION_MAX_WAIT[_<API>])"""
+    return api_env_float("PROXY_ADMISSION_MAX_WAIT", api_name, DEFAULT_MAX_QUEUE_WAIT)
+
+
+def seconds_until_reset(rate_limit: Optional[redis_client.RateLimitData]) -> Optional[float]:
+    """
+    Seconds until an exhausted rate limit resets
+
+    Returns:
+        None if the quota is not known to be exhausted
+    """
+    if rate_limit is None or rate_limit.remaining > 0 or rate_limit.reset_time is None:
+        return None
+
+    reset_time = rate_limit.reset_time
+    wait = (reset_time - datetime.now(reset_time.tzinfo)).total_seconds()
+    return wait if wait > 0 else None
+
+
+async def get_stored_rate_limit(api_name: Optional[str], user_id: str) -> Optional[redis_client.RateLimitData]:
+    """Last rate limit recorded by the proxy for this API and user"""
+    if not api_name:
+        return None
+    return await redis_client.get_rate_limit(api_name=api_name.lower(), user_id=user_id)
+
+
+async def admit(api_name: Optional[str], rate_limit: Optional[redis_client.RateLimitData]) -> float:
+    """
+    Pre-flight check against the last rate limit seen for this API and user
+
+    Returns:
+        Seconds spent waiting for the limit to reset (0 if sent immediately)
+
+    Raises:
+        AdmissionRejected: if the quota is exhausted and the request may not wait
+    """
+    if not api_name:
+        return 0.0
+
+    policy = get_policy(api_name)
+    if policy == "off":
+        return 0.0
+
+    wait = seconds_until_reset(rate_limit)
+    if wait is None:
+        return 0.0
+
+    if policy == "queue" and wait <= get_max_wait(api_name):
+        logger.info("Rate limit for %s exhausted, queueing request for %.1fs", api_name, wait)
+        await asyncio.sleep(wait)
+        return wait
+
+    raise AdmissionRejected(api_name, wait)
@@ -0,0 +1,190 @@
+import asyncio
+import inspect
+import logging
+from typing import Any, Awaitable, Callable, Dict, Hashable, List, Optional, Set, Tuple
+
+from .settings import env_float, env_int
+
+logger = logging.getLogger(__name__)
+
+# Post-response work queue settings
+BOOKKEEPING_QUEUE_SIZE = env_int("PROXY_BOOKKEEPING_QUEUE_SIZE", 10000)
+BOOKKEEPING_BATCH_SIZE = env_int("PROXY_BOOKKEEPING_BATCH_SIZE", 100)
+BOOKKEEPING_FLUSH_TIMEOUT = env_float("PROXY_BOOKKEEPING_FLUSH_TIMEOUT", 5.0)
+
+# (coalescing key, function, args, kwargs)
+Job = Tuple[Optional[Hashable], Callable[..., Any], Tuple[Any, ...], Dict[str, Any]]
+
+_queue: Optional["asyncio.Queue[Job]"] = None
+_worker: Optional["asyncio.Task[None]"] = None
+_counters = {"submitted": 0, "processed": 0, "superseded": 0, "dropped": 0, "failed": 0}
+# Coroutine jobs started inline, referenced until they finish
+_inline_tasks: Set["asyncio.Future[Any]"] = set()
+# fn -> function that runs a whole batch of fn's calls at once
+_batchers: Dict[Callable[..., Any], Callable[[List[Tuple[Tuple[Any, ...], Dict[str, Any]]]], Any]] = {}
+
+
+def register_batch(
+    fn: Callable[..., Any],
+    batch_fn: Callable[[List[Tuple[Tuple[Any, ...], Dict[str, Any]]]], Any],
+):
+    """
+    Run the queued calls to fn of each batch as one batch_fn call
+
+    batch_fn gets the (args, kwargs) of every surviving call in submission
+    order, so writes can share a single round trip. Jobs run inline (before
+    the worker starts) still call fn directly.
+    """
+    _batchers[fn] = batch_fn
+
+
+def submit(fn: Callable[..., Any], *args: Any, key: Optional[Hashable] = None, **kwargs: Any) -> bool:
+    """
+    Queue fn(*args, **kwargs) to run after the response has been sent
+
+    fn may be a plain function or a coroutine function. Jobs sharing a `key`
+    within one batch collapse into the latest one, so repeated writes to the
+    same record only hit the store once. Until the worker is started (or
+    after it stopped) the job runs inline, coroutines as a separate task.
+
+    Returns:
+        False if the queue was full and the job was dropped
+    """
+    job = (key, fn, args, kwargs)
+    if _queue is None:
+        _run_inline(job)
+        return True
+
+    try:
+        _queue.put_nowait(job)
+    except asyncio.QueueFull:
+        _counters["dropped"] += 1
+        dropped = _counters["dropped"]
+        # Don't flood the output while saturated
+        if dropped & (dropped - 1) == 0:
+            logger.warning("Bookkeeping queue full, dropped %d jobs so far", dropped)
+        return False
+
+    _counters["submitted"] += 1
+    return True
+
+
+def stats() -> Dict[str, int]:
+    """Counters for the queue, including how many jobs were dropped"""
+    return {**_counters, "queued": _queue.qsize() if _queue is not None else 0}
+
+
+async def start():
+    """Start the worker that drains the queue in batches"""
+    global _queue, _worker
+    if _queue is not None:
+        return
+    _queue = asyncio.Queue(maxsize=BOOKKEEPING_QUEUE_SIZE)
+    _worker = asyncio.create_task(_drain(_queue))
+
+
+async def stop(timeout: float = BOOKKEEPING_FLUSH_TIMEOUT):
+    """Flush queued jobs, then stop the worker"""
+    global _queue, _worker
+    queue, worker = _queue, _worker
+    if queue is None or worker is None:
+        return
+
+    try:
+        await asyncio.wait_for(queue.join(), timeout)
+    except asyncio.TimeoutError:
+        logger.warning("Bookkeeping flush timed out with %d jobs left", queue.qsize())
+
+    worker.cancel()
+    try:
+        await worker
+    except asyncio.CancelledError:
+        pass
+
+    # Anything left over missed the flush deadline
+    _counters["dropped"] += queue.qsize()
+    _queue = None
+    _worker = None
+
+
+async def _drain(queue: "asyncio.Queue[Job]"):
+    while True:
+        batch = [await queue.get()]
+        while len(batch) < BOOKKEEPING_BATCH_SIZE and not queue.empty():
+            batch.append(queue.get_nowait())
+        try:
+            await _run_batch(batch)
+        finally:
+            for _ in batch:
+                queue.task_done()
+
+
+def _call(job: Job) -> Optional[Awaitable[Any]]:
+    """Run a job; returns the awaitable still to wait for, if it's a coroutine"""
+    _, fn, args, kwargs = job
+    try:
+        result = fn(*args, **kwargs)
+    except Exception:
+        _failed(fn)
+        return None
+    if inspect.isawaitable(result):
+        return result
+    _counters["processed"] += 1
+    return None
+
+
+async def _finish(job: Job, awaitable: Awaitable[Any]):
+    try:
+        await awaitable
+        _counters["processed"] += 1
+    except Exception:
+        _failed(job[1])
+
+
+def _failed(fn: Callable[..., Any]):
+    _counters["failed"] += 1
+    logger.exception("Bookkeeping job %s failed", getattr(fn, "__name__", fn))
+
+
+def _run_inline(job: Job):
+    awaitable = _call(job)
+    if awaitable is None:
+        return
+    task = asyncio.ensure_future(_finish(job, awaitable))
+    _inline_tasks.add(task)
+    task.add_done_callback(_inline_tasks.discard)
+
+
+async def _run_group(batch_fn: Callable[..., Any], jobs: List[Job]):
+    """Run the jobs for one registered fn through its batch function"""
+    try:
+        result = batch_fn([(args, kwargs) for _, _, args, kwargs in jobs])
+        if inspect.isawaitable(result):
+            await result
+        _counters["processed"] += len(jobs)
+    except Exception:
+        _counters["failed"] += len(jobs)
+        logger.exception(
+            "Bookkeeping batch %s failed for %d jobs", getattr(batch_fn, "__name__", batch_fn), len(jobs)
+        )
+
+
+async def _run_batch(batch: List[Job]):
+    latest = {key: index for index, (key, _, _, _) in enumerate(batch) if key is not None}
+    pending = []
+    groups: Dict[Callable[..., Any], List[Job]] = {}
+    for index, job in enumerate(batch):
+        key = job[0]
+        if key is not None and latest[key] != index:
+            _counters["superseded"] += 1
+            continue
+        if job[1] in _batchers:
+            groups.setdefault(job[1], []).append(job)
+            continue
+        awaitable = _call(job)
+        if awaitable is not None:
+            pending.append(_finish(job, awaitable))
+    for fn, jobs in groups.items():
+        pending.append(_run_group(_batchers[fn], jobs))
+    # Async writes of one batch share the connection pool concurrently
+    await asyncio.gather(*pending)
@@ -0,0 +1,227 @@
+import json
+import logging
+import math
+import time
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+from . import redis_client
+from .settings import env_float, env_int
+
+logger = logging.getLogger(__name__)
+
+# Circuit breaker settings, applied per upstream host
+BREAKER_WINDOW = env_float("PROXY_BREAKER_WINDOW", 60.0)  # seconds
+BREAKER_MIN_CALLS = env_int("PROXY_BREAKER_MIN_CALLS", 10)
+BREAKER_FAILURE_RATE = env_float("PROXY_BREAKER_FAILURE_RATE", 0.5)
+BREAKER_SLOW_CALL_MS = env_float("PROXY_BREAKER_SLOW_CALL_MS", 10000.0)
+BREAKER_SLOW_CALL_RATE = env_float("PROXY_BREAKER_SLOW_CALL_RATE", 0.8)
+BREAKER_OPEN_SECONDS = env_float("PROXY_BREAKER_OPEN_SECONDS", 30.0)
+BREAKER_HALF_OPEN_PROBES = env_int("PROXY_BREAKER_HALF_OPEN_PROBES", 1)
+BREAKER_PREFIX = "circuit:"
+
+# Breaker states
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitOpen(Exception):
+    """Raised instead of calling an upstream whose breaker is open"""
+
+    def __init__(self, name: str, retry_after: float):
+        self.name = name
+        self.retry_after = retry_after
+        super().__init__(f"Circuit for {name} is open, retry in {retry_after:.0f}s")
+
+    @property
+    def retry_after_header(self) -> str:
+        return str(max(1, math.ceil(self.retry_after)))
+
+
+class CircuitBreaker:
+    """
+    Closed/open/half-open breaker for one upstream
+
+    Call outcomes are kept in a sliding window per worker. When the failure
+    rate or slow-call rate over the window crosses its threshold the breaker
+    opens, and that state is written to Redis so every worker fails fast.
+    Once the open period has passed, each worker lets a limited number of
+    probe calls through; a good probe closes the breaker for everyone, a bad
+    one opens it again.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        # (timestamp, failed, slow) for recent calls
+        self._calls: Deque[Tuple[float, bool, bool]] = deque()
+        self._probes = 0
+
+    @property
+    def key(self) -> str:
+        return f"{BREAKER_PREFIX}{self.name}"
+
+    async def shared_state(self) -> Optional[Dict[str, Any]]:
+        """Open/half-open state shared through Redis (None when closed)"""
+        try:
+            data = await redis_client.get_client().get(self.key)
+        except Exception as e:
+            logger.warning("Error reading circuit state for %s: %s", self.name, e)
+            return None
+        if not data:
+            return None
+        try:
+            return json.loads(data)
+        except json.JSONDecodeError:
+            return None
+
+    async def before_call(self) -> bool:
+        """
+        Check whether a call may go ahead
+
+        Returns:
+            True if the call is a half-open probe
+
+        Raises:
+            CircuitOpen: if the breaker is open or its probes are all in use
+        """
+        shared = await self.shared_state()
+        if shared is None:
+            return False
+
+        remaining = shared["open_until"] - time.time()
+        if remaining > 0:
+            raise CircuitOpen(self.name, remaining)
+
+        if self._probes >= BREAKER_HALF_OPEN_PROBES:
+            raise CircuitOpen(self.name, 1)
+        self._probes += 1
+        return True
+
+    async def record(self, probe: bool, failed: bool, latency_ms: float, slow: bool = False):
+        """
+        Record the outcome of a call let through by before_call
+
+        Calls at or above PROXY_BREAKER_SLOW_CALL_MS count as slow; pass slow=True
+        for calls cut off before they could finish (a deadline, say).
+        """
+        slow = slow or latency_ms >= BREAKER_SLOW_CALL_MS
+
+        if probe:
+            self._probes = max(self._probes - 1, 0)
+            if failed or slow:
+                await self._open()
+            else:
+                await self._close()
+            return
+
+        now = time.time()
+        self._calls.append((now, failed, slow))
+        self._trim(now)
+
+        total, failure_rate, slow_rate = self.window_stats()
+        if total >= BREAKER_MIN_CALLS and (
+            failure_rate >= BREAKER_FAILURE_RATE or slow_rate >= BREAKER_SLOW_CALL_RATE
+        ):
+            await self._open()
+
+    def release(self, probe: bool):
+        """Give back a probe slot for a call that never completed"""
+        if probe:
+            self._probes = max(self._probes - 1, 0)
+
+    def window_stats(self) -> Tuple[int, float, float]:
+        """(calls, failure rate, slow-call rate) over the sliding window"""
+        self._trim(time.time())
+        total = len(self._calls)
+        if total == 0:
+            return 0, 0.0, 0.0
+        failures = sum(1 for _, failed, _ in self._calls if failed)
+        slow = sum(1 for _, _, is_slow in self._calls if is_slow)
+        return total, failures / total, slow / total
+
+    def _trim(self, now: float):
+        cutoff = now - BREAKER_WINDOW
+        while self._calls and self._calls[0][0] < cutoff:
+            self._calls.popleft()
+
+    async def _open(self):
+        now = time.time()
+        state = {
+            "name": self.name,
+            "opened_at": now,
+            "open_until": now + BREAKER_OPEN_SECONDS,
+        }
+        logger.warning(
+            "Opening circuit for %s for %.0fs", self.name, BREAKER_OPEN_SECONDS,
+            extra={"circuit": self.name, "circuit_state": OPEN},
+        )
+        # Keep the key past the open period so workers see the half-open state
+        ttl = int(BREAKER_OPEN_SECONDS + BREAKER_WINDOW * 10)
+        try:
+            await redis_client.get_client().set(self.key, json.dumps(state), ex=ttl)
+        except Exception as e:
+            logger.warning("Error storing circuit state for %s: %s", self.name, e)
+        self._calls.clear()
+
+    async def _close(self):
+        logger.info("Closing circuit for %s", self.name, extra={"circuit": self.name, "circuit_state": CLOSED})
+        try:
+            await redis_client.get_client().delete(self.key)
+        except Exception as e:
+            logger.warning("Error clearing circuit state for %s: %s", self.name, e)
+        self._calls.clear()
+
+
+# One breaker per upstream in this worker
+_breakers: Dict[str, CircuitBreaker] = {}
+
+
+def get_breaker(name: str) -> CircuitBreaker:
+    """Get (or create) the breaker for an upstream"""
+    breaker = _breakers.get(name)
+    if breaker is None:
+        breaker = CircuitBreaker(name)
+        _breakers[name] = breaker
+    return breaker
+
+
+async def list_circuits() -> List[Dict[str, Any]]:
+    """
+    State of every known breaker
+
+    Combines the breakers tripped in any worker (from Redis) with the ones
+    this worker has seen traffic for.
+    """
+    names = set(_breakers)
+    try:
+        async for key in redis_client.get_client().scan_iter(match=f"{BREAKER_PREFIX}*"):
+            names.add(key[len(BREAKER_PREFIX):])
+    except Exception as e:
+        logger.warning("Error listing circuit states: %s", e)
+
+    circuits = []
+    for name in sorted(names):
+        breaker = get_breaker(name)
+        shared = await breaker.shared_state()
+        total, failure_rate, slow_rate = breaker.window_stats()
+
+        state = CLOSED
+        if shared is not None:
+            state = OPEN if time.time() < shared["open_until"] else HALF_OPEN
+
+        circuits.append({
+            "name": name,
+            "state": state,
+            "opened_at": shared["opened_at"] if shared else None,
+            "open_until": shared["open_until"] if shared else None,
+            "calls": total,
+            "failure_rate": failure_rate,
+            "slow_call_rate": slow_rate,
+        })
+    return circuits
+
+
+def reset():
+    """Forget all local breaker state"""
+    _breakers.clear()
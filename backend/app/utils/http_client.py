@@ -0,0 +1,101 @@
+import asyncio
+import logging
+import httpx
+from typing import Dict, Optional
+
+from .settings import env_bool, env_float, env_int
+
+logger = logging.getLogger(__name__)
+
+# Connection pool settings for outbound proxy traffic
+PROXY_MAX_CONNECTIONS = env_int("PROXY_MAX_CONNECTIONS", 200)
+PROXY_MAX_KEEPALIVE_CONNECTIONS = env_int("PROXY_MAX_KEEPALIVE_CONNECTIONS", 50)
+PROXY_MAX_CONNECTIONS_PER_HOST = env_int("PROXY_MAX_CONNECTIONS_PER_HOST", 20)
+PROXY_MAX_CONCURRENCY_PER_USER = env_int("PROXY_MAX_CONCURRENCY_PER_USER", 10)
+PROXY_KEEPALIVE_EXPIRY = env_float("PROXY_KEEPALIVE_EXPIRY", 30.0)
+PROXY_HTTP2 = env_bool("PROXY_HTTP2", False)
+PROXY_TIMEOUT = env_float("PROXY_TIMEOUT", 30.0)
+
+# App-lifetime client, created on startup (or lazily on first use)
+_client: Optional[httpx.AsyncClient] = None
+
+# One semaphore per upstream host to cap concurrent connections to it
+_host_semaphores: Dict[str, asyncio.Semaphore] = {}
+
+# One semaphore per user to cap how many batched requests run at once
+_user_semaphores: Dict[str, asyncio.Semaphore] = {}
+
+
+def _http2_enabled() -> bool:
+    """HTTP/2 is opt-in and needs the optional h2 package"""
+    if not PROXY_HTTP2:
+        return False
+    try:
+        import h2  # noqa: F401
+    except ImportError:
+        logger.warning("PROXY_HTTP2 is set but the h2 package is not installed, using HTTP/1.1")
+        return False
+    return True
+
+
+def create_client() -> httpx.AsyncClient:
+    """Build a pooled AsyncClient from the configured limits"""
+    limits = httpx.Limits(
+        max_connections=PROXY_MAX_CONNECTIONS,
+        max_keepalive_connections=PROXY_MAX_KEEPALIVE_CONNECTIONS,
+        keepalive_expiry=PROXY_KEEPALIVE_EXPIRY,
+    )
+    return httpx.AsyncClient(
+        timeout=PROXY_TIMEOUT,
+        limits=limits,
+        http2=_http2_enabled(),
+    )
+
+
+async def start_client() -> httpx.AsyncClient:
+    """Create the shared client; called from the app lifespan"""
+    global _client
+    if _client is None or _client.is_closed:
+        _client = create_client()
+    return _client
+
+
+async def close_client():
+    """Close the shared client and release pooled connections"""
+    global _client
+    if _client is not None:
+        await _client.aclose()
+    _client = None
+    _host_semaphores.clear()
+    _user_semaphores.clear()
+
+
+def get_http_client() -> httpx.AsyncClient:
+    """
+    FastAPI dependency returning the shared client
+
+    Falls back to creating the client lazily when the app lifespan
+    has not run (e.g. a TestClient used outside a ``with`` block).
+    """
+    global _client
+    if _client is None or _client.is_closed:
+        _client = create_client()
+    return _client
+
+
+def host_semaphore(host: str) -> asyncio.Semaphore:
+    """Get the semaphore limiting concurrent requests to an upstream host"""
+    semaphore = _host_semaphores.get(host)
+    if semaphore is None:
+        semaphore = asyncio.Semaphore(PROXY_MAX_CONNECTIONS_PER_HOST)
+        _host_semaphores[host] = semaphore
+    return semaphore
+
+
+def user_semaphore(user_id: str) -> asyncio.Semaphore:
+    """Get the semaphore limiting concurrent batched requests for a user"""
+    semaphore = _user_semaphores.get(user_id)
+    if semaphore is None:
+        semaphore = asyncio.Semaphore(PROXY_MAX_CONCURRENCY_PER_USER)
+        _user_semaphores[user_id] = semaphore
+    return semaphore
@@ -0,0 +1,114 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+from .settings import env_float, env_int
+
+# Decrypted API keys for the proxy hot path, so a hot key costs neither a
+# database read nor a Fernet decryption per request. Entries are evicted
+# least-recently-used once the cache is full, and expire after the TTL so
+# changes made by other processes are picked up.
+API_KEY_CACHE_SIZE = env_int("API_KEY_CACHE_SIZE", 1024)
+API_KEY_CACHE_TTL = env_float("API_KEY_CACHE_TTL", 300.0)
+
+
+class CachedKey:
+    """
+    One resolved API key record
+
+    The plaintext lives in a bytearray so it can be overwritten in place when
+    the entry leaves the cache. Copies handed out as str (the header value)
+    are ordinary Python strings and are not covered by that.
+    """
+
+    __slots__ = ("item", "secret", "expires_at")
+
+    def __init__(self, item: Dict[str, Any], expires_at: float):
+        self.item = {name: value for name, value in item.items() if name != "api_key"}
+        self.secret = bytearray(item.get("api_key", "").encode())
+        self.expires_at = expires_at
+
+    def resolve(self) -> Dict[str, Any]:
+        """The record as get_api_key returns it, with the plaintext key"""
+        return {**self.item, "api_key": self.secret.decode()}
+
+    def wipe(self):
+        """Zero the plaintext key"""
+        self.secret[:] = bytes(len(self.secret))
+
+
+_entries: "OrderedDict[str, CachedKey]" = OrderedDict()
+# Shared by the event loop and any threads resolving keys
+_lock = threading.Lock()
+_counters = {"hits": 0, "misses": 0, "evictions": 0, "expirations": 0, "invalidations": 0}
+
+
+def get(key_id: str) -> Optional[Dict[str, Any]]:
+    """Cached record for a key ID, or None on a miss"""
+    with _lock:
+        entry = _entries.get(key_id)
+        if entry is None:
+            _counters["misses"] += 1
+            return None
+        if entry.expires_at <= time.monotonic():
+            _discard(key_id)
+            _counters["expirations"] += 1
+            _counters["misses"] += 1
+            return None
+        _entries.move_to_end(key_id)
+        _counters["hits"] += 1
+        return entry.resolve()
+
+
+def put(key_id: str, item: Dict[str, Any]):
+    """Cache a decrypted record, evicting the least recently used if full"""
+    if API_KEY_CACHE_SIZE <= 0 or API_KEY_CACHE_TTL <= 0:
+        return
+    with _lock:
+        _discard(key_id)
+        _entries[key_id] = CachedKey(item, time.monotonic() + API_KEY_CACHE_TTL)
+        while len(_entries) > API_KEY_CACHE_SIZE:
+            _discard(next(iter(_entries)))
+            _counters["evictions"] += 1
+
+
+def invalidate(key_id: str) -> bool:
+    """
+    Drop and wipe a cached key, e.g. after it was updated or deleted
+
+    Returns:
+        True if the key was cached
+    """
+    with _lock:
+        if not _discard(key_id):
+            return False
+        _counters["invalidations"] += 1
+        return True
+
+
+def clear():
+    """Drop and wipe every cached key"""
+    with _lock:
+        for key_id in list(_entries):
+            _discard(key_id)
+
+
+def stats() -> Dict[str, Any]:
+    """Hit/miss counters, hit rate and current size"""
+    with _lock:
+        lookups = _counters["hits"] + _counters["misses"]
+        return {
+            **_counters,
+            "size": len(_entries),
+            "max_size": API_KEY_CACHE_SIZE,
+            "hit_rate": _counters["hits"] / lookups if lookups else 0.0,
+        }
+
+
+def _discard(key_id: str) -> bool:
+    entry = _entries.pop(key_id, None)
+    if entry is None:
+        return False
+    entry.wipe()
+    return True
@@ -1,10 +1,18 @@
+import base64
+import json
+import time
 import uuid
 import boto3
 from datetime import datetime, timedelta
 from moto import mock_aws
 import os
+from collections.abc import Mapping
+from concurrent.futures import ThreadPoolExecutor
 from cryptography.fernet import Fernet
-from typing import List, Dict, Any, Optional
+from typing import Iterable, Iterator, List, Dict, Any, Optional, Tuple
+
+from . import key_cache
+from .settings import env_int
 
 # Initialize moto mock
 dynamodb_mock = mock_aws()
@@ -91,39 +99,290 @@ def decrypt_api_key(encrypted_key: str) -> str:
 # Create a new API key
 def create_api_key(user_id: str, api_name: str, api_key: str):
     """Create a new API key in the mock DynamoDB"""
-    key_id = str(uuid.uuid4())
-    encrypted_key = encrypt_api_key(api_key)
-    timestamp = datetime.now().isoformat()
+    return create_api_key_item(user_id, api_name, api_key)['id']
+
+def create_api_key_item(user_id: str, api_name: str, api_key: str) -> Dict[str, Any]:
+    """
+    Create a new API key and return the item that was written
     
-    item = {
-        'id': key_id,
+    Returns:
+        The created item, shaped like get_api_key results, without reading it back
+    """
+    item = _new_item(user_id, api_name, encrypt_api_key(api_key), datetime.now().isoformat())
+    api_keys_table.put_item(Item=item)
+    return _with_plaintext(item, api_key)
+
+def _new_item(user_id: str, api_name: str, encrypted_key: str, timestamp: str) -> Dict[str, Any]:
+    return {
+        'id': str(uuid.uuid4()),
         'user_id': user_id,
         'api_name': api_name,
         'encrypted_key': encrypted_key,
         'created_at': timestamp,
         'updated_at': timestamp
     }
+
+def _with_plaintext(item: Dict[str, Any], api_key: str) -> Dict[str, Any]:
+    """Swap the stored ciphertext for the plaintext the caller already has"""
+    item = dict(item, api_key=api_key)
+    item.pop('encrypted_key', None)
+    return item
+
+# BatchWriteItem takes at most 25 requests, BatchGetItem 100 keys
+BATCH_WRITE_SIZE = 25
+BATCH_GET_SIZE = 100
+# Attempts at writing items DynamoDB hands back as unprocessed (throttling)
+BATCH_WRITE_ATTEMPTS = env_int("API_KEY_BATCH_WRITE_ATTEMPTS", 5)
+BATCH_WRITE_BACKOFF = 0.05
+# Threads encrypting keys for bulk imports
+API_KEY_ENCRYPT_WORKERS = env_int("API_KEY_ENCRYPT_WORKERS", min(8, os.cpu_count() or 1))
+
+_encrypt_pool = None
+
+def _encrypt_all(api_keys: List[str]) -> List[str]:
+    """Encrypt many keys on a shared thread pool (OpenSSL releases the GIL)"""
+    global _encrypt_pool
+    if len(api_keys) < 2 or API_KEY_ENCRYPT_WORKERS <= 1:
+        return [encrypt_api_key(api_key) for api_key in api_keys]
+    if _encrypt_pool is None:
+        _encrypt_pool = ThreadPoolExecutor(API_KEY_ENCRYPT_WORKERS, thread_name_prefix="api-key-encrypt")
+    return list(_encrypt_pool.map(encrypt_api_key, api_keys, chunksize=32))
+
+class BatchWriteIncomplete(RuntimeError):
+    """Batch write requests still unprocessed after every retry"""
+
+    def __init__(self, unprocessed: List[Dict[str, Any]]):
+        self.unprocessed = unprocessed
+        super().__init__(
+            f"{len(unprocessed)} API key writes still unprocessed after {BATCH_WRITE_ATTEMPTS} attempts"
+        )
+
+class ApiKeyBulkCreateIncomplete(Exception):
+    """A bulk import stopped partway; some keys were written and some weren't"""
+
+    def __init__(self, created: List[Dict[str, Any]], unprocessed: List[int]):
+        self.created = created
+        self.unprocessed = unprocessed
+        super().__init__(f"{len(unprocessed)} of {len(created) + len(unprocessed)} API keys were not created")
+
+def _batch_write(requests: List[Dict[str, Any]]):
+    """
+    Run put/delete requests through BatchWriteItem, 25 at a time
     
-    api_keys_table.put_item(Item=item)
-    return key_id
+    Items DynamoDB returns as unprocessed are retried with exponential backoff.
+    
+    Raises:
+        BatchWriteIncomplete: if items are still unprocessed after
+            BATCH_WRITE_ATTEMPTS; it carries those requests and every one
+            from later chunks, which were never sent
+    """
+    for start in range(0, len(requests), BATCH_WRITE_SIZE):
+        pending = {'api_keys': requests[start:start + BATCH_WRITE_SIZE]}
+        for attempt in range(BATCH_WRITE_ATTEMPTS):
+            response = dynamodb.batch_write_item(RequestItems=pending)
+            pending = response.get('UnprocessedItems') or {}
+            if not pending.get('api_keys'):
+                break
+            time.sleep(BATCH_WRITE_BACKOFF * 2 ** attempt)
+        else:
+            raise BatchWriteIncomplete(pending['api_keys'] + requests[start + BATCH_WRITE_SIZE:])
 
-# Get all API keys for a user
-def get_user_api_keys(user_id: str):
-    """Get all API keys for a specific user"""
-    response = api_keys_table.query(
+# Create many API keys at once
+def create_api_keys_bulk(user_id: str, api_keys: List[Tuple[str, str]]) -> List[Dict[str, Any]]:
+    """
+    Create API keys from (api_name, api_key) pairs with BatchWriteItem
+    
+    Returns:
+        The created items, shaped like get_api_key results
+    
+    Raises:
+        ApiKeyBulkCreateIncomplete: if some writes never went through; it
+            carries the items that were created and the indexes of the rest
+    """
+    encrypted_keys = _encrypt_all([api_key for _, api_key in api_keys])
+    timestamp = datetime.now().isoformat()
+    
+    items = [
+        _new_item(user_id, api_name, encrypted_key, timestamp)
+        for (api_name, _), encrypted_key in zip(api_keys, encrypted_keys)
+    ]
+    # Echo the plaintext the caller sent instead of decrypting it again
+    created = [_with_plaintext(item, api_key) for item, (_, api_key) in zip(items, api_keys)]
+    
+    try:
+        _batch_write([{'PutRequest': {'Item': item}} for item in items])
+    except BatchWriteIncomplete as e:
+        unwritten = {request['PutRequest']['Item']['id'] for request in e.unprocessed}
+        raise ApiKeyBulkCreateIncomplete(
+            created=[item for item in created if item['id'] not in unwritten],
+            unprocessed=[index for index, item in enumerate(items) if item['id'] in unwritten],
+        )
+    
+    return created
+
+# Delete many of a user's API keys at once
+def delete_api_keys_bulk(user_id: str, key_ids: Iterable[str]) -> Dict[str, List[Dict[str, Any]]]:
+    """
+    Delete the user's own keys among key_ids with BatchWriteItem
+    
+    Returns:
+        {"deleted": items, "not_found": ids, "forbidden": ids}, where deleted
+        items carry id and api_name and forbidden ids belong to other users
+    """
+    key_ids = list(dict.fromkeys(key_ids))
+    found = {}
+    for start in range(0, len(key_ids), BATCH_GET_SIZE):
+        pending = {'api_keys': {
+            'Keys': [{'id': key_id} for key_id in key_ids[start:start + BATCH_GET_SIZE]],
+            **_projection(('id', 'user_id', 'api_name'))
+        }}
+        while pending.get('api_keys'):
+            response = dynamodb.batch_get_item(RequestItems=pending)
+            for item in response.get('Responses', {}).get('api_keys', []):
+                found[item['id']] = item
+            pending = response.get('UnprocessedKeys') or {}
+    
+    deleted = [found[key_id] for key_id in key_ids if key_id in found and found[key_id]['user_id'] == user_id]
+    _batch_write([{'DeleteRequest': {'Key': {'id': item['id']}}} for item in deleted])
+    for item in deleted:
+        key_cache.invalidate(item['id'])
+    
+    return {
+        'deleted': [{'id': item['id'], 'api_name': item.get('api_name', '')} for item in deleted],
+        'not_found': [key_id for key_id in key_ids if key_id not in found],
+        'forbidden': [key_id for key_id in key_ids if key_id in found and found[key_id]['user_id'] != user_id],
+    }
+
+# Stored API key whose secret is only decrypted when it's read
+class LazyApiKey(Mapping):
+    """
+    Read-only view of a stored API key, shaped like the dicts get_api_key returns
+
+    The Fernet decryption runs on the first access to "api_key" (including
+    iterating over the whole item), so callers that only use names or IDs
+    never pay for it.
+    """
+
+    __slots__ = ("_item", "_encrypted_key", "_api_key")
+
+    def __init__(self, item: Dict[str, Any]):
+        self._item = {name: value for name, value in item.items() if name != 'encrypted_key'}
+        self._encrypted_key = item.get('encrypted_key')
+        self._api_key = None
+
+    def __getitem__(self, name: str) -> Any:
+        if name == 'api_key' and self._encrypted_key is not None:
+            if self._api_key is None:
+                self._api_key = decrypt_api_key(self._encrypted_key)
+            return self._api_key
+        return self._item[name]
+
+    def __iter__(self) -> Iterator[str]:
+        yield from self._item
+        if self._encrypted_key is not None:
+            yield 'api_key'
+
+    def __len__(self) -> int:
+        return len(self._item) + (self._encrypted_key is not None)
+
+    @property
+    def decrypted(self) -> bool:
+        return self._api_key is not None
+
+# Query a user's API keys through the GSI, following pagination
+def _query_user_api_keys(user_id: str, **kwargs) -> Iterator[Dict[str, Any]]:
+    query = dict(
         IndexName='user_id-index',
-        KeyConditionExpression=boto3.dynamodb.conditions.Key('user_id').eq(user_id)
+        KeyConditionExpression=boto3.dynamodb.conditions.Key('user_id').eq(user_id),
+        **kwargs
     )
+    while True:
+        response = api_keys_table.query(**query)
+        yield response
+        if 'LastEvaluatedKey' not in response:
+            return
+        query['ExclusiveStartKey'] = response['LastEvaluatedKey']
+
+# Attributes an API key listing returns; anything else stored is left behind
+API_KEY_ATTRIBUTES = ('id', 'user_id', 'api_name', 'encrypted_key', 'created_at', 'updated_at')
+
+# ProjectionExpression (with placeholder names) for a query
+def _projection(attributes: Iterable[str]) -> Dict[str, Any]:
+    names = {f'#{name}': name for name in attributes}
+    return {'ProjectionExpression': ', '.join(names), 'ExpressionAttributeNames': names}
+
+# Opaque pagination cursor for a LastEvaluatedKey
+def _encode_token(last_key: Dict[str, Any]) -> str:
+    return base64.urlsafe_b64encode(json.dumps(last_key, sort_keys=True).encode()).decode()
+
+def _decode_token(token: str, user_id: str) -> Dict[str, Any]:
+    """LastEvaluatedKey from a cursor, which must belong to the user's own listing"""
+    try:
+        last_key = json.loads(base64.urlsafe_b64decode(token.encode()))
+    except ValueError:
+        raise ValueError("Invalid next_token")
+    if not isinstance(last_key, dict) or set(last_key) != {'id', 'user_id'} or last_key['user_id'] != user_id:
+        raise ValueError("Invalid next_token")
+    return last_key
+
+# Get one page of a user's API keys
+def get_user_api_keys_page(
+    user_id: str,
+    limit: int,
+    next_token: Optional[str] = None
+) -> Tuple[List[LazyApiKey], Optional[str]]:
+    """
+    Get up to `limit` API keys for a user, continuing from `next_token`
     
-    keys = []
-    for item in response.get('Items', []):
-        # Replace encrypted key with original
-        item['api_key'] = decrypt_api_key(item['encrypted_key'])
-        # Remove encrypted_key from response
-        item.pop('encrypted_key', None)
-        keys.append(item)
+    Returns:
+        Tuple of (keys, next_token), where next_token is None on the last page
     
-    return keys
+    Raises:
+        ValueError: if next_token is malformed or from another user's listing
+    """
+    query = dict(
+        IndexName='user_id-index',
+        KeyConditionExpression=boto3.dynamodb.conditions.Key('user_id').eq(user_id),
+        Limit=limit,
+        **_projection(API_KEY_ATTRIBUTES)
+    )
+    if next_token:
+        query['ExclusiveStartKey'] = _decode_token(next_token, user_id)
+    
+    response = api_keys_table.query(**query)
+    last_key = response.get('LastEvaluatedKey')
+    keys = [LazyApiKey(item) for item in response.get('Items', [])]
+    return keys, _encode_token(last_key) if last_key else None
+
+# Walk every page of a user's API keys
+def iter_user_api_keys(user_id: str, page_size: Optional[int] = None) -> Iterator[LazyApiKey]:
+    """Yield all of a user's API keys, querying one page at a time"""
+    kwargs = _projection(API_KEY_ATTRIBUTES)
+    if page_size:
+        kwargs['Limit'] = page_size
+    for response in _query_user_api_keys(user_id, **kwargs):
+        for item in response.get('Items', []):
+            yield LazyApiKey(item)
+
+# Get all API keys for a user
+def get_user_api_keys(user_id: str) -> List[LazyApiKey]:
+    """Get all API keys for a specific user, decrypting each key on first access"""
+    return list(iter_user_api_keys(user_id))
+
+# Count a user's API keys without reading them
+def count_user_api_keys(user_id: str) -> int:
+    """Number of API keys a user has stored"""
+    return sum(response['Count'] for response in _query_user_api_keys(user_id, Select='COUNT'))
+
+# List a user's API keys without their secrets
+def list_user_api_key_metadata(user_id: str) -> List[Dict[str, Any]]:
+    """Get id, api_name and timestamps of a user's API keys; encrypted keys are never read"""
+    attributes = [name for name in API_KEY_ATTRIBUTES if name != 'encrypted_key']
+    return [
+        item
+        for response in _query_user_api_keys(user_id, **_projection(attributes))
+        for item in response.get('Items', [])
+    ]
 
 # Get a specific API key by ID
 def get_api_key(key_id: str):
@@ -139,9 +398,50 @@ def get_api_key(key_id: str):
         
     return item
 
+# Get a specific API key by ID, through the decrypted key cache
+def get_api_key_cached(key_id: str):
+    """Get a specific API key by ID, reusing a recent decryption (proxy hot path)"""
+    item = key_cache.get(key_id)
+    if item is None:
+        item = get_api_key(key_id)
+        if item:
+            key_cache.put(key_id, item)
+    return item
+
 # Update an API key
-def update_api_key(key_id: str, api_name: str = None, api_key: str = None):
-    """Update an API key in the mock DynamoDB"""
+class ApiKeyNotFound(Exception):
+    """The API key doesn't exist"""
+
+class ApiKeyForbidden(Exception):
+    """The API key belongs to another user"""
+
+def _owner_condition(user_id: Optional[str]) -> Dict[str, Any]:
+    """
+    Write arguments that make DynamoDB check ownership as part of the write
+    
+    On failure the stored item comes back with the exception, which tells a
+    key owned by someone else apart from a missing one.
+    """
+    if user_id is None:
+        return {}
+    return {
+        'ConditionExpression': 'attribute_exists(id) AND user_id = :uid',
+        'ReturnValuesOnConditionCheckFailure': 'ALL_OLD',
+    }
+
+def _raise_for_owner(error: Exception, key_id: str):
+    if 'Item' in getattr(error, 'response', {}):
+        raise ApiKeyForbidden(key_id) from error
+    raise ApiKeyNotFound(key_id) from error
+
+# Update an API key
+def update_api_key(key_id: str, api_name: str = None, api_key: str = None, user_id: str = None):
+    """
+    Update an API key in the mock DynamoDB
+    
+    With user_id the write only goes through if the key exists and belongs to
+    that user, otherwise ApiKeyNotFound or ApiKeyForbidden is raised.
+    """
     update_expression = "SET updated_at = :updated_at"
     expression_values = {':updated_at': datetime.now().isoformat()}
     
@@ -153,28 +453,56 @@ def update_api_key(key_id: str, api_name: str = None, api_key: str = None):
         update_expression += ", encrypted_key = :encrypted_key"
         expression_values[':encrypted_key'] = encrypt_api_key(api_key)
     
-    response = api_keys_table.update_item(
-        Key={'id': key_id},
-        UpdateExpression=update_expression,
-        ExpressionAttributeValues=expression_values,
-        ReturnValues='ALL_NEW'
-    )
+    if user_id is not None:
+        expression_values[':uid'] = user_id
+    
+    try:
+        response = api_keys_table.update_item(
+            Key={'id': key_id},
+            UpdateExpression=update_expression,
+            ExpressionAttributeValues=expression_values,
+            ReturnValues='ALL_NEW',
+            **_owner_condition(user_id)
+        )
+    except api_keys_table.meta.client.exceptions.ConditionalCheckFailedException as e:
+        _raise_for_owner(e, key_id)
+    finally:
+        key_cache.invalidate(key_id)
     
     updated_item = response.get('Attributes', {})
     
-    # Replace encrypted key with original
+    # A new key was just sent in plaintext, so only an unchanged key is decrypted
+    if api_key:
+        return _with_plaintext(updated_item, api_key)
     if 'encrypted_key' in updated_item:
-        updated_item['api_key'] = decrypt_api_key(updated_item['encrypted_key'])
-        # Remove encrypted_key from response
-        updated_item.pop('encrypted_key', None)
-    
+        return _with_plaintext(updated_item, decrypt_api_key(updated_item['encrypted_key']))
     return updated_item
 
 # Delete an API key
-def delete_api_key(key_id: str):
-    """Delete an API key from the mock DynamoDB"""
-    api_keys_table.delete_item(Key={'id': key_id})
-    return True
+def delete_api_key(key_id: str, user_id: str = None):
+    """
+    Delete an API key from the mock DynamoDB
+    
+    With user_id the delete only goes through if the key exists and belongs to
+    that user, otherwise ApiKeyNotFound or ApiKeyForbidden is raised.
+    
+    Returns:
+        The deleted item without its encrypted key (empty if there was none)
+    """
+    kwargs = _owner_condition(user_id)
+    if user_id is not None:
+        kwargs['ExpressionAttributeValues'] = {':uid': user_id}
+    
+    try:
+        response = api_keys_table.delete_item(Key={'id': key_id}, ReturnValues='ALL_OLD', **kwargs)
+    except api_keys_table.meta.client.exceptions.ConditionalCheckFailedException as e:
+        _raise_for_owner(e, key_id)
+    finally:
+        key_cache.invalidate(key_id)
+    
+    deleted_item = response.get('Attributes', {})
+    deleted_item.pop('encrypted_key', None)
+    return deleted_item
 
 # Alias for get_api_key for backward compatibility
 def get_api_key_by_id(key_id: str):
@@ -187,7 +515,16 @@ def get_api_keys_for_user(user_id: str):
     return get_user_api_keys(user_id)
 
 # Log API request
-def log_request(user_id: str, url: str, method: str, status_code: int, time_taken: float):
+def log_request(
+    user_id: str,
+    url: str,
+    method: str,
+    status_code: int,
+    time_taken: float,
+    coalesced: bool = False,
+    attempts: int = 1,
+    retry_backoff: float = 0.0
+):
     """Log an API request to the in-memory store"""
     if user_id not in request_logs:
         request_logs[user_id] = []
@@ -197,7 +534,10 @@ def log_request(user_id: str, url: str, method: str, status_code: int, time_take
         "url": str(url),
         "method": method,
         "status_code": status_code,
-        "time_taken": time_taken
+        "time_taken": time_taken,
+        "coalesced": coalesced,
+        "attempts": attempts,
+        "retry_backoff": retry_backoff
     })
     
     # Keep only last 1000 requests per user to avoid memory issues
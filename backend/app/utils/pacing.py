@@ -0,0 +1,143 @@
+import asyncio
+import logging
+import time
+from datetime import datetime
+from typing import Dict, Optional
+
+from . import redis_client
+from .admission import AdmissionRejected
+from .settings import api_env_float, env_bool
+
+logger = logging.getLogger(__name__)
+
+# Pace outbound requests so a quota is spread across its window instead of
+# being spent in the first second. Uses GCRA (generic cell rate algorithm):
+# each (user, api) has a "theoretical arrival time" (TAT) that advances by one
+# emission interval per request; a request may go once now >= TAT - tolerance.
+PACING_ENABLED = env_bool("PROXY_PACING", True)
+PACING_PREFIX = "pacing:"
+DEFAULT_PACING_BURST = 10
+DEFAULT_PACING_MAX_WAIT = 10.0
+
+# Atomic GCRA reservation, shared by every worker through Redis.
+# Returns the seconds to wait as a string ("0" when the request may go now),
+# since Lua numbers are truncated to integers in Redis replies.
+GCRA_SCRIPT = """
+local now_parts = redis.call('TIME')
+local now = tonumber(now_parts[1]) + tonumber(now_parts[2]) / 1000000
+local interval = tonumber(ARGV[1])
+local tolerance = tonumber(ARGV[2])
+
+local tat = tonumber(redis.call('GET', KEYS[1]) or now)
+if tat < now then
+    tat = now
+end
+
+local allow_at = tat - tolerance
+if now < allow_at then
+    return tostring(allow_at - now)
+end
+
+local new_tat = tat + interval
+local ttl_ms = math.ceil((new_tat - now) * 1000) + 1000
+redis.call('SET', KEYS[1], tostring(new_tat), 'PX', ttl_ms)
+return '0'
+"""
+
+_gcra_script = None
+# Set while the script keeps failing, so an outage is only warned about once
+_script_failing = False
+
+# Per-process fallback when Redis scripting isn't available (AsyncMockRedis)
+_local_tats: Dict[str, float] = {}
+
+
+def _pacing_key(api_name: str, user_id: str) -> str:
+    return f"{PACING_PREFIX}{api_name.lower()}:{user_id}"
+
+
+def _reserve_local(key: str, interval: float, tolerance: float) -> float:
+    """Same algorithm as GCRA_SCRIPT, for a single process"""
+    now = time.time()
+    tat = max(_local_tats.get(key, now), now)
+    allow_at = tat - tolerance
+    if now < allow_at:
+        return allow_at - now
+    _local_tats[key] = tat + interval
+    return 0.0
+
+
+async def _reserve(key: str, interval: float, tolerance: float) -> float:
+    """Try to take a slot; returns seconds to wait before retrying (0 = go)"""
+    global _gcra_script, _script_failing
+    client = redis_client.get_client()
+    if not hasattr(client, "register_script"):
+        return _reserve_local(key, interval, tolerance)
+
+    try:
+        if _gcra_script is None:
+            _gcra_script = client.register_script(GCRA_SCRIPT)
+        wait = float(await _gcra_script(keys=[key], args=[interval, tolerance], client=client))
+    except Exception as e:
+        if _script_failing:
+            logger.debug("Error running pacing script, pacing locally: %s", e)
+        else:
+            logger.warning("Error running pacing script, pacing locally until it recovers: %s", e)
+            _script_failing = True
+        return _reserve_local(key, interval, tolerance)
+
+    if _script_failing:
+        logger.info("Pacing script recovered, pacing through Redis again")
+        _script_failing = False
+    return wait
+
+
+def emission_interval(rate_limit: redis_client.RateLimitData) -> Optional[float]:
+    """
+    Seconds between requests that spreads the remaining quota until reset
+
+    Returns:
+        None when there is no budget to pace (unknown, exhausted or already reset)
+    """
+    if rate_limit is None or rate_limit.remaining <= 0 or rate_limit.reset_time is None:
+        return None
+
+    reset_time = rate_limit.reset_time
+    window = (reset_time - datetime.now(reset_time.tzinfo)).total_seconds()
+    if window <= 0:
+        return None
+
+    return window / rate_limit.remaining
+
+
+async def acquire(api_name: Optional[str], user_id: str, rate_limit: Optional[redis_client.RateLimitData]) -> float:
+    """
+    Wait for a pacing slot for this user and API
+
+    Returns:
+        Seconds spent waiting
+
+    Raises:
+        AdmissionRejected: if the wait would exceed PROXY_PACING_MAX_WAIT[_<API>]
+    """
+    if not PACING_ENABLED or not api_name:
+        return 0.0
+
+    interval = emission_interval(rate_limit)
+    if interval is None:
+        return 0.0
+
+    burst = max(api_env_float("PROXY_PACING_BURST", api_name, DEFAULT_PACING_BURST), 1)
+    tolerance = interval * (burst - 1)
+    max_wait = api_env_float("PROXY_PACING_MAX_WAIT", api_name, DEFAULT_PACING_MAX_WAIT)
+    key = _pacing_key(api_name, user_id)
+
+    waited = 0.0
+    while True:
+        wait = await _reserve(key, interval, tolerance)
+        if wait <= 0:
+            return waited
+        if waited + wait > max_wait:
+            raise AdmissionRejected(api_name, wait)
+        await asyncio.sleep(wait)
+        waited += wait
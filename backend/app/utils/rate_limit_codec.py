@@ -0,0 +1,153 @@
+import json
+import logging
+import struct
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Optional, Tuple, Union
+
+from .rate_limit_data import RateLimitData
+from .settings import env_str
+
+logger = logging.getLogger(__name__)
+
+# Codec used for new writes; every known version can always be read
+RATE_LIMIT_CODEC = env_str("RATE_LIMIT_CODEC", "struct")
+
+_EPOCH = datetime(1970, 1, 1)
+_EPOCH_UTC = datetime(1970, 1, 1, tzinfo=timezone.utc)
+_MICROSECOND = timedelta(microseconds=1)
+
+
+class JsonCodec:
+    """Version 1: the original JSON document with ISO-8601 datetimes"""
+
+    name = "json"
+
+    def encode(self, rate_limit: RateLimitData) -> str:
+        return json.dumps(rate_limit.to_dict())
+
+    def decode(self, data: bytes) -> RateLimitData:
+        try:
+            return RateLimitData.from_dict(json.loads(data))
+        except KeyError as e:
+            raise ValueError(f"Rate limit record is missing {e}")
+
+
+class StructCodec:
+    """
+    Version 2: fixed binary header followed by the two strings
+
+    The header holds the version, a flags byte, limit and remaining, and both
+    timestamps as integer microseconds since the epoch. It is followed by the
+    lengths and UTF-8 bytes of api_name and user_id. Naive datetimes keep
+    their wall-clock value; aware ones are stored as UTC.
+    """
+
+    name = "struct"
+    version = 2
+
+    # version, flags, limit, remaining, reset_time, last_updated, len(api_name), len(user_id)
+    _header = struct.Struct("<BBqqqqHH")
+
+    _HAS_RESET = 1
+    _RESET_AWARE = 2
+    _UPDATED_AWARE = 4
+    _HAS_USER = 8
+
+    def encode(self, rate_limit: RateLimitData) -> bytes:
+        flags = 0
+        reset = 0
+        if rate_limit.reset_time is not None:
+            flags |= self._HAS_RESET
+            reset, aware = _to_micros(rate_limit.reset_time)
+            flags |= self._RESET_AWARE if aware else 0
+        updated, aware = _to_micros(rate_limit.last_updated)
+        flags |= self._UPDATED_AWARE if aware else 0
+
+        api_name = rate_limit.api_name.encode()
+        user_id = b""
+        if rate_limit.user_id is not None:
+            flags |= self._HAS_USER
+            user_id = rate_limit.user_id.encode()
+
+        header = self._header.pack(
+            self.version, flags, rate_limit.limit, rate_limit.remaining,
+            reset, updated, len(api_name), len(user_id)
+        )
+        return header + api_name + user_id
+
+    def decode(self, data: bytes) -> RateLimitData:
+        try:
+            _, flags, limit, remaining, reset, updated, name_length, user_length = \
+                self._header.unpack_from(data)
+        except struct.error as e:
+            raise ValueError(f"Truncated rate limit record: {e}")
+
+        offset = self._header.size
+        if len(data) != offset + name_length + user_length:
+            raise ValueError("Rate limit record length does not match its header")
+        api_name = data[offset:offset + name_length].decode()
+        user_id = data[offset + name_length:].decode() if flags & self._HAS_USER else None
+
+        reset_time = None
+        if flags & self._HAS_RESET:
+            reset_time = _from_micros(reset, flags & self._RESET_AWARE)
+
+        # Positional arguments, this runs for every key on a dashboard load
+        return RateLimitData(
+            api_name, limit, remaining, reset_time, user_id,
+            _from_micros(updated, flags & self._UPDATED_AWARE),
+        )
+
+
+CODECS: Dict[str, Union[JsonCodec, StructCodec]] = {
+    codec.name: codec for codec in (JsonCodec(), StructCodec())
+}
+
+
+def get_codec(name: Optional[str] = None) -> Union[JsonCodec, StructCodec]:
+    """The codec used for writes (RATE_LIMIT_CODEC unless named)"""
+    name = name or RATE_LIMIT_CODEC
+    codec = CODECS.get(name)
+    if codec is None:
+        logger.warning("Unknown rate limit codec %r, using struct", name)
+        return CODECS["struct"]
+    return codec
+
+
+def encode(rate_limit: RateLimitData) -> Union[str, bytes]:
+    return get_codec().encode(rate_limit)
+
+
+def decode(data: Union[str, bytes]) -> RateLimitData:
+    """
+    Decode a stored record, whichever version wrote it
+
+    JSON records always start with "{"; binary records start with their
+    version byte. Strings are what Redis hands back with decode_responses,
+    which round-trips binary values through surrogateescape.
+
+    Raises:
+        ValueError: for records that can't be decoded
+    """
+    if isinstance(data, str):
+        if data.startswith("{"):
+            return CODECS["json"].decode(data)
+        data = data.encode("utf-8", "surrogateescape")
+
+    if data[:1] == b"{":
+        return CODECS["json"].decode(data)
+    if data[:1] == bytes([StructCodec.version]):
+        return CODECS["struct"].decode(data)
+    raise ValueError(f"Unknown rate limit record version {data[:1]!r}")
+
+
+def _to_micros(value: datetime) -> Tuple[int, bool]:
+    if value.tzinfo is None:
+        return (value - _EPOCH) // _MICROSECOND, False
+    return (value - _EPOCH_UTC) // _MICROSECOND, True
+
+
+def _from_micros(value: int, aware: int) -> datetime:
+    if aware:
+        return _EPOCH_UTC + value * _MICROSECOND
+    return _EPOCH + value * _MICROSECOND
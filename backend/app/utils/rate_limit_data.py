@@ -0,0 +1,61 @@
+import sys
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Dict, Optional
+
+# Slots need Python 3.10 dataclasses; older versions get a plain frozen dataclass
+_SLOTS = {"slots": True} if sys.version_info >= (3, 10) else {}
+
+
+# Rate limit data structure
+@dataclass(frozen=True, **_SLOTS)
+class RateLimitData:
+    """
+    One stored rate limit, immutable once read
+
+    The attribute names match the RateLimit schema, so routers can return
+    these directly and let FastAPI validate them against the response model.
+    """
+
+    api_name: str
+    limit: int
+    remaining: int
+    reset_time: Optional[datetime] = None
+    user_id: Optional[str] = None
+    last_updated: datetime = field(default_factory=datetime.now)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "api_name": self.api_name,
+            "limit": self.limit,
+            "remaining": self.remaining,
+            "reset_time": self.reset_time.isoformat() if self.reset_time else None,
+            "user_id": self.user_id,
+            "last_updated": self.last_updated.isoformat()
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'RateLimitData':
+        # Convert ISO format strings back to datetime objects
+        reset_time = None
+        if data.get("reset_time"):
+            try:
+                reset_time = datetime.fromisoformat(data["reset_time"])
+            except ValueError:
+                pass
+
+        last_updated = None
+        if data.get("last_updated"):
+            try:
+                last_updated = datetime.fromisoformat(data["last_updated"])
+            except ValueError:
+                pass
+
+        return cls(
+            api_name=data["api_name"],
+            limit=data["limit"],
+            remaining=data["remaining"],
+            reset_time=reset_time,
+            user_id=data.get("user_id"),
+            last_updated=last_updated or datetime.now()
+        )
@@ -0,0 +1,268 @@
+import re
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List, Optional, Tuple
+
+# How a profile's reset header is expressed
+RESET_EPOCH = "epoch"        # Unix timestamp
+RESET_DELTA = "delta"        # seconds from now
+RESET_DURATION = "duration"  # Go-style duration, e.g. "6m0s" or "20ms"
+RESET_AUTO = "auto"          # epoch or delta, decided by magnitude
+
+# Values at least this large are timestamps rather than delta-seconds
+EPOCH_THRESHOLD = 1_000_000_000
+
+# Fields understood for every limit dimension; anything else is informational
+LIMIT_FIELDS = ("limit", "remaining", "reset")
+
+_DURATION_PART = re.compile(r"(\d+(?:\.\d+)?)(ms|h|m|s)")
+_DURATION_UNITS = {"h": 3600.0, "m": 60.0, "s": 1.0, "ms": 0.001}
+
+# A composite header parser returns {dimension: {field: raw value}}
+CompositeParser = Callable[[str], Dict[str, Dict[str, str]]]
+
+
+class RateLimitWindow:
+    """One limit dimension (requests, tokens, ...) reported by an upstream"""
+
+    def __init__(
+        self,
+        profile: str,
+        dimension: str,
+        limit: int,
+        remaining: int,
+        reset_time: Optional[datetime] = None
+    ):
+        self.profile = profile
+        self.dimension = dimension
+        self.limit = limit
+        self.remaining = remaining
+        self.reset_time = reset_time
+
+    @property
+    def usage(self) -> float:
+        """Fraction of the limit already used"""
+        if self.limit <= 0:
+            return 1.0
+        return 1 - self.remaining / self.limit
+
+    def __repr__(self) -> str:
+        return (
+            f"RateLimitWindow({self.profile}/{self.dimension}: "
+            f"{self.remaining}/{self.limit}, reset={self.reset_time})"
+        )
+
+
+class RateLimitProfile:
+    """
+    Header layout used by one provider
+
+    `headers` maps a header name to the (dimension, field) it carries and
+    `composite` maps a header name to a parser for headers that pack
+    several fields into one value.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        headers: Dict[str, Tuple[str, str]],
+        reset: str = RESET_AUTO,
+        composite: Optional[Dict[str, CompositeParser]] = None
+    ):
+        self.name = name
+        self.headers = {key.lower(): value for key, value in headers.items()}
+        self.reset = reset
+        self.composite = {key.lower(): value for key, value in (composite or {}).items()}
+
+
+def _parse_shopify_call_limit(value: str) -> Dict[str, Dict[str, str]]:
+    """X-Shopify-Shop-Api-Call-Limit: "<used>/<limit>" for the leaky bucket"""
+    used, _, limit = value.partition("/")
+    try:
+        remaining = int(limit) - int(used)
+    except ValueError:
+        return {}
+    return {"calls": {"limit": limit.strip(), "remaining": str(remaining)}}
+
+
+def _parse_structured_ratelimit(value: str) -> Dict[str, Dict[str, str]]:
+    """
+    IETF RateLimit / RateLimit-Policy fields
+
+    Handles the structured form of the current draft
+    ('"burst";r=50;t=30, "daily";q=1000;w=86400') as well as the older
+    single-policy form ('limit=100, remaining=50, reset=30' or '100;w=60').
+    """
+    aliases = {"q": "limit", "r": "remaining", "t": "reset",
+               "limit": "limit", "remaining": "remaining", "reset": "reset"}
+    dimensions: Dict[str, Dict[str, str]] = {}
+    for item in value.split(","):
+        parts = [part.strip() for part in item.split(";") if part.strip()]
+        if not parts:
+            continue
+
+        dimension = "default"
+        fields = dimensions.setdefault(dimension, {})
+        if "=" not in parts[0]:
+            head = parts.pop(0).strip('"')
+            if head.isdigit():
+                fields["limit"] = head
+            else:
+                dimension = head
+                fields = dimensions.setdefault(dimension, {})
+
+        for part in parts:
+            key, _, raw = part.partition("=")
+            field = aliases.get(key.strip().lower())
+            if field:
+                fields[field] = raw.strip().strip('"')
+
+    return {name: fields for name, fields in dimensions.items() if fields}
+
+
+# Known providers; later profiles never override a header claimed earlier
+PROFILES = [
+    RateLimitProfile(
+        "github",
+        {
+            "X-RateLimit-Limit": ("default", "limit"),
+            "X-RateLimit-Remaining": ("default", "remaining"),
+            "X-RateLimit-Reset": ("default", "reset"),
+            "X-RateLimit-Used": ("default", "used"),
+            "X-RateLimit-Resource": ("default", "resource"),
+        },
+    ),
+    RateLimitProfile(
+        "twitter",
+        {
+            "X-Rate-Limit-Limit": ("default", "limit"),
+            "X-Rate-Limit-Remaining": ("default", "remaining"),
+            "X-Rate-Limit-Reset": ("default", "reset"),
+        },
+        reset=RESET_EPOCH,
+    ),
+    RateLimitProfile(
+        "openai",
+        {
+            f"X-RateLimit-{field.capitalize()}-{dimension}": (dimension, field)
+            for dimension in ("requests", "tokens")
+            for field in LIMIT_FIELDS
+        },
+        reset=RESET_DURATION,
+    ),
+    RateLimitProfile(
+        "ietf",
+        {
+            "RateLimit-Limit": ("default", "limit"),
+            "RateLimit-Remaining": ("default", "remaining"),
+            "RateLimit-Reset": ("default", "reset"),
+        },
+        reset=RESET_DELTA,
+        composite={
+            "RateLimit": _parse_structured_ratelimit,
+            "RateLimit-Policy": _parse_structured_ratelimit,
+        },
+    ),
+    RateLimitProfile(
+        "shopify",
+        {},
+        composite={"X-Shopify-Shop-Api-Call-Limit": _parse_shopify_call_limit},
+    ),
+]
+
+
+def _compile(profiles: List[RateLimitProfile]) -> Dict[str, Tuple[RateLimitProfile, Optional[CompositeParser], str, str]]:
+    """Flatten the profiles into one lookup table keyed by lowercase header name"""
+    table = {}
+    for profile in profiles:
+        for header, (dimension, field) in profile.headers.items():
+            table.setdefault(header, (profile, None, dimension, field))
+        for header, parser in profile.composite.items():
+            table.setdefault(header, (profile, parser, "", ""))
+    return table
+
+
+# header name -> (profile, composite parser or None, dimension, field)
+HEADER_TABLE = _compile(PROFILES)
+
+
+def is_rate_limit_header(name: str) -> bool:
+    return name.lower() in HEADER_TABLE
+
+
+def parse_rate_limit_headers(headers: Dict[str, str], now: Optional[datetime] = None) -> List[RateLimitWindow]:
+    """
+    Parse every limit dimension reported in a response, in a single pass
+
+    Dimensions without both a limit and a remaining count are skipped.
+    """
+    collected: Dict[Tuple[str, str], Dict[str, str]] = {}
+    profiles: Dict[str, RateLimitProfile] = {}
+
+    for key, value in headers.items():
+        entry = HEADER_TABLE.get(key.lower())
+        if entry is None:
+            continue
+        profile, parser, dimension, field = entry
+        profiles[profile.name] = profile
+        if parser is None:
+            collected.setdefault((profile.name, dimension), {})[field] = value
+            continue
+        for dimension, fields in parser(value).items():
+            collected.setdefault((profile.name, dimension), {}).update(fields)
+
+    now = now or datetime.now()
+    windows = []
+    for (profile_name, dimension), fields in collected.items():
+        try:
+            limit = int(fields["limit"])
+            remaining = int(fields["remaining"])
+        except (KeyError, ValueError):
+            continue
+        reset_time = None
+        if "reset" in fields:
+            reset_time = parse_reset(fields["reset"], profiles[profile_name].reset, now)
+        windows.append(RateLimitWindow(profile_name, dimension, limit, remaining, reset_time))
+    return windows
+
+
+def most_constrained(windows: List[RateLimitWindow]) -> Optional[RateLimitWindow]:
+    """The dimension closest to running out (latest reset on ties)"""
+    if not windows:
+        return None
+    return max(
+        windows,
+        key=lambda window: (window.usage, window.reset_time or datetime.min),
+    )
+
+
+def parse_reset(value: str, kind: str, now: datetime) -> Optional[datetime]:
+    """Turn a reset header value into an absolute (naive, local) time"""
+    value = value.strip()
+    if kind == RESET_DURATION:
+        seconds = _parse_duration(value)
+        return now + timedelta(seconds=seconds) if seconds is not None else None
+
+    try:
+        number = float(value)
+    except ValueError:
+        # Some APIs send durations in otherwise numeric headers
+        seconds = _parse_duration(value)
+        return now + timedelta(seconds=seconds) if seconds is not None else None
+
+    if kind == RESET_DELTA or (kind == RESET_AUTO and number < EPOCH_THRESHOLD):
+        return now + timedelta(seconds=number)
+
+    # Millisecond timestamps are three orders of magnitude larger
+    if number >= EPOCH_THRESHOLD * 1000:
+        number /= 1000
+    try:
+        return datetime.fromtimestamp(number)
+    except (OverflowError, OSError, ValueError):
+        return None
+
+
+def _parse_duration(value: str) -> Optional[float]:
+    parts = _DURATION_PART.findall(value)
+    if not parts or "".join(number + unit for number, unit in parts) != value:
+        return None
+    return sum(float(number) * _DURATION_UNITS[unit] for number, unit in parts)
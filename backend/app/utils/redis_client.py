@@ -1,127 +1,457 @@
+import asyncio
+import fnmatch
+import heapq
+import logging
+import re
+import threading
 import redis
-import json
+import redis.asyncio
+import redis.asyncio.sentinel
 from datetime import datetime, timedelta
-from typing import Dict, List, Optional, Any
+from redis.exceptions import RedisClusterException
+from typing import AsyncIterator, Dict, Iterable, List, Optional, Any, Sequence, Set, Tuple
+
+from . import rate_limit_codec
+from .rate_limit_data import RateLimitData
+from .settings import env_float, env_int, env_str
+
+logger = logging.getLogger(__name__)
 
 # Redis connection settings
-REDIS_HOST = "localhost"
-REDIS_PORT = 6379
-REDIS_DB = 0
+REDIS_HOST = env_str("REDIS_HOST", "localhost")
+REDIS_PORT = env_int("REDIS_PORT", 6379)
+REDIS_DB = env_int("REDIS_DB", 0)
+REDIS_PASSWORD = env_str("REDIS_PASSWORD")
+# "standalone", "sentinel" (REDIS_SENTINELS) or "cluster" (REDIS_HOST:REDIS_PORT
+# is any node of the cluster)
+REDIS_MODE = (env_str("REDIS_MODE", "standalone") or "").lower()
+REDIS_MODES = ("standalone", "sentinel", "cluster")
+# Comma-separated host:port list of sentinels and the monitored master's name
+REDIS_SENTINELS = env_str("REDIS_SENTINELS", "")
+REDIS_SENTINEL_SERVICE = env_str("REDIS_SENTINEL_SERVICE", "mymaster")
+
+# Connection pool settings (per node in cluster mode)
+REDIS_MAX_CONNECTIONS = env_int("REDIS_MAX_CONNECTIONS", 100)
+# How long a command waits for a free pooled connection (standalone mode)
+REDIS_POOL_TIMEOUT = env_float("REDIS_POOL_TIMEOUT", 5.0)
+REDIS_SOCKET_TIMEOUT = env_float("REDIS_SOCKET_TIMEOUT", 5.0)
+REDIS_SOCKET_CONNECT_TIMEOUT = env_float("REDIS_SOCKET_CONNECT_TIMEOUT", 2.0)
+REDIS_HEALTH_CHECK_INTERVAL = env_int("REDIS_HEALTH_CHECK_INTERVAL", 30)
+
+# Errors that mean Redis can't be reached, rather than a bad command
+REDIS_UNAVAILABLE = (redis.ConnectionError, redis.TimeoutError, RedisClusterException)
+
 REDIS_PREFIX = "rate_limit:"
+# Per-user SET of the API names that have a rate limit stored
+REDIS_INDEX_PREFIX = "rate_limit_index:"
+
+
+class AsyncMockRedis:
+    """
+    In-memory stand-in for redis.asyncio.Redis, for development without Redis
+
+    Expired keys are dropped when they're touched, and every write also pops
+    a few due keys off a min-heap of expiry times, so keys nobody reads again
+    don't pile up. Keys are grouped by namespace (everything up to the first
+    ":") so pattern scans only walk the family they can match.
+    """
+
+    # Due keys reclaimed per write
+    SWEEP_BATCH = 16
+
+    def __init__(self):
+        self.data: Dict[str, Any] = {}
+        self.expires: Dict[str, datetime] = {}
+        self._expiry_heap: List[Tuple[datetime, str]] = []
+        # Namespace -> keys in it (dicts as insertion-ordered sets)
+        self._namespaces: Dict[str, Dict[str, None]] = {}
+
+    def _now(self) -> datetime:
+        return datetime.now()
+
+    def _add(self, key: str, value: Any):
+        if key not in self.data:
+            self._namespaces.setdefault(_namespace(key), {})[key] = None
+        self.data[key] = value
+
+    def _remove(self, key: str):
+        del self.data[key]
+        self.expires.pop(key, None)
+        namespace = _namespace(key)
+        keys = self._namespaces[namespace]
+        del keys[key]
+        if not keys:
+            del self._namespaces[namespace]
+
+    def _expire(self, key: str):
+        if key in self.expires and self._now() > self.expires[key]:
+            if key in self.data:
+                self._remove(key)
+            else:
+                del self.expires[key]
+
+    def _sweep(self):
+        """Reclaim up to SWEEP_BATCH keys whose expiry has passed"""
+        heap = self._expiry_heap
+        now = self._now()
+        for _ in range(self.SWEEP_BATCH):
+            if not heap or heap[0][0] > now:
+                break
+            when, key = heapq.heappop(heap)
+            # Skip entries left behind by a later SET or DEL of the key
+            if self.expires.get(key) == when and key in self.data:
+                self._remove(key)
+
+        # Rebuild once overwritten expiries make up most of the heap
+        if len(heap) > 2 * len(self.expires) + 64:
+            self._expiry_heap = [(when, key) for key, when in self.expires.items()]
+            heapq.heapify(self._expiry_heap)
+
+    async def ping(self) -> bool:
+        return True
+
+    async def set(self, key: str, value: str, ex: Optional[int] = None) -> bool:
+        if ex is not None and ex <= 0:
+            # Same error real Redis gives, so callers can't get away with it here
+            raise redis.exceptions.ResponseError("invalid expire time in 'set' command")
+        self._sweep()
+        self._add(key, value)
+        if ex is not None:
+            when = self._now() + timedelta(seconds=ex)
+            self.expires[key] = when
+            heapq.heappush(self._expiry_heap, (when, key))
+        else:
+            self.expires.pop(key, None)
+        return True
+
+    async def get(self, key: str) -> Optional[str]:
+        self._expire(key)
+        return self.data.get(key)
+
+    async def delete(self, *keys: str) -> int:
+        deleted = 0
+        for key in keys:
+            self._expire(key)
+            if key in self.data:
+                self._remove(key)
+                deleted += 1
+        return deleted
+
+    async def mget(self, keys: List[str]) -> List[Optional[str]]:
+        return [await self.get(key) for key in keys]
+
+    async def sadd(self, key: str, *members: str) -> int:
+        self._sweep()
+        self._expire(key)
+        if key not in self.data:
+            self._add(key, set())
+        existing = self.data[key]
+        added = len(set(members) - existing)
+        existing.update(members)
+        return added
+
+    async def srem(self, key: str, *members: str) -> int:
+        self._expire(key)
+        existing = self.data.get(key, set())
+        removed = len(existing & set(members))
+        existing.difference_update(members)
+        if not existing:
+            await self.delete(key)
+        return removed
+
+    async def exists(self, *keys: str) -> int:
+        count = 0
+        for key in keys:
+            self._expire(key)
+            count += key in self.data
+        return count
+
+    async def smembers(self, key: str) -> Set[str]:
+        self._expire(key)
+        return set(self.data.get(key, set()))
+
+    def pipeline(self, transaction: bool = True) -> "AsyncMockPipeline":
+        return AsyncMockPipeline(self)
+
+    async def scan_iter(self, match: str = "*", count: Optional[int] = None) -> AsyncIterator[str]:
+        prefix = _glob_prefix(match)
+        if ":" in prefix:
+            candidates = self._namespaces.get(_namespace(prefix), {})
+        else:
+            candidates = self.data
+        matches = re.compile(fnmatch.translate(match)).match
+
+        # Like SCAN, keys that exist for the whole scan are returned once;
+        # keys are matched and yielded one at a time as the caller asks
+        for key in tuple(candidates):
+            self._expire(key)
+            if key in self.data and matches(key):
+                yield key
+
+    async def ttl(self, key: str) -> int:
+        self._expire(key)
+        if key not in self.data:
+            return -2
+        if key not in self.expires:
+            return -1
+        return int((self.expires[key] - self._now()).total_seconds())
+
+    async def aclose(self):
+        pass
 
-# Initialize Redis client
-try:
-    redis_client = redis.Redis(
+
+class AsyncMockPipeline:
+    """Queues commands and runs them in order on execute(), like a MULTI/EXEC block"""
+
+    def __init__(self, client: AsyncMockRedis):
+        self.client = client
+        self.commands: List[Tuple[str, tuple, dict]] = []
+
+    def __getattr__(self, name: str):
+        method = getattr(self.client, name)
+
+        def queue(*args, **kwargs):
+            self.commands.append((method, args, kwargs))
+            return self
+
+        return queue
+
+    async def execute(self) -> List[Any]:
+        # No awaits between commands, so nothing else can interleave
+        commands, self.commands = self.commands, []
+        return [await method(*args, **kwargs) for method, args, kwargs in commands]
+
+    async def __aenter__(self) -> "AsyncMockPipeline":
+        return self
+
+    async def __aexit__(self, *exc_info):
+        self.commands = []
+
+
+def _namespace(key: str) -> str:
+    """Key prefix up to and including the first ":" ("" if there is none)"""
+    return key[:key.find(":") + 1]
+
+
+def _glob_prefix(pattern: str) -> str:
+    """Literal start of a glob pattern, before its first special character"""
+    match = re.search(r"[*?\[\\]", pattern)
+    return pattern if match is None else pattern[:match.start()]
+
+
+def _sentinel_nodes() -> List[Tuple[str, int]]:
+    nodes = []
+    for node in (REDIS_SENTINELS or "").split(","):
+        host, _, port = node.strip().rpartition(":")
+        if host:
+            nodes.append((host, int(port)))
+    return nodes or [(REDIS_HOST, 26379)]
+
+
+def create_client():
+    """
+    Build the asyncio client for REDIS_MODE from the configured settings
+
+    No connection is made until the first command.
+    """
+    mode = REDIS_MODE
+    if mode not in REDIS_MODES:
+        logger.warning("Unknown REDIS_MODE %r, using standalone", mode)
+        mode = "standalone"
+
+    options = dict(
+        password=REDIS_PASSWORD,
+        socket_timeout=REDIS_SOCKET_TIMEOUT,
+        socket_connect_timeout=REDIS_SOCKET_CONNECT_TIMEOUT,
+        health_check_interval=REDIS_HEALTH_CHECK_INTERVAL,
+        decode_responses=True,  # Automatically decode responses to strings
+        # Binary rate limit records survive the decode round trip unchanged
+        encoding_errors="surrogateescape",
+    )
+
+    if mode == "cluster":
+        return redis.asyncio.RedisCluster(
+            host=REDIS_HOST, port=REDIS_PORT, max_connections=REDIS_MAX_CONNECTIONS, **options
+        )
+
+    if mode == "sentinel":
+        sentinel = redis.asyncio.sentinel.Sentinel(
+            _sentinel_nodes(),
+            sentinel_kwargs={
+                "socket_timeout": REDIS_SOCKET_TIMEOUT,
+                "socket_connect_timeout": REDIS_SOCKET_CONNECT_TIMEOUT,
+            },
+            **options
+        )
+        return sentinel.master_for(REDIS_SENTINEL_SERVICE, db=REDIS_DB, max_connections=REDIS_MAX_CONNECTIONS)
+
+    # Commands wait for a free connection instead of failing when it's exhausted
+    pool = redis.asyncio.BlockingConnectionPool(
         host=REDIS_HOST,
         port=REDIS_PORT,
         db=REDIS_DB,
-        decode_responses=True  # Automatically decode responses to strings
+        max_connections=REDIS_MAX_CONNECTIONS,
+        timeout=REDIS_POOL_TIMEOUT,
+        **options
     )
-    redis_client.ping()  # Test connection
-    print("Successfully connected to Redis")
-except redis.ConnectionError as e:
-    print(f"Warning: Could not connect to Redis: {e}")
-    # Fallback to a mock in-memory implementation for development
-    from collections import defaultdict
-    print("Using in-memory mock for Redis")
-    
-    class MockRedis:
-        def __init__(self):
-            self.data = defaultdict(dict)
-            self.expires = {}
-        
-        def set(self, key: str, value: str, ex: Optional[int] = None):
-            self.data[key] = value
-            if ex:
-                self.expires[key] = datetime.now() + timedelta(seconds=ex)
-            return True
-        
-        def get(self, key: str) -> Optional[str]:
-            if key in self.expires and datetime.now() > self.expires[key]:
-                del self.data[key]
-                del self.expires[key]
-                return None
-            return self.data.get(key)
-        
-        def delete(self, key: str) -> int:
-            if key in self.data:
-                del self.data[key]
-                if key in self.expires:
-                    del self.expires[key]
-                return 1
-            return 0
-        
-        def scan_iter(self, match: str) -> List[str]:
-            import fnmatch
-            pattern = match.replace('*', '.*')
-            return [k for k in self.data.keys() if fnmatch.fnmatch(k, pattern)]
-        
-        def ttl(self, key: str) -> int:
-            if key not in self.expires:
-                return -1
-            remaining = (self.expires[key] - datetime.now()).total_seconds()
-            return int(remaining) if remaining > 0 else -2
-    
-    redis_client = MockRedis()
-
-# Rate limit data structure
-class RateLimitData:
-    def __init__(
-        self,
-        api_name: str,
-        limit: int,
-        remaining: int,
-        reset_time: Optional[datetime] = None,
-        user_id: Optional[str] = None
-    ):
-        self.api_name = api_name
-        self.limit = limit
-        self.remaining = remaining
-        self.reset_time = reset_time
-        self.user_id = user_id
-        self.last_updated = datetime.now()
-    
-    def to_dict(self) -> Dict[str, Any]:
-        return {
-            "api_name": self.api_name,
-            "limit": self.limit,
-            "remaining": self.remaining,
-            "reset_time": self.reset_time.isoformat() if self.reset_time else None,
-            "user_id": self.user_id,
-            "last_updated": self.last_updated.isoformat()
-        }
-    
-    @classmethod
-    def from_dict(cls, data: Dict[str, Any]) -> 'RateLimitData':
-        # Convert ISO format strings back to datetime objects
-        reset_time = None
-        if data.get("reset_time"):
-            try:
-                reset_time = datetime.fromisoformat(data["reset_time"])
-            except ValueError:
-                pass
-        
-        last_updated = None
-        if data.get("last_updated"):
-            try:
-                last_updated = datetime.fromisoformat(data["last_updated"])
-            except ValueError:
-                pass
-        
-        instance = cls(
-            api_name=data["api_name"],
-            limit=data["limit"],
-            remaining=data["remaining"],
-            reset_time=reset_time,
-            user_id=data.get("user_id")
-        )
-        
-        if last_updated:
-            instance.last_updated = last_updated
-        
-        return instance
+    return redis.asyncio.Redis.from_pool(pool)
+
+
+def _unavailable(error: Exception) -> AsyncMockRedis:
+    logger.warning("Could not connect to Redis: %s", error)
+    logger.warning("Using in-memory mock for Redis")
+    return AsyncMockRedis()
+
+
+# One client, and so one connection pool, shared by every caller in this process
+_client = None
+
+
+async def start_client():
+    """Connect the shared client; called from the app lifespan"""
+    global _client
+    if _client is not None:
+        return _client
 
-def store_rate_limit(
+    client = create_client()
+    try:
+        await client.ping()
+    except REDIS_UNAVAILABLE as e:
+        await client.aclose()
+        _client = _unavailable(e)
+    else:
+        logger.info("Successfully connected to Redis (%s)", REDIS_MODE)
+        _client = client
+    return _client
+
+
+def _probe() -> Optional[Exception]:
+    """Ping Redis with a throwaway client on its own thread and event loop"""
+    errors = []
+
+    async def ping():
+        client = create_client()
+        try:
+            await client.ping()
+        finally:
+            await client.aclose()
+
+    def run():
+        try:
+            asyncio.run(ping())
+        except REDIS_UNAVAILABLE as e:
+            errors.append(e)
+
+    thread = threading.Thread(target=run, name="redis-probe")
+    thread.start()
+    thread.join()
+    return errors[0] if errors else None
+
+
+def get_client():
+    """
+    The shared client, or the in-memory mock when Redis is unreachable
+
+    Falls back to connecting on first use when the app lifespan has not run
+    (tests, scripts). That check blocks for up to the connect timeout once,
+    in a thread so it works whether or not an event loop is running.
+    """
+    global _client
+    if _client is None:
+        error = _probe()
+        if error is not None:
+            _client = _unavailable(error)
+        else:
+            logger.info("Successfully connected to Redis (%s)", REDIS_MODE)
+            _client = create_client()
+    return _client
+
+
+async def close():
+    """Close pooled connections on shutdown"""
+    global _client
+    client, _client = _client, None
+    if client is not None:
+        await client.aclose()
+
+
+def _pipeline(client):
+    """
+    MULTI/EXEC pipeline, or a plain one on Redis Cluster
+
+    redis-py has no cluster transactions. A user's keys share a hash slot,
+    so their commands still go to one node in one round trip.
+    """
+    if isinstance(client, redis.asyncio.RedisCluster):
+        return client.pipeline()
+    return client.pipeline(transaction=True)
+
+
+async def _mget(client, keys: List[str]) -> List[Optional[str]]:
+    """MGET that also works for keys spread over several cluster slots"""
+    if isinstance(client, redis.asyncio.RedisCluster):
+        return await client.mget_nonatomic(keys)
+    return await client.mget(keys)
+
+
+def _rate_limit_key(api_name: str, user_id: Optional[str] = None) -> str:
+    # The {user_id} hash tag keeps a user's records and index on one cluster slot
+    if user_id:
+        return f"{REDIS_PREFIX}{{{user_id}}}:{api_name}"
+    return f"{REDIS_PREFIX}{api_name}"
+
+
+def _index_key(user_id: str) -> str:
+    return f"{REDIS_INDEX_PREFIX}{{{user_id}}}"
+
+
+# Drop index entries whose record is gone, re-checking each record in the same
+# atomic step so one stored since it was read as missing keeps its entry.
+# KEYS[1] is the index, KEYS[i + 1] the record for ARGV[i].
+PRUNE_INDEX_SCRIPT = """
+local removed = 0
+for i, name in ipairs(ARGV) do
+    if redis.call('EXISTS', KEYS[i + 1]) == 0 then
+        removed = removed + redis.call('SREM', KEYS[1], name)
+    end
+end
+return removed
+"""
+
+_prune_index_script = None
+
+
+async def _prune_index(client, user_id: str, api_names: List[str]):
+    """Remove expired API names from a user's index, unless they were just stored again"""
+    global _prune_index_script
+    index_key = _index_key(user_id)
+    keys = [_rate_limit_key(api_name, user_id) for api_name in api_names]
+
+    if not hasattr(client, "register_script"):
+        # AsyncMockRedis never yields between commands, so check-then-remove is atomic
+        for api_name, key in zip(api_names, keys):
+            if not await client.exists(key):
+                await client.srem(index_key, api_name)
+        return
+
+    try:
+        if _prune_index_script is None:
+            _prune_index_script = client.register_script(PRUNE_INDEX_SCRIPT)
+        await _prune_index_script(keys=[index_key] + keys, args=api_names, client=client)
+    except Exception as e:
+        # Stale entries are harmless and get another chance on the next read
+        logger.warning("Error pruning rate limit index for %s: %s", user_id, e)
+
+
+def _queue_store(pipe, rate_limit: RateLimitData, ttl: Optional[int]):
+    """Add the writes for one record (and its index entry) to a pipeline"""
+    key = _rate_limit_key(rate_limit.api_name, rate_limit.user_id)
+    pipe.set(key, rate_limit_codec.encode(rate_limit), ex=ttl)
+    if rate_limit.user_id:
+        pipe.sadd(_index_key(rate_limit.user_id), rate_limit.api_name)
+
+
+async def store_rate_limit(
     api_name: str,
     limit: int,
     remaining: int,
@@ -149,17 +479,14 @@ def store_rate_limit(
         user_id=user_id
     )
     
-    # Generate Redis key
-    key = f"{REDIS_PREFIX}{api_name}"
-    if user_id:
-        key = f"{key}:{user_id}"
-    
-    # Store in Redis
-    redis_client.set(key, json.dumps(rate_limit.to_dict()), ex=ttl)
+    # Store in Redis, keeping the user's index in step
+    async with _pipeline(get_client()) as pipe:
+        _queue_store(pipe, rate_limit, ttl)
+        await pipe.execute()
     
     return rate_limit
 
-def get_rate_limit(api_name: str, user_id: Optional[str] = None) -> Optional[RateLimitData]:
+async def get_rate_limit(api_name: str, user_id: Optional[str] = None) -> Optional[RateLimitData]:
     """
     Get rate limit information from Redis
     
@@ -170,25 +497,18 @@ def get_rate_limit(api_name: str, user_id: Optional[str] = None) -> Optional[Rat
     Returns:
         RateLimitData object or None if not found
     """
-    # Generate Redis key
-    key = f"{REDIS_PREFIX}{api_name}"
-    if user_id:
-        key = f"{key}:{user_id}"
-    
     # Get from Redis
-    data = redis_client.get(key)
+    data = await get_client().get(_rate_limit_key(api_name, user_id))
     if not data:
         return None
     
     try:
-        # Parse the JSON data
-        rate_limit_dict = json.loads(data)
-        return RateLimitData.from_dict(rate_limit_dict)
-    except (json.JSONDecodeError, KeyError) as e:
-        print(f"Error decoding rate limit data: {e}")
+        return rate_limit_codec.decode(data)
+    except ValueError as e:
+        logger.warning("Error decoding rate limit data: %s", e)
         return None
 
-def get_all_rate_limits(user_id: Optional[str] = None) -> List[RateLimitData]:
+async def get_all_rate_limits(user_id: Optional[str] = None) -> List[RateLimitData]:
     """
     Get all rate limits for a user or globally
     
@@ -198,23 +518,37 @@ def get_all_rate_limits(user_id: Optional[str] = None) -> List[RateLimitData]:
     Returns:
         List of RateLimitData objects
     """
-    pattern = f"{REDIS_PREFIX}*"
-    if user_id:
-        pattern = f"{REDIS_PREFIX}*:{user_id}"
+    client = get_client()
+    if not user_id:
+        # Global listing is rare (admin use), so a keyspace scan is acceptable
+        keys = [key async for key in client.scan_iter(match=f"{REDIS_PREFIX}*")]
+    else:
+        # Only the user's own entries, found through their index
+        index_key = _index_key(user_id)
+        api_names = sorted(await client.smembers(index_key))
+        keys = [_rate_limit_key(api_name, user_id) for api_name in api_names]
+    
+    if not keys:
+        return []
     
     rate_limits = []
-    for key in redis_client.scan_iter(match=pattern):
-        data = redis_client.get(key)
-        if data:
-            try:
-                rate_limit_dict = json.loads(data)
-                rate_limits.append(RateLimitData.from_dict(rate_limit_dict))
-            except (json.JSONDecodeError, KeyError) as e:
-                print(f"Error decoding rate limit data for key {key}: {e}")
+    expired = []
+    for position, (key, data) in enumerate(zip(keys, await _mget(client, keys))):
+        if not data:
+            expired.append(position)
+            continue
+        try:
+            rate_limits.append(rate_limit_codec.decode(data))
+        except ValueError as e:
+            logger.warning("Error decoding rate limit data for key %s: %s", key, e)
+    
+    # Entries expire on their own; drop them from the index as we notice
+    if user_id and expired:
+        await _prune_index(client, user_id, [api_names[position] for position in expired])
     
     return rate_limits
 
-def delete_rate_limit(api_name: str, user_id: Optional[str] = None) -> bool:
+async def delete_rate_limit(api_name: str, user_id: Optional[str] = None) -> bool:
     """
     Delete rate limit information from Redis
     
@@ -225,10 +559,88 @@ def delete_rate_limit(api_name: str, user_id: Optional[str] = None) -> bool:
     Returns:
         True if deleted, False if not found
     """
-    # Generate Redis key
-    key = f"{REDIS_PREFIX}{api_name}"
-    if user_id:
-        key = f"{key}:{user_id}"
+    # Delete from Redis along with the index entry
+    async with _pipeline(get_client()) as pipe:
+        pipe.delete(_rate_limit_key(api_name, user_id))
+        if user_id:
+            pipe.srem(_index_key(user_id), api_name)
+        deleted, *_ = await pipe.execute()
+    return bool(deleted) 
+
+
+async def store_rate_limits_bulk(
+    rate_limits: Sequence[RateLimitData],
+    ttls: Optional[Sequence[Optional[int]]] = None
+) -> List[RateLimitData]:
+    """
+    Store many rate limits in one MULTI/EXEC round trip
+
+    Either every record and index entry is written or none is.
+
+    Args:
+        rate_limits: Records to store
+        ttls: Time to live in seconds for each record, in the same order
+    
+    Returns:
+        The stored records
+    """
+    if not rate_limits:
+        return []
+    if ttls is None:
+        ttls = [None] * len(rate_limits)
+    elif len(ttls) != len(rate_limits):
+        raise ValueError("Need one TTL per rate limit")
+
+    async with _pipeline(get_client()) as pipe:
+        for rate_limit, ttl in zip(rate_limits, ttls):
+            _queue_store(pipe, rate_limit, ttl)
+        await pipe.execute()
+
+    return list(rate_limits)
+
+async def get_rate_limits_bulk(
+    api_names: Iterable[str],
+    user_id: Optional[str] = None
+) -> Dict[str, Optional[RateLimitData]]:
+    """
+    Get rate limits for several APIs with a single MGET
     
-    # Delete from Redis
-    return bool(redis_client.delete(key)) 
\ No newline at end of file
+    Returns:
+        Mapping of each API name to its record, or None if not found
+    """
+    api_names = list(dict.fromkeys(api_names))
+    if not api_names:
+        return {}
+
+    keys = [_rate_limit_key(api_name, user_id) for api_name in api_names]
+    rate_limits: Dict[str, Optional[RateLimitData]] = {}
+    for api_name, data in zip(api_names, await _mget(get_client(), keys)):
+        rate_limits[api_name] = None
+        if not data:
+            continue
+        try:
+            rate_limits[api_name] = rate_limit_codec.decode(data)
+        except ValueError as e:
+            logger.warning("Error decoding rate limit data for %s: %s", api_name, e)
+    return rate_limits
+
+async def delete_rate_limits_bulk(api_names: Iterable[str], user_id: Optional[str] = None) -> List[str]:
+    """
+    Delete rate limits for several APIs in one MULTI/EXEC round trip
+    
+    Returns:
+        The API names that had a rate limit stored
+    """
+    api_names = list(dict.fromkeys(api_names))
+    if not api_names:
+        return []
+
+    # One DEL per key, so the replies say which ones existed
+    async with _pipeline(get_client()) as pipe:
+        for api_name in api_names:
+            pipe.delete(_rate_limit_key(api_name, user_id))
+        if user_id:
+            pipe.srem(_index_key(user_id), *api_names)
+        results = await pipe.execute()
+
+    return [api_name for api_name, deleted in zip(api_names, results) if deleted]
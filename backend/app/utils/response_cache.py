@@ -0,0 +1,295 @@
+import hashlib
+import json
+import logging
+import time
+from collections import OrderedDict
+from datetime import datetime
+from email.utils import parsedate_to_datetime
+from typing import Any, Dict, Optional
+
+from . import redis_client
+from .settings import env_bool, env_int
+
+logger = logging.getLogger(__name__)
+
+# Cache settings
+CACHE_MAX_ENTRIES = env_int("PROXY_CACHE_MAX_ENTRIES", 1000)
+CACHE_REDIS_ENABLED = env_bool("PROXY_CACHE_REDIS", False)
+# How long a stale entry with validators is kept around for revalidation
+CACHE_STALE_TTL = env_int("PROXY_CACHE_STALE_TTL", 3600)
+CACHE_PREFIX = "proxy_cache:"
+
+# Only idempotent reads are served from the cache
+CACHEABLE_METHODS = {"GET", "HEAD"}
+CACHEABLE_STATUS_CODES = {200, 203}
+
+# Request headers that mean the caller is doing its own conditional request
+CONDITIONAL_REQUEST_HEADERS = {"if-none-match", "if-modified-since"}
+
+
+class CachedResponse:
+    def __init__(
+        self,
+        status_code: int,
+        headers: Dict[str, str],
+        body: Any,
+        expires_at: float,
+        etag: Optional[str] = None,
+        last_modified: Optional[str] = None,
+        stored_at: Optional[float] = None
+    ):
+        self.status_code = status_code
+        self.headers = headers
+        self.body = body
+        self.expires_at = expires_at
+        self.etag = etag
+        self.last_modified = last_modified
+        self.stored_at = stored_at if stored_at is not None else time.time()
+
+    @property
+    def is_fresh(self) -> bool:
+        return time.time() < self.expires_at
+
+    @property
+    def can_revalidate(self) -> bool:
+        return bool(self.etag or self.last_modified)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "status_code": self.status_code,
+            "headers": self.headers,
+            "body": self.body,
+            "expires_at": self.expires_at,
+            "etag": self.etag,
+            "last_modified": self.last_modified,
+            "stored_at": self.stored_at
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'CachedResponse':
+        return cls(
+            status_code=data["status_code"],
+            headers=data["headers"],
+            body=data["body"],
+            expires_at=data["expires_at"],
+            etag=data.get("etag"),
+            last_modified=data.get("last_modified"),
+            stored_at=data.get("stored_at")
+        )
+
+
+# In-process LRU tier: key -> CachedResponse, least recently used first
+_entries: "OrderedDict[str, CachedResponse]" = OrderedDict()
+
+
+def is_cacheable_request(method: str, headers: Dict[str, str]) -> bool:
+    """Check whether a proxied request may be answered from the cache"""
+    if method not in CACHEABLE_METHODS:
+        return False
+    # Leave caller-driven conditional requests alone
+    return not any(key.lower() in CONDITIONAL_REQUEST_HEADERS for key in headers)
+
+
+def cache_key(
+    user_id: str,
+    method: str,
+    url: str,
+    headers: Dict[str, str],
+    api_key_id: Optional[str] = None
+) -> str:
+    """
+    Build the cache key for a proxied request
+
+    All request headers are part of the key so that responses which vary on
+    Accept, Authorization etc. are never shared between different requests.
+    """
+    normalized_headers = sorted((key.lower(), value) for key, value in headers.items())
+    raw = json.dumps([user_id, method, url, normalized_headers, api_key_id])
+    return hashlib.sha256(raw.encode()).hexdigest()
+
+
+async def get(key: str) -> Optional[CachedResponse]:
+    """Look up a cached response, checking the LRU first and then Redis"""
+    entry = _entries.get(key)
+    if entry is not None:
+        _entries.move_to_end(key)
+        return entry
+
+    if not CACHE_REDIS_ENABLED:
+        return None
+
+    try:
+        data = await redis_client.get_client().get(f"{CACHE_PREFIX}{key}")
+    except Exception as e:
+        logger.warning("Error reading cached response from Redis: %s", e)
+        return None
+    if not data:
+        return None
+
+    try:
+        entry = CachedResponse.from_dict(json.loads(data))
+    except (json.JSONDecodeError, KeyError) as e:
+        logger.warning("Error decoding cached response: %s", e)
+        return None
+
+    _remember(key, entry)
+    return entry
+
+
+async def store(key: str, status_code: int, headers: Dict[str, str], body: Any) -> Optional[CachedResponse]:
+    """
+    Cache an upstream response if its status and Cache-Control allow it
+
+    Returns:
+        The stored CachedResponse, or None if the response is not cacheable
+    """
+    if status_code not in CACHEABLE_STATUS_CODES:
+        return None
+
+    normalized = {k.lower(): v for k, v in headers.items()}
+    directives = _parse_cache_control(normalized.get("cache-control", ""))
+    if "no-store" in directives or normalized.get("vary", "").strip() == "*":
+        await invalidate(key)
+        return None
+
+    freshness = _freshness_lifetime(normalized, directives)
+    etag = normalized.get("etag")
+    last_modified = normalized.get("last-modified")
+
+    # Without freshness or validators there is nothing useful to keep
+    if freshness <= 0 and not (etag or last_modified):
+        return None
+
+    entry = CachedResponse(
+        status_code=status_code,
+        headers=dict(headers),
+        body=body,
+        expires_at=time.time() + freshness,
+        etag=etag,
+        last_modified=last_modified
+    )
+    await _save(key, entry)
+    return entry
+
+
+async def refresh(key: str, entry: CachedResponse, headers: Dict[str, str]) -> CachedResponse:
+    """Extend a cached entry after the upstream answered 304 Not Modified"""
+    normalized = {k.lower(): v for k, v in headers.items()}
+    directives = _parse_cache_control(normalized.get("cache-control", ""))
+    entry.expires_at = time.time() + _freshness_lifetime(normalized, directives)
+    entry.etag = normalized.get("etag", entry.etag)
+    entry.last_modified = normalized.get("last-modified", entry.last_modified)
+    entry.stored_at = time.time()
+    await _save(key, entry)
+    return entry
+
+
+def conditional_headers(entry: CachedResponse) -> Dict[str, str]:
+    """Headers that turn an upstream request into a revalidation"""
+    headers = {}
+    if entry.etag:
+        headers["If-None-Match"] = entry.etag
+    if entry.last_modified:
+        headers["If-Modified-Since"] = entry.last_modified
+    return headers
+
+
+async def invalidate(key: str):
+    """Drop a cached response from both tiers"""
+    _entries.pop(key, None)
+    if CACHE_REDIS_ENABLED:
+        try:
+            await redis_client.get_client().delete(f"{CACHE_PREFIX}{key}")
+        except Exception as e:
+            logger.warning("Error deleting cached response from Redis: %s", e)
+
+
+def clear():
+    """Empty the in-process tier"""
+    _entries.clear()
+
+
+def _remember(key: str, entry: CachedResponse):
+    """Insert into the LRU, evicting the least recently used entries"""
+    _entries[key] = entry
+    _entries.move_to_end(key)
+    while len(_entries) > CACHE_MAX_ENTRIES:
+        _entries.popitem(last=False)
+
+
+async def _save(key: str, entry: CachedResponse):
+    _remember(key, entry)
+
+    if not CACHE_REDIS_ENABLED:
+        return
+
+    # Keep entries with validators past expiry so they can be revalidated
+    ttl = max(int(entry.expires_at - time.time()), 0)
+    if entry.can_revalidate:
+        ttl += CACHE_STALE_TTL
+    if ttl <= 0:
+        return
+
+    try:
+        await redis_client.get_client().set(f"{CACHE_PREFIX}{key}", json.dumps(entry.to_dict()), ex=ttl)
+    except (TypeError, ValueError) as e:
+        logger.warning("Error encoding cached response: %s", e)
+    except Exception as e:
+        logger.warning("Error writing cached response to Redis: %s", e)
+
+
+def _parse_cache_control(value: str) -> Dict[str, Optional[str]]:
+    """Parse a Cache-Control header into {directive: argument}"""
+    directives = {}
+    for part in value.split(","):
+        part = part.strip()
+        if not part:
+            continue
+        name, _, argument = part.partition("=")
+        directives[name.strip().lower()] = argument.strip().strip('"') or None
+    return directives
+
+
+def _freshness_lifetime(headers: Dict[str, str], directives: Dict[str, Optional[str]]) -> float:
+    """How many seconds a response stays fresh, per RFC 9111"""
+    if "no-cache" in directives:
+        return 0
+
+    lifetime = None
+    for name in ("s-maxage", "max-age"):
+        if directives.get(name):
+            try:
+                lifetime = int(directives[name])
+                break
+            except ValueError:
+                pass
+
+    if lifetime is None and "expires" in headers:
+        expires = _parse_http_date(headers["expires"])
+        if expires is not None:
+            date = _parse_http_date(headers.get("date", "")) or datetime.now(tz=expires.tzinfo)
+            try:
+                lifetime = (expires - date).total_seconds()
+            except TypeError:
+                # Mixed naive/aware dates, treat as already expired
+                lifetime = 0
+
+    if lifetime is None:
+        return 0
+
+    # Time the response already spent in upstream caches
+    try:
+        lifetime -= int(headers.get("age", 0))
+    except ValueError:
+        pass
+
+    return max(lifetime, 0)
+
+
+def _parse_http_date(value: str) -> Optional[datetime]:
+    if not value:
+        return None
+    try:
+        return parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
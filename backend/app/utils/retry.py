@@ -0,0 +1,137 @@
+import asyncio
+import logging
+import math
+import random
+import time
+import httpx
+from datetime import datetime
+from email.utils import parsedate_to_datetime
+from typing import Awaitable, Callable, Dict, Optional
+
+from .settings import env_float, env_int
+
+logger = logging.getLogger(__name__)
+
+# Retry settings for transient upstream failures
+RETRY_MAX_ATTEMPTS = env_int("PROXY_RETRY_MAX_ATTEMPTS", 3)
+RETRY_BASE_DELAY = env_float("PROXY_RETRY_BASE_DELAY", 0.2)
+RETRY_MAX_DELAY = env_float("PROXY_RETRY_MAX_DELAY", 5.0)
+# Hard cap on attempts a single request may ask for
+RETRY_MAX_ATTEMPTS_LIMIT = env_int("PROXY_RETRY_MAX_ATTEMPTS_LIMIT", 5)
+
+# Responses worth retrying: throttled or a temporarily unavailable upstream
+RETRYABLE_STATUS_CODES = {429, 502, 503, 504}
+
+# Methods that are safe to send twice (RFC 9110 section 9.2.2)
+IDEMPOTENT_METHODS = {"GET", "HEAD", "OPTIONS", "PUT", "DELETE"}
+
+
+class RetryPolicy:
+    def __init__(
+        self,
+        max_attempts: int = RETRY_MAX_ATTEMPTS,
+        base_delay: float = RETRY_BASE_DELAY,
+        max_delay: float = RETRY_MAX_DELAY,
+        deadline: float = math.inf,
+        retry_non_idempotent: bool = False
+    ):
+        self.max_attempts = max(1, max_attempts)
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.deadline = deadline
+        self.retry_non_idempotent = retry_non_idempotent
+
+    def allows(self, method: str) -> bool:
+        """Whether requests with this method may be retried at all"""
+        return self.retry_non_idempotent or method.upper() in IDEMPOTENT_METHODS
+
+    def backoff(self, attempt: int) -> float:
+        """Exponential backoff with full jitter for the given (1-based) attempt"""
+        ceiling = min(self.max_delay, self.base_delay * (2 ** (attempt - 1)))
+        return random.uniform(0, ceiling)
+
+
+class RetryStats:
+    """Attempts made and time spent backing off, filled in as retries happen"""
+
+    def __init__(self):
+        self.attempts = 0
+        self.backoff = 0.0  # seconds
+
+    @property
+    def backoff_ms(self) -> float:
+        return self.backoff * 1000
+
+
+def retry_after_seconds(headers: Dict[str, str]) -> Optional[float]:
+    """Parse a Retry-After header given as delta-seconds or an HTTP-date"""
+    value = None
+    for key, header_value in headers.items():
+        if key.lower() == "retry-after":
+            value = header_value.strip()
+            break
+    if not value:
+        return None
+
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max((retry_at - datetime.now(retry_at.tzinfo)).total_seconds(), 0.0)
+
+
+async def send_with_retry(
+    send: Callable[[], Awaitable[httpx.Response]],
+    method: str,
+    policy: RetryPolicy,
+    stats: RetryStats
+) -> httpx.Response:
+    """
+    Call send() until it succeeds, the attempts run out or the deadline passes
+
+    Transport errors and RETRYABLE_STATUS_CODES are retried for methods the
+    policy allows. A Retry-After header from the upstream takes precedence
+    over the computed backoff. The last response is returned (or the last
+    transport error raised) once no further attempt fits in the budget.
+    """
+    started = time.monotonic()
+    retryable = policy.allows(method)
+
+    while True:
+        stats.attempts += 1
+        try:
+            response = await send()
+        except httpx.RequestError as e:
+            if not retryable or stats.attempts >= policy.max_attempts:
+                raise
+            delay = policy.backoff(stats.attempts)
+            failure = e
+        else:
+            if (
+                not retryable
+                or response.status_code not in RETRYABLE_STATUS_CODES
+                or stats.attempts >= policy.max_attempts
+            ):
+                return response
+            retry_after = retry_after_seconds(dict(response.headers))
+            delay = retry_after if retry_after is not None else policy.backoff(stats.attempts)
+            failure = response
+
+        # Give up when waiting would overrun the overall budget
+        if time.monotonic() - started + delay > policy.deadline:
+            if isinstance(failure, httpx.Response):
+                return failure
+            raise failure
+
+        if isinstance(failure, httpx.Response):
+            # Release the connection of a streamed response we won't use
+            await failure.aclose()
+
+        logger.info("Retrying %s request (attempt %d) in %.2fs", method, stats.attempts + 1, delay)
+        await asyncio.sleep(delay)
+        stats.backoff += delay
@@ -0,0 +1,67 @@
+import os
+import re
+from typing import Optional
+
+
+def env_str(name: str, default: Optional[str] = None) -> Optional[str]:
+    """Read a string setting from the environment"""
+    value = os.getenv(name)
+    if value is None or value == "":
+        return default
+    return value
+
+
+def env_int(name: str, default: int) -> int:
+    """Read an integer setting from the environment, falling back on bad values"""
+    value = os.getenv(name)
+    if value is None or value == "":
+        return default
+    try:
+        return int(value)
+    except ValueError:
+        return default
+
+
+def env_float(name: str, default: float) -> float:
+    """Read a float setting from the environment, falling back on bad values"""
+    value = os.getenv(name)
+    if value is None or value == "":
+        return default
+    try:
+        return float(value)
+    except ValueError:
+        return default
+
+
+def env_bool(name: str, default: bool = False) -> bool:
+    """Read a boolean setting from the environment ("1", "true", "yes", "on")"""
+    value = os.getenv(name)
+    if value is None or value == "":
+        return default
+    return value.strip().lower() in ("1", "true", "yes", "on")
+
+
+def api_setting_name(name: str, api_name: str) -> str:
+    """
+    Name of the per-API override for a setting
+
+    e.g. ("PROXY_ADMISSION_POLICY", "GitHub") -> "PROXY_ADMISSION_POLICY_GITHUB"
+    """
+    suffix = re.sub(r"[^A-Z0-9]+", "_", api_name.upper()).strip("_")
+    return f"{name}_{suffix}"
+
+
+def api_env_str(name: str, api_name: Optional[str], default: Optional[str] = None) -> Optional[str]:
+    """Read a string setting, preferring the per-API override when present"""
+    base = env_str(name, default)
+    if not api_name:
+        return base
+    return env_str(api_setting_name(name, api_name), base)
+
+
+def api_env_float(name: str, api_name: Optional[str], default: float) -> float:
+    """Read a float setting, preferring the per-API override when present"""
+    base = env_float(name, default)
+    if not api_name:
+        return base
+    return env_float(api_setting_name(name, api_name), base)
@@ -0,0 +1,58 @@
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Tuple
+
+
+class SingleFlight:
+    """
+    Collapse concurrent calls with the same key into one execution
+
+    The first caller for a key starts the work as its own task; callers that
+    arrive while it is still running await the same task. Running the work in
+    a separate task means a leader that disconnects does not cancel the call
+    for everyone else.
+    """
+
+    def __init__(self):
+        self._calls: Dict[str, asyncio.Task] = {}
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[Any]]) -> Tuple[Any, bool]:
+        """
+        Run fn for key, or join the call already in flight
+
+        Returns:
+            Tuple of (result, shared) where shared is True for callers that
+            joined an existing call instead of starting it
+        """
+        flight, shared = self.join(key, fn)
+        return await flight, shared
+
+    def join(self, key: str, fn: Callable[[], Awaitable[Any]]) -> Tuple[Awaitable[Any], bool]:
+        """
+        Start fn for key, or join the call already in flight, without waiting
+
+        Unlike do(), the caller learns whether it joined before awaiting, so
+        it still knows when the shared call fails.
+
+        Returns:
+            Tuple of (awaitable for the result, shared)
+        """
+        task = self._calls.get(key)
+        shared = task is not None
+
+        if task is None:
+            task = asyncio.ensure_future(fn())
+            self._calls[key] = task
+            task.add_done_callback(lambda done: self._forget(key, done))
+
+        return asyncio.shield(task), shared
+
+    def in_flight(self) -> int:
+        """Number of distinct calls currently running"""
+        return len(self._calls)
+
+    def _forget(self, key: str, task: asyncio.Task):
+        if self._calls.get(key) is task:
+            del self._calls[key]
+        # Mark the exception as retrieved even if every caller went away
+        if not task.cancelled():
+            task.exception()
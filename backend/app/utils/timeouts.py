@@ -0,0 +1,134 @@
+import asyncio
+import time
+import httpx
+from typing import Awaitable, Optional, TypeVar
+
+from .http_client import PROXY_TIMEOUT
+from .settings import api_env_float, env_float
+
+# Server-side caps on what a request (or per-API config) may ask for
+PROXY_MAX_TIMEOUT = env_float("PROXY_MAX_TIMEOUT", 60.0)
+PROXY_MAX_DEADLINE = env_float("PROXY_MAX_DEADLINE", 120.0)
+
+# Extra seconds the deadline waits past the phase timeouts, so an httpx timeout
+# (which names its phase and is recorded by the breaker) fires first
+PROXY_DEADLINE_GRACE = env_float("PROXY_DEADLINE_GRACE", 0.1)
+
+# Timeout phases, configurable as PROXY_TIMEOUT_<PHASE>[_<API>]
+TIMEOUT_PHASES = ("connect", "read", "write", "pool")
+
+T = TypeVar("T")
+
+
+class DeadlineExceeded(Exception):
+    """The overall budget for a proxied call ran out"""
+
+    def __init__(self, deadline: float):
+        self.deadline = deadline
+        super().__init__(f"Deadline of {deadline:.1f}s exceeded")
+
+
+class TimeoutBudget:
+    """
+    Per-phase timeouts plus an overall deadline for one proxied call
+
+    The deadline starts counting when the budget is created; every attempt
+    gets phase timeouts trimmed to whatever budget is left.
+    """
+
+    def __init__(
+        self,
+        connect: float,
+        read: float,
+        write: float,
+        pool: float,
+        deadline: float
+    ):
+        self.connect = connect
+        self.read = read
+        self.write = write
+        self.pool = pool
+        self.deadline = deadline
+        self.started = time.monotonic()
+
+    def remaining(self) -> float:
+        """Seconds left before the deadline"""
+        return self.deadline - (time.monotonic() - self.started)
+
+    def httpx_timeout(self) -> httpx.Timeout:
+        """Phase timeouts for the next attempt, capped by the remaining budget"""
+        remaining = self.remaining()
+        if remaining <= 0:
+            raise DeadlineExceeded(self.deadline)
+        return httpx.Timeout(
+            connect=min(self.connect, remaining),
+            read=min(self.read, remaining),
+            write=min(self.write, remaining),
+            pool=min(self.pool, remaining),
+        )
+
+    async def run(self, awaitable: Awaitable[T]) -> T:
+        """Await something within the remaining budget (plus PROXY_DEADLINE_GRACE)"""
+        remaining = self.remaining()
+        if remaining <= 0:
+            # Close the coroutine we'll never await
+            if asyncio.iscoroutine(awaitable):
+                awaitable.close()
+            raise DeadlineExceeded(self.deadline)
+        try:
+            return await asyncio.wait_for(awaitable, remaining + PROXY_DEADLINE_GRACE)
+        except asyncio.TimeoutError:
+            raise DeadlineExceeded(self.deadline)
+
+
+def _bounded(value: Optional[float], default: float, maximum: float) -> float:
+    if value is None:
+        value = default
+    return min(value, maximum)
+
+
+def resolve_budget(
+    api_name: Optional[str],
+    connect: Optional[float] = None,
+    read: Optional[float] = None,
+    write: Optional[float] = None,
+    pool: Optional[float] = None,
+    deadline: Optional[float] = None
+) -> TimeoutBudget:
+    """
+    Build the budget for a call from the request, per-API config and defaults
+
+    Request values win over PROXY_TIMEOUT_<PHASE>[_<API>] and PROXY_DEADLINE[_<API>],
+    which fall back to PROXY_TIMEOUT. Everything is capped by PROXY_MAX_TIMEOUT
+    and PROXY_MAX_DEADLINE.
+    """
+    requested = {"connect": connect, "read": read, "write": write, "pool": pool}
+    phases = {
+        phase: _bounded(
+            requested[phase],
+            api_env_float(f"PROXY_TIMEOUT_{phase.upper()}", api_name, PROXY_TIMEOUT),
+            PROXY_MAX_TIMEOUT,
+        )
+        for phase in TIMEOUT_PHASES
+    }
+    overall = _bounded(
+        deadline,
+        api_env_float("PROXY_DEADLINE", api_name, PROXY_TIMEOUT),
+        PROXY_MAX_DEADLINE,
+    )
+    return TimeoutBudget(deadline=overall, **phases)
+
+
+def timeout_phase(error: Exception) -> Optional[str]:
+    """Which phase a timeout happened in ("connect", "read", "write", "pool" or "deadline")"""
+    if isinstance(error, DeadlineExceeded):
+        return "deadline"
+    if isinstance(error, httpx.ConnectTimeout):
+        return "connect"
+    if isinstance(error, httpx.ReadTimeout):
+        return "read"
+    if isinstance(error, httpx.WriteTimeout):
+        return "write"
+    if isinstance(error, httpx.PoolTimeout):
+        return "pool"
+    return None
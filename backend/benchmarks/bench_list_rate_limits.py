@@ -0,0 +1,113 @@
+"""
+List-all cost for one user with many stored rate limits
+
+Run from the backend directory:
+
+    python benchmarks/bench_list_rate_limits.py [--entries N]
+
+Uses the in-memory Redis fallback unless a Redis server is reachable. Reports
+the time to read and decode every record, the memory they hold, and the time
+FastAPI needs to turn them into the GET /api/rate-limits response, both when
+the records are copied into RateLimit models first (the old router code) and
+when they are handed over directly.
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+from typing import List
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi.routing import serialize_response
+from fastapi.utils import create_model_field
+
+from app.schemas.rate_limit import RateLimit
+from app.utils import redis_client
+
+USER_ID = "bench@example.com"
+
+# The same field FastAPI builds for response_model=List[RateLimit]
+RESPONSE_FIELD = create_model_field(name="response", type_=List[RateLimit], mode="serialization")
+
+
+async def populate(count: int):
+    reset_time = datetime.now() + timedelta(hours=1)
+    for i in range(count):
+        await redis_client.store_rate_limit(
+            api_name=f"bench-api-{i}", limit=5000, remaining=i % 5000,
+            reset_time=reset_time, user_id=USER_ID, ttl=3600
+        )
+
+
+async def cleanup(count: int):
+    for i in range(count):
+        await redis_client.delete_rate_limit(f"bench-api-{i}", USER_ID)
+
+
+async def best_time(repeat: int, fn) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        await fn()
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def copy_to_schema(rate_limits):
+    return [
+        RateLimit(
+            api_name=rate_limit.api_name,
+            limit=rate_limit.limit,
+            remaining=rate_limit.remaining,
+            reset_time=rate_limit.reset_time,
+            last_updated=rate_limit.last_updated
+        )
+        for rate_limit in rate_limits
+    ]
+
+
+async def respond(content):
+    return await serialize_response(field=RESPONSE_FIELD, response_content=content, is_coroutine=True)
+
+
+async def run(count: int, repeat: int):
+    listing = await best_time(repeat, lambda: redis_client.get_all_rate_limits(USER_ID))
+
+    tracemalloc.start()
+    rate_limits = await redis_client.get_all_rate_limits(USER_ID)
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    assert len(rate_limits) == count
+
+    copied = await best_time(repeat, lambda: respond(copy_to_schema(rate_limits)))
+    direct = await best_time(repeat, lambda: respond(rate_limits))
+    assert await respond(copy_to_schema(rate_limits)) == await respond(rate_limits)
+
+    return listing, size / count, copied, direct
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--entries", type=int, default=10000)
+    parser.add_argument("--repeat", type=int, default=10)
+    args = parser.parse_args()
+
+    asyncio.run(populate(args.entries))
+    try:
+        listing, per_entry, copied, direct = asyncio.run(run(args.entries, args.repeat))
+    finally:
+        asyncio.run(cleanup(args.entries))
+
+    print(f"entries:                    {args.entries}")
+    print(f"get_all_rate_limits:        {listing * 1000:8.1f} ms")
+    print(f"memory per record:          {per_entry:8.0f} bytes")
+    print(f"response via schema copy:   {copied * 1000:8.1f} ms")
+    print(f"response direct:            {direct * 1000:8.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
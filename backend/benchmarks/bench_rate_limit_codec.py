@@ -0,0 +1,91 @@
+"""
+Encode/decode throughput and size per key for the rate limit codecs
+
+Run from the backend directory:
+
+    python benchmarks/bench_rate_limit_codec.py [--records N]
+
+With a Redis server on REDIS_HOST:REDIS_PORT the script also reports
+MEMORY USAGE per key for each codec.
+"""
+import argparse
+import os
+import sys
+import timeit
+from datetime import datetime, timedelta
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import redis
+
+from app.utils import rate_limit_codec
+from app.utils.rate_limit_data import RateLimitData
+from app.utils.redis_client import REDIS_DB, REDIS_HOST, REDIS_PORT
+
+
+def make_records(count: int):
+    now = datetime.now()
+    return [
+        RateLimitData(
+            api_name=f"api-{i % 50}",
+            limit=5000,
+            remaining=5000 - i % 5000,
+            reset_time=now + timedelta(seconds=i % 3600),
+            user_id=f"user{i // 50}@example.com",
+        )
+        for i in range(count)
+    ]
+
+
+def redis_memory_per_key(codec, records):
+    """Average MEMORY USAGE of the encoded records, or None without Redis"""
+    try:
+        client = redis.Redis(host=REDIS_HOST, port=REDIS_PORT, db=REDIS_DB, socket_connect_timeout=1)
+        client.ping()
+    except redis.ConnectionError:
+        return None
+
+    keys = [f"bench:{codec.name}:{i}" for i in range(len(records))]
+    try:
+        with client.pipeline(transaction=False) as pipe:
+            for key, record in zip(keys, records):
+                pipe.set(key, codec.encode(record))
+            pipe.execute()
+        with client.pipeline(transaction=False) as pipe:
+            for key in keys:
+                pipe.memory_usage(key)
+            usage = pipe.execute()
+        return sum(usage) / len(usage)
+    finally:
+        client.delete(*keys)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--records", type=int, default=10000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    records = make_records(args.records)
+    print(f"{'codec':<8} {'encode/s':>12} {'decode/s':>12} {'bytes/key':>10} {'redis/key':>10}")
+
+    for name, codec in rate_limit_codec.CODECS.items():
+        encoded = [codec.encode(record) for record in records]
+
+        encode_time = min(timeit.repeat(
+            lambda: [codec.encode(record) for record in records], number=1, repeat=args.repeat
+        ))
+        decode_time = min(timeit.repeat(
+            lambda: [rate_limit_codec.decode(data) for data in encoded], number=1, repeat=args.repeat
+        ))
+        size = sum(len(data) for data in encoded) / len(encoded)
+        memory = redis_memory_per_key(codec, records[:1000])
+
+        print(
+            f"{name:<8} {len(records) / encode_time:>12,.0f} {len(records) / decode_time:>12,.0f} "
+            f"{size:>10.1f} {memory if memory is not None else 'n/a':>10}"
+        )
+
+
+if __name__ == "__main__":
+    main()
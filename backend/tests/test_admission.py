@@ -0,0 +1,95 @@
+import pytest
+import asyncio
+from unittest import mock
+from datetime import datetime, timedelta
+import sys
+import os
+
+# Add the parent directory to path for imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.utils import admission
+from app.utils.redis_client import store_rate_limit, delete_rate_limit
+from app.utils.settings import api_setting_name
+
+TEST_USER_ID = "admission-user"
+
+
+@pytest.fixture
+def exhausted_api():
+    """An API whose stored quota is used up for the next 20 seconds"""
+    api_name = "exhaustedapi"
+    asyncio.run(store_rate_limit(
+        api_name=api_name,
+        limit=100,
+        remaining=0,
+        reset_time=datetime.now() + timedelta(seconds=20),
+        user_id=TEST_USER_ID,
+        ttl=60
+    ))
+    yield api_name
+    asyncio.run(delete_rate_limit(api_name, TEST_USER_ID))
+
+
+def test_api_setting_name():
+    """Test the per-API override naming"""
+    assert api_setting_name("PROXY_ADMISSION_POLICY", "GitHub") == "PROXY_ADMISSION_POLICY_GITHUB"
+    assert api_setting_name("PROXY_ADMISSION_POLICY", "open ai.v1") == "PROXY_ADMISSION_POLICY_OPEN_AI_V1"
+
+
+def test_policy_per_api(monkeypatch):
+    """Test the default policy and per-API overrides"""
+    monkeypatch.delenv("PROXY_ADMISSION_POLICY", raising=False)
+    assert admission.get_policy("github") == "reject"
+
+    monkeypatch.setenv("PROXY_ADMISSION_POLICY_GITHUB", "queue")
+    assert admission.get_policy("github") == "queue"
+    assert admission.get_policy("stripe") == "reject"
+
+    monkeypatch.setenv("PROXY_ADMISSION_POLICY", "bogus")
+    assert admission.get_policy("stripe") == "reject"
+
+
+@pytest.mark.asyncio
+async def test_admit_with_quota_left():
+    """Test that requests pass when the quota isn't known to be exhausted"""
+    rate_limit = await admission.get_stored_rate_limit("neverseenapi", TEST_USER_ID)
+    assert rate_limit is None
+    assert await admission.admit("neverseenapi", rate_limit) == 0.0
+    assert await admission.admit(None, None) == 0.0
+
+
+@pytest.mark.asyncio
+async def test_admit_rejects_exhausted_quota(exhausted_api, monkeypatch):
+    """Test fail-fast rejection with a Retry-After hint"""
+    monkeypatch.delenv("PROXY_ADMISSION_POLICY", raising=False)
+
+    with pytest.raises(admission.AdmissionRejected) as excinfo:
+        await admission.admit(exhausted_api, await admission.get_stored_rate_limit(exhausted_api, TEST_USER_ID))
+
+    assert 0 < excinfo.value.retry_after <= 20
+    assert 1 <= int(excinfo.value.retry_after_header) <= 20
+
+
+@pytest.mark.asyncio
+async def test_admit_queues_until_reset(exhausted_api, monkeypatch):
+    """Test that the queue policy waits for the reset instead of rejecting"""
+    monkeypatch.setenv("PROXY_ADMISSION_POLICY", "queue")
+
+    with mock.patch("app.utils.admission.asyncio.sleep") as mock_sleep:
+        waited = await admission.admit(exhausted_api, await admission.get_stored_rate_limit(exhausted_api, TEST_USER_ID))
+
+    assert 0 < waited <= 20
+    mock_sleep.assert_called_once()
+
+    # Waits longer than the configured maximum are still rejected
+    monkeypatch.setenv("PROXY_ADMISSION_MAX_WAIT", "5")
+    with pytest.raises(admission.AdmissionRejected):
+        await admission.admit(exhausted_api, await admission.get_stored_rate_limit(exhausted_api, TEST_USER_ID))
+
+
+@pytest.mark.asyncio
+async def test_admit_policy_off(exhausted_api, monkeypatch):
+    """Test that admission control can be disabled per API"""
+    monkeypatch.setenv(api_setting_name("PROXY_ADMISSION_POLICY", exhausted_api), "off")
+    assert await admission.admit(exhausted_api, await admission.get_stored_rate_limit(exhausted_api, TEST_USER_ID)) == 0.0
@@ -1,12 +1,15 @@
 import pytest
 from fastapi.testclient import TestClient
+import json
 import sys
 import os
+from unittest import mock
 
 # Add the parent directory to path for imports
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from app.main import app
+from app.utils import mock_db
 from app.utils.auth import create_access_token
 
 # Test client
@@ -154,4 +157,132 @@ def test_unauthorized_access():
     unauth_client = TestClient(app)
     
     response = unauth_client.get("/api/keys")
-    assert response.status_code == 401 
\ No newline at end of file
+    assert response.status_code == 401 
+
+# Test paging through API keys with limit and next_token
+def test_get_api_keys_paginated():
+    token = create_access_token({"sub": "paged-user", "email": "paged@example.com"})
+    headers = {"Authorization": f"Bearer {token}"}
+    created = [
+        client.post("/api/keys", json={"api_name": f"Paged {i}", "api_key": f"key-{i}"}, headers=headers).json()["id"]
+        for i in range(5)
+    ]
+
+    seen = []
+    next_token = None
+    pages = 0
+    while True:
+        params = {"limit": 2}
+        if next_token:
+            params["next_token"] = next_token
+        response = client.get("/api/keys", params=params, headers=headers)
+        assert response.status_code == 200
+        assert len(response.json()) <= 2
+        seen.extend(key["id"] for key in response.json())
+        pages += 1
+        next_token = response.headers.get("X-Next-Token")
+        if not next_token:
+            break
+    assert sorted(seen) == sorted(created)
+    assert pages >= 3
+
+    # Without paging parameters every key comes back in one response
+    response = client.get("/api/keys", headers=headers)
+    assert sorted(key["id"] for key in response.json()) == sorted(created)
+    assert "X-Next-Token" not in response.headers
+
+    # Cursors are validated and can't be replayed against another user's listing
+    assert client.get("/api/keys", params={"next_token": "not-a-token"}, headers=headers).status_code == 400
+    first_page = client.get("/api/keys", params={"limit": 1}, headers=headers)
+    other = {"Authorization": f"Bearer {create_access_token({'sub': 'other-user'})}"}
+    response = client.get("/api/keys", params={"next_token": first_page.headers["X-Next-Token"]}, headers=other)
+    assert response.status_code == 400
+
+    for key_id in created:
+        client.delete(f"/api/keys/{key_id}", headers=headers)
+
+# Test bulk import, export and bulk delete
+def test_bulk_create_export_and_delete():
+    headers = {"Authorization": f"Bearer {create_access_token({'sub': 'bulk-user'})}"}
+    other = {"Authorization": f"Bearer {create_access_token({'sub': 'bulk-other'})}"}
+
+    payload = [{"api_name": f"Bulk {i}", "api_key": f"bulk-key-{i}"} for i in range(60)]
+    response = client.post("/api/keys/bulk", json=payload, headers=headers)
+    assert response.status_code == 201
+    created = response.json()
+    assert [key["api_key"] for key in created] == [item["api_key"] for item in payload]
+    assert client.get(f"/api/keys/{created[30]['id']}", headers=headers).json()["api_key"] == "bulk-key-30"
+
+    # Export streams one JSON object per line, secrets included
+    response = client.get("/api/keys/export", headers=headers)
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    exported = [json.loads(line) for line in response.text.splitlines()]
+    assert sorted(key["api_key"] for key in exported) == sorted(item["api_key"] for item in payload)
+
+    # Only the caller's own keys are deleted
+    foreign = client.post("/api/keys/bulk", json=[{"api_name": "Other", "api_key": "x"}], headers=other).json()[0]
+    ids = [key["id"] for key in created] + [foreign["id"], "missing-id"]
+    response = client.request("DELETE", "/api/keys/bulk", json={"ids": ids}, headers=headers)
+    assert response.status_code == 200
+    result = response.json()
+    assert sorted(result["deleted"]) == sorted(key["id"] for key in created)
+    assert result["forbidden"] == [foreign["id"]]
+    assert result["not_found"] == ["missing-id"]
+    assert client.get("/api/keys", headers=headers).json() == []
+    assert client.get(f"/api/keys/{foreign['id']}", headers=other).status_code == 200
+
+    client.delete(f"/api/keys/{foreign['id']}", headers=other)
+
+# Test that a bulk import failing partway reports what was created
+def test_bulk_create_partial_failure(monkeypatch):
+    headers = {"Authorization": f"Bearer {create_access_token({'sub': 'bulk-partial'})}"}
+    monkeypatch.setattr(mock_db, "BATCH_WRITE_BACKOFF", 0)
+    real_batch_write = mock_db.dynamodb.batch_write_item
+    calls = []
+
+    def throttle_second_chunk(RequestItems):
+        calls.append(RequestItems)
+        if len(calls) == 1:
+            return real_batch_write(RequestItems=RequestItems)
+        return {"UnprocessedItems": RequestItems}
+
+    payload = [{"api_name": f"Partial {i}", "api_key": f"partial-{i}"} for i in range(30)]
+    with mock.patch.object(mock_db.dynamodb, "batch_write_item", side_effect=throttle_second_chunk):
+        response = client.post("/api/keys/bulk", json=payload, headers=headers)
+    assert response.status_code == 500
+    detail = response.json()["detail"]
+    assert [key["api_key"] for key in detail["created"]] == [f"partial-{i}" for i in range(25)]
+    assert detail["unprocessed"] == list(range(25, 30))
+    assert len(client.get("/api/keys", headers=headers).json()) == 25
+
+    ids = [key["id"] for key in detail["created"]]
+    client.request("DELETE", "/api/keys/bulk", json={"ids": ids}, headers=headers)
+
+# Test that another user's key can't be changed and missing keys are reported
+def test_update_and_delete_ownership(auth_client):
+    key_id = test_create_api_key(auth_client)
+    other = {"Authorization": f"Bearer {create_access_token({'sub': 'other-user'})}"}
+
+    assert client.put(f"/api/keys/{key_id}", json={"api_key": "x"}, headers=other).status_code == 403
+    assert client.delete(f"/api/keys/{key_id}", headers=other).status_code == 403
+    assert auth_client.get(f"/api/keys/{key_id}").json()["api_key"] == "ghp_testkey123456789"
+
+    assert auth_client.put("/api/keys/missing-id", json={"api_key": "x"}).status_code == 404
+    assert auth_client.delete("/api/keys/missing-id").status_code == 404
+
+    assert auth_client.delete(f"/api/keys/{key_id}").status_code == 204
+    assert auth_client.delete(f"/api/keys/{key_id}").status_code == 404
+
+# Test listing API keys without their secrets
+def test_get_api_key_metadata(auth_client):
+    key_id = test_create_api_key(auth_client)
+    
+    with mock.patch.object(mock_db, "decrypt_api_key", side_effect=AssertionError("decrypted")):
+        response = auth_client.get("/api/keys/metadata")
+    assert response.status_code == 200
+    
+    results = response.json()
+    created = next(key for key in results if key["id"] == key_id)
+    assert created["api_name"] == "GitHub"
+    assert all("api_key" not in key for key in results)
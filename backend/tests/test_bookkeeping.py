@@ -0,0 +1,95 @@
+import pytest
+import asyncio
+from unittest import mock
+import sys
+import os
+
+# Add the parent directory to path for imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.utils import bookkeeping
+
+
+@pytest.mark.asyncio
+async def test_submit_runs_inline_when_not_started():
+    """Test that jobs still run when the worker isn't running"""
+    job = mock.MagicMock()
+
+    assert bookkeeping.submit(job, 1, name="x") is True
+    job.assert_called_once_with(1, name="x")
+
+
+@pytest.mark.asyncio
+async def test_jobs_run_after_submit_and_flush_on_stop():
+    """Test that queued jobs run in the worker and stop() flushes them"""
+    calls = []
+    await bookkeeping.start()
+
+    for i in range(5):
+        bookkeeping.submit(calls.append, i)
+    # Nothing ran on the submitting side
+    assert calls == []
+
+    await bookkeeping.stop()
+    assert calls == [0, 1, 2, 3, 4]
+
+
+@pytest.mark.asyncio
+async def test_keyed_jobs_collapse_within_a_batch():
+    """Test that only the newest write per key reaches the store"""
+    writes = []
+    before = bookkeeping.stats()["superseded"]
+    await bookkeeping.start()
+
+    for remaining in (10, 9, 8):
+        bookkeeping.submit(writes.append, ("github", remaining), key=("rate_limit", "github"))
+    bookkeeping.submit(writes.append, ("twitter", 5), key=("rate_limit", "twitter"))
+
+    await bookkeeping.stop()
+    assert writes == [("github", 8), ("twitter", 5)]
+    assert bookkeeping.stats()["superseded"] - before == 2
+
+
+@pytest.mark.asyncio
+async def test_full_queue_drops_and_counts(monkeypatch):
+    """Test that a full queue sheds jobs instead of blocking the caller"""
+    monkeypatch.setattr(bookkeeping, "BOOKKEEPING_QUEUE_SIZE", 2)
+    before = bookkeeping.stats()["dropped"]
+    await bookkeeping.start()
+
+    results = [bookkeeping.submit(lambda: None) for _ in range(4)]
+
+    await bookkeeping.stop()
+    assert results == [True, True, False, False]
+    assert bookkeeping.stats()["dropped"] - before == 2
+
+
+@pytest.mark.asyncio
+async def test_failing_job_does_not_stop_the_worker():
+    """Test that one failing job doesn't take the rest of the batch with it"""
+    calls = []
+    await bookkeeping.start()
+
+    bookkeeping.submit(mock.MagicMock(side_effect=RuntimeError("redis down")))
+    bookkeeping.submit(calls.append, "after")
+
+    await bookkeeping.stop()
+    assert calls == ["after"]
+
+
+@pytest.mark.asyncio
+async def test_registered_batch_runs_once_per_batch():
+    """Test that calls to a registered fn are handed to its batch function together"""
+    def write(api_name, remaining):
+        raise AssertionError("batched jobs shouldn't run one by one")
+
+    batches = []
+    bookkeeping.register_batch(write, batches.append)
+    await bookkeeping.start()
+
+    for remaining in (10, 9):
+        bookkeeping.submit(write, "github", remaining, key=("rate_limit", "github"))
+    bookkeeping.submit(write, "twitter", remaining=5, key=("rate_limit", "twitter"))
+
+    await bookkeeping.stop()
+    assert batches == [[(("github", 9), {}), (("twitter",), {"remaining": 5})]]
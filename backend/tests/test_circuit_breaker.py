@@ -0,0 +1,92 @@
+import pytest
+import asyncio
+import time
+import sys
+import os
+
+# Add the parent directory to path for imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.utils import circuit_breaker
+from app.utils.circuit_breaker import CircuitOpen, CLOSED, OPEN, HALF_OPEN
+
+
+@pytest.fixture
+def breaker(monkeypatch):
+    """A breaker that trips after 4 calls at a 50% failure rate"""
+    monkeypatch.setattr(circuit_breaker, "BREAKER_MIN_CALLS", 4)
+    monkeypatch.setattr(circuit_breaker, "BREAKER_FAILURE_RATE", 0.5)
+    monkeypatch.setattr(circuit_breaker, "BREAKER_OPEN_SECONDS", 30.0)
+    breaker = circuit_breaker.get_breaker("breaker-test.example.com")
+    yield breaker
+    asyncio.run(breaker._close())
+    circuit_breaker.reset()
+
+
+async def find_circuit(name: str) -> dict:
+    return next(c for c in await circuit_breaker.list_circuits() if c["name"] == name)
+
+
+@pytest.mark.asyncio
+async def test_opens_on_failure_rate(breaker):
+    """Test that the breaker trips once the failure rate crosses the threshold"""
+    for failed in (False, True, False):
+        assert await breaker.before_call() is False
+        await breaker.record(False, failed, 50)
+
+    # Three calls is below the minimum, so still closed
+    assert (await find_circuit(breaker.name))["state"] == CLOSED
+
+    await breaker.before_call()
+    await breaker.record(False, True, 50)
+
+    assert (await find_circuit(breaker.name))["state"] == OPEN
+    with pytest.raises(CircuitOpen) as excinfo:
+        await breaker.before_call()
+    assert 1 <= int(excinfo.value.retry_after_header) <= 30
+
+
+@pytest.mark.asyncio
+async def test_opens_on_slow_calls(breaker, monkeypatch):
+    """Test that consistently slow upstreams trip the breaker too"""
+    monkeypatch.setattr(circuit_breaker, "BREAKER_SLOW_CALL_MS", 1000.0)
+    monkeypatch.setattr(circuit_breaker, "BREAKER_SLOW_CALL_RATE", 0.75)
+
+    for _ in range(4):
+        await breaker.before_call()
+        await breaker.record(False, False, 5000)
+
+    assert (await find_circuit(breaker.name))["state"] == OPEN
+
+
+@pytest.mark.asyncio
+async def test_half_open_probe_closes_breaker(breaker, monkeypatch):
+    """Test that one good probe after the open period closes the breaker"""
+    await breaker._open()
+    # Pretend the open period has passed
+    real_time = time.time
+    monkeypatch.setattr(circuit_breaker.time, "time", lambda: real_time() + 60)
+
+    assert (await find_circuit(breaker.name))["state"] == HALF_OPEN
+    assert await breaker.before_call() is True
+
+    # Only one probe at a time
+    with pytest.raises(CircuitOpen):
+        await breaker.before_call()
+
+    await breaker.record(True, False, 50)
+    assert await breaker.shared_state() is None
+
+
+@pytest.mark.asyncio
+async def test_failed_probe_reopens_breaker(breaker, monkeypatch):
+    """Test that a failing probe opens the breaker again"""
+    await breaker._open()
+    first_open = (await breaker.shared_state())["open_until"]
+
+    real_time = time.time
+    monkeypatch.setattr(circuit_breaker.time, "time", lambda: real_time() + 60)
+    assert await breaker.before_call() is True
+    await breaker.record(True, True, 50)
+
+    assert (await breaker.shared_state())["open_until"] > first_open
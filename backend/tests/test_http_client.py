@@ -0,0 +1,47 @@
+import pytest
+import httpx
+import sys
+import os
+
+# Add the parent directory to path for imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.utils import http_client
+
+
+@pytest.mark.asyncio
+async def test_shared_client_is_reused():
+    """Test that the dependency hands out one pooled client until it is closed"""
+    await http_client.close_client()
+
+    started = await http_client.start_client()
+    assert isinstance(started, httpx.AsyncClient)
+    assert http_client.get_http_client() is started
+    assert http_client.get_http_client() is started
+
+    await http_client.close_client()
+    assert started.is_closed
+
+    # A new client is created lazily after shutdown
+    replacement = http_client.get_http_client()
+    assert replacement is not started
+    await http_client.close_client()
+
+
+def test_http2_requires_opt_in(monkeypatch):
+    """Test that HTTP/2 stays off unless explicitly enabled"""
+    monkeypatch.setattr(http_client, "PROXY_HTTP2", False)
+    assert http_client._http2_enabled() is False
+
+
+def test_host_semaphore_per_host(monkeypatch):
+    """Test that each upstream host gets its own connection cap"""
+    monkeypatch.setattr(http_client, "PROXY_MAX_CONNECTIONS_PER_HOST", 3)
+    http_client._host_semaphores.clear()
+
+    github = http_client.host_semaphore("api.github.com")
+    assert http_client.host_semaphore("api.github.com") is github
+    assert http_client.host_semaphore("api.stripe.com") is not github
+    assert github._value == 3
+
+    http_client._host_semaphores.clear()
@@ -0,0 +1,71 @@
+import pytest
+from unittest import mock
+import sys
+import os
+
+# Add the parent directory to path for imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.utils import key_cache, mock_db
+
+
+@pytest.fixture(autouse=True)
+def empty_cache():
+    key_cache.clear()
+    yield
+    key_cache.clear()
+
+
+def test_cached_lookup_skips_database_and_decryption():
+    """Test that a hot key is read and decrypted once"""
+    key_id = mock_db.create_api_key("cache-user", "GitHub", "ghp_secret")
+    hits = key_cache.stats()["hits"]
+
+    with mock.patch.object(mock_db, "decrypt_api_key", wraps=mock_db.decrypt_api_key) as decrypt:
+        for _ in range(3):
+            item = mock_db.get_api_key_cached(key_id)
+            assert item["api_key"] == "ghp_secret"
+            assert item["api_name"] == "GitHub"
+    assert decrypt.call_count == 1
+    assert key_cache.stats()["hits"] == hits + 2
+
+    # Callers get their own copy
+    item["api_key"] = "changed"
+    assert mock_db.get_api_key_cached(key_id)["api_key"] == "ghp_secret"
+
+    mock_db.delete_api_key(key_id)
+
+
+def test_update_and_delete_invalidate():
+    """Test that writes through mock_db drop the cached plaintext"""
+    key_id = mock_db.create_api_key("cache-user", "OpenAI", "sk-old")
+    assert mock_db.get_api_key_cached(key_id)["api_key"] == "sk-old"
+    entry = key_cache._entries[key_id]
+
+    mock_db.update_api_key(key_id, api_key="sk-new")
+    assert entry.secret == bytearray(len("sk-old"))
+    assert mock_db.get_api_key_cached(key_id)["api_key"] == "sk-new"
+
+    mock_db.delete_api_key(key_id)
+    assert mock_db.get_api_key_cached(key_id) is None
+    assert key_cache.stats()["invalidations"] >= 2
+
+
+def test_lru_eviction_and_ttl(monkeypatch):
+    """Test the size bound and expiry"""
+    monkeypatch.setattr(key_cache, "API_KEY_CACHE_SIZE", 2)
+    for key_id in ("a", "b"):
+        key_cache.put(key_id, {"id": key_id, "api_key": f"secret-{key_id}"})
+    key_cache.get("a")  # "b" is now least recently used
+    evicted = key_cache._entries["b"]
+    key_cache.put("c", {"id": "c", "api_key": "secret-c"})
+    assert list(key_cache._entries) == ["a", "c"]
+    assert not any(evicted.secret)
+
+    now = key_cache.time.monotonic()
+    with mock.patch.object(key_cache.time, "monotonic", return_value=now + key_cache.API_KEY_CACHE_TTL + 1):
+        assert key_cache.get("a") is None
+    stats = key_cache.stats()
+    assert stats["size"] == 1
+    assert stats["evictions"] >= 1 and stats["expirations"] >= 1
+    assert 0 < stats["hit_rate"] < 1
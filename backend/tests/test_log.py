@@ -0,0 +1,65 @@
+import pytest
+import json
+import logging
+from unittest import mock
+from fastapi.testclient import TestClient
+import sys
+import os
+
+# Add the parent directory to path for imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.main import app
+from app.utils.log import JsonFormatter, RequestIdFilter, request_id_var
+
+client = TestClient(app)
+
+
+def make_record(msg, *args, **extra):
+    record = logging.LogRecord("app.test", logging.INFO, __file__, 1, msg, args, None)
+    for key, value in extra.items():
+        setattr(record, key, value)
+    return record
+
+
+def test_json_formatter_includes_request_id_and_extra_fields():
+    """Test that records become one JSON object with correlation fields"""
+    token = request_id_var.set("req-123")
+    try:
+        record = make_record("Opening circuit for %s", "api.example.com", circuit="api.example.com")
+        RequestIdFilter().filter(record)
+    finally:
+        request_id_var.reset(token)
+
+    entry = json.loads(JsonFormatter().format(record))
+
+    assert entry["message"] == "Opening circuit for api.example.com"
+    assert entry["level"] == "INFO"
+    assert entry["logger"] == "app.test"
+    assert entry["request_id"] == "req-123"
+    assert entry["circuit"] == "api.example.com"
+
+
+def test_disabled_levels_are_never_formatted():
+    """Test that debug logging costs nothing when the level is off"""
+    app_logger = logging.getLogger("app")
+    previous = app_logger.level
+    expensive = mock.MagicMock()
+
+    app_logger.setLevel(logging.INFO)
+    try:
+        logging.getLogger("app.routers.proxy").debug("Rate limit info: %s", expensive)
+    finally:
+        app_logger.setLevel(previous)
+
+    expensive.__str__.assert_not_called()
+
+
+def test_request_id_header_is_generated_and_echoed():
+    """Test that responses carry the caller's request ID or a new one"""
+    response = client.get("/health", headers={"X-Request-ID": "abc-123"})
+    assert response.headers["X-Request-ID"] == "abc-123"
+
+    generated = client.get("/health").headers["X-Request-ID"]
+    assert len(generated) == 32
+    assert generated != client.get("/health").headers["X-Request-ID"]
@@ -0,0 +1,142 @@
+import pytest
+from unittest import mock
+import sys
+import os
+
+# Add the parent directory to path for imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.utils import mock_db
+
+
+@pytest.fixture
+def stored_keys():
+    user_id = "lazy-user@example.com"
+    key_ids = [mock_db.create_api_key(user_id, f"API {i}", f"secret-{i}") for i in range(3)]
+    yield user_id, key_ids
+    for key_id in key_ids:
+        mock_db.delete_api_key(key_id)
+
+
+def test_count_and_metadata_never_decrypt(stored_keys):
+    """Test that counting and metadata listings skip Fernet entirely"""
+    user_id, key_ids = stored_keys
+
+    with mock.patch.object(mock_db, "decrypt_api_key", side_effect=AssertionError("decrypted")):
+        assert mock_db.count_user_api_keys(user_id) == 3
+        metadata = mock_db.list_user_api_key_metadata(user_id)
+        keys = mock_db.get_user_api_keys(user_id)
+        assert sorted(key["api_name"] for key in keys) == ["API 0", "API 1", "API 2"]
+
+    assert sorted(item["id"] for item in metadata) == sorted(key_ids)
+    assert all(set(item) == {"id", "user_id", "api_name", "created_at", "updated_at"} for item in metadata)
+    assert mock_db.count_user_api_keys("nobody@example.com") == 0
+
+
+def test_lazy_api_key_decrypts_once_on_access(stored_keys):
+    """Test that the secret is decrypted on first read and then reused"""
+    user_id, _ = stored_keys
+    key = mock_db.get_user_api_keys(user_id)[0]
+    assert not key.decrypted
+    assert "encrypted_key" not in key
+
+    with mock.patch.object(mock_db, "decrypt_api_key", wraps=mock_db.decrypt_api_key) as decrypt:
+        assert key["api_key"] == f"secret-{key['api_name'][-1]}"
+        assert dict(key)["api_key"] == key.get("api_key")
+    assert decrypt.call_count == 1
+    assert key.decrypted
+
+
+def test_iter_user_api_keys_walks_every_page(stored_keys):
+    """Test that the generator follows LastEvaluatedKey across small pages"""
+    user_id, key_ids = stored_keys
+
+    with mock.patch.object(mock_db.api_keys_table, "query", wraps=mock_db.api_keys_table.query) as query:
+        keys = list(mock_db.iter_user_api_keys(user_id, page_size=1))
+    assert sorted(key["id"] for key in keys) == sorted(key_ids)
+    assert query.call_count >= 3
+    assert "ProjectionExpression" in query.call_args[1]
+
+
+def test_batch_write_retries_unprocessed_items(monkeypatch):
+    """Test that throttled batch writes are retried, and give up eventually"""
+    monkeypatch.setattr(mock_db, "BATCH_WRITE_BACKOFF", 0)
+    real_batch_write = mock_db.dynamodb.batch_write_item
+    calls = []
+
+    def throttle_first(RequestItems):
+        calls.append(len(RequestItems["api_keys"]))
+        if len(calls) == 1:
+            # Write all but the last request, hand that one back
+            requests = RequestItems["api_keys"]
+            real_batch_write(RequestItems={"api_keys": requests[:-1]})
+            return {"UnprocessedItems": {"api_keys": requests[-1:]}}
+        return real_batch_write(RequestItems=RequestItems)
+
+    user_id = "batch-retry@example.com"
+    with mock.patch.object(mock_db.dynamodb, "batch_write_item", side_effect=throttle_first):
+        created = mock_db.create_api_keys_bulk(user_id, [(f"API {i}", f"k{i}") for i in range(30)])
+    assert calls == [25, 1, 5]
+    assert mock_db.count_user_api_keys(user_id) == 30
+
+    always_throttled = lambda RequestItems: {"UnprocessedItems": RequestItems}
+    with mock.patch.object(mock_db.dynamodb, "batch_write_item", side_effect=always_throttled):
+        with pytest.raises(RuntimeError):
+            mock_db.delete_api_keys_bulk(user_id, [item["id"] for item in created])
+
+    assert len(mock_db.delete_api_keys_bulk(user_id, [item["id"] for item in created])["deleted"]) == 30
+
+
+def test_bulk_create_reports_keys_written_before_giving_up(monkeypatch):
+    """Test that a later chunk failing still reports which keys were created"""
+    monkeypatch.setattr(mock_db, "BATCH_WRITE_BACKOFF", 0)
+    real_batch_write = mock_db.dynamodb.batch_write_item
+    calls = []
+
+    def throttle_second_chunk(RequestItems):
+        calls.append(len(RequestItems["api_keys"]))
+        if len(calls) == 1:
+            return real_batch_write(RequestItems=RequestItems)
+        return {"UnprocessedItems": RequestItems}
+
+    user_id = "batch-partial@example.com"
+    with mock.patch.object(mock_db.dynamodb, "batch_write_item", side_effect=throttle_second_chunk):
+        with pytest.raises(mock_db.ApiKeyBulkCreateIncomplete) as excinfo:
+            mock_db.create_api_keys_bulk(user_id, [(f"API {i}", f"k{i}") for i in range(60)])
+
+    # The first chunk was written; the second was throttled and the third never sent
+    assert calls == [25] + [25] * mock_db.BATCH_WRITE_ATTEMPTS
+    assert [item["api_key"] for item in excinfo.value.created] == [f"k{i}" for i in range(25)]
+    assert excinfo.value.unprocessed == list(range(25, 60))
+    assert mock_db.count_user_api_keys(user_id) == 25
+
+    mock_db.delete_api_keys_bulk(user_id, [item["id"] for item in excinfo.value.created])
+
+
+def test_update_and_delete_check_ownership_in_the_write(stored_keys):
+    """Test that ownership is enforced by the conditional write, without reading the key first"""
+    user_id, key_ids = stored_keys
+
+    with mock.patch.object(mock_db, "decrypt_api_key", side_effect=AssertionError("decrypted")), \
+            mock.patch.object(mock_db.api_keys_table, "get_item", side_effect=AssertionError("read")):
+        with pytest.raises(mock_db.ApiKeyForbidden):
+            mock_db.update_api_key(key_ids[0], api_key="stolen", user_id="intruder@example.com")
+        with pytest.raises(mock_db.ApiKeyNotFound):
+            mock_db.update_api_key("missing-id", api_key="new", user_id=user_id)
+        with pytest.raises(mock_db.ApiKeyForbidden):
+            mock_db.delete_api_key(key_ids[1], user_id="intruder@example.com")
+        with pytest.raises(mock_db.ApiKeyNotFound):
+            mock_db.delete_api_key("missing-id", user_id=user_id)
+
+        updated = mock_db.update_api_key(key_ids[0], api_key="rotated", user_id=user_id)
+        assert updated["api_key"] == "rotated" and "encrypted_key" not in updated
+        assert mock_db.delete_api_key(key_ids[2], user_id=user_id)["api_name"] == "API 2"
+
+        created = mock_db.create_api_key_item(user_id, "API 3", "secret-3")
+        assert created["api_key"] == "secret-3" and "encrypted_key" not in created
+        key_ids.append(created["id"])
+
+    # Failed conditions changed nothing, and no item was created for the missing ID
+    assert mock_db.get_api_key(key_ids[1])["api_key"] == "secret-1"
+    assert mock_db.get_api_key("missing-id") is None
+    assert mock_db.get_api_key(key_ids[3])["api_key"] == "secret-3"
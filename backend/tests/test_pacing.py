@@ -0,0 +1,120 @@
+import pytest
+from unittest import mock
+from datetime import datetime, timedelta
+import sys
+import os
+
+# Add the parent directory to path for imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.utils import pacing
+from app.utils.admission import AdmissionRejected
+from app.utils.redis_client import RateLimitData
+
+TEST_USER_ID = "pacing-user"
+
+
+@pytest.fixture(autouse=True)
+def reset_pacing_state():
+    """Start every test with no pacing history"""
+    pacing._local_tats.clear()
+    yield
+    pacing._local_tats.clear()
+
+
+def make_rate_limit(remaining: int, seconds_to_reset: int) -> RateLimitData:
+    return RateLimitData(
+        api_name="pacedapi",
+        limit=100,
+        remaining=remaining,
+        reset_time=datetime.now() + timedelta(seconds=seconds_to_reset),
+        user_id=TEST_USER_ID
+    )
+
+
+def test_emission_interval_spreads_remaining_quota():
+    """Test that the interval spreads what's left evenly until reset"""
+    interval = pacing.emission_interval(make_rate_limit(remaining=60, seconds_to_reset=60))
+    assert 0.95 <= interval <= 1.0
+
+    # Nothing to pace without a known, live budget
+    assert pacing.emission_interval(None) is None
+    assert pacing.emission_interval(make_rate_limit(remaining=0, seconds_to_reset=60)) is None
+    assert pacing.emission_interval(make_rate_limit(remaining=10, seconds_to_reset=-5)) is None
+
+
+def test_gcra_allows_burst_then_spaces_requests():
+    """Test the GCRA reservation: a burst goes through, then requests must wait"""
+    key = "pacing:burst:test"
+    interval, burst = 1.0, 3
+    tolerance = interval * (burst - 1)
+
+    assert [pacing._reserve_local(key, interval, tolerance) for _ in range(burst)] == [0.0] * burst
+
+    wait = pacing._reserve_local(key, interval, tolerance)
+    assert 0.9 <= wait <= 1.0
+
+
+@pytest.mark.asyncio
+async def test_acquire_waits_for_a_slot(monkeypatch):
+    """Test that acquire sleeps until a slot frees up"""
+    monkeypatch.setenv("PROXY_PACING_BURST", "1")
+    rate_limit = make_rate_limit(remaining=100, seconds_to_reset=10)
+
+    assert await pacing.acquire("pacedapi", TEST_USER_ID, rate_limit) == 0.0
+
+    with mock.patch("app.utils.pacing.asyncio.sleep") as mock_sleep, \
+            mock.patch("app.utils.pacing._reserve", side_effect=[0.1, 0.0]):
+        waited = await pacing.acquire("pacedapi", TEST_USER_ID, rate_limit)
+
+    assert waited == pytest.approx(0.1)
+    mock_sleep.assert_called_once_with(0.1)
+
+
+@pytest.mark.asyncio
+async def test_acquire_rejects_long_waits(monkeypatch):
+    """Test that waits beyond the configured maximum are rejected"""
+    monkeypatch.setenv("PROXY_PACING_BURST", "1")
+    monkeypatch.setenv("PROXY_PACING_MAX_WAIT", "1")
+    # One request left for the next minute
+    rate_limit = make_rate_limit(remaining=1, seconds_to_reset=60)
+
+    assert await pacing.acquire("pacedapi", TEST_USER_ID, rate_limit) == 0.0
+    with pytest.raises(AdmissionRejected):
+        await pacing.acquire("pacedapi", TEST_USER_ID, rate_limit)
+
+
+@pytest.mark.asyncio
+async def test_acquire_disabled(monkeypatch):
+    """Test that pacing can be turned off"""
+    monkeypatch.setattr(pacing, "PACING_ENABLED", False)
+    rate_limit = make_rate_limit(remaining=1, seconds_to_reset=60)
+
+    for _ in range(3):
+        assert await pacing.acquire("pacedapi", TEST_USER_ID, rate_limit) == 0.0
+
+
+@pytest.mark.asyncio
+async def test_script_failures_warn_once_per_outage(caplog):
+    """Test that falling back to local pacing doesn't log a warning on every call"""
+    script = mock.AsyncMock(side_effect=ConnectionError("redis down"))
+    client = mock.MagicMock()
+    client.register_script.return_value = script
+
+    with mock.patch("app.utils.pacing.redis_client.get_client", return_value=client), \
+            mock.patch.object(pacing, "_gcra_script", None), \
+            mock.patch.object(pacing, "_script_failing", False):
+        with caplog.at_level("DEBUG", logger="app.utils.pacing"):
+            for _ in range(5):
+                assert await pacing._reserve("pacing:outage:test", 1.0, 0.0) >= 0.0
+            warnings = [record for record in caplog.records if record.levelname == "WARNING"]
+            assert len(warnings) == 1
+
+            # Once Redis is back the next outage is reported again
+            script.side_effect = None
+            script.return_value = "0"
+            assert await pacing._reserve("pacing:outage:test", 1.0, 0.0) == 0.0
+            script.side_effect = ConnectionError("redis down again")
+            await pacing._reserve("pacing:outage:test", 1.0, 0.0)
+            warnings = [record for record in caplog.records if record.levelname == "WARNING"]
+            assert len(warnings) == 2
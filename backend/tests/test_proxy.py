@@ -1,7 +1,9 @@
 import pytest
+import asyncio
 from fastapi.testclient import TestClient
 from unittest import mock
 import json
+import httpx
 
 from app.main import app
 from app.utils.auth import create_access_token
@@ -95,7 +97,7 @@ def test_proxy_request_with_api_key(mock_request, monkeypatch):
     mock_response.text = json.dumps({"data": "success with api key"})
     mock_request.return_value = mock_response
 
-    # Mock the get_api_key function
+    # Mock the cached get_api_key function
     def mock_get_api_key(key_id):
         if key_id == "test-key-id":
             return {
@@ -107,7 +109,7 @@ def test_proxy_request_with_api_key(mock_request, monkeypatch):
             }
         return None
 
-    monkeypatch.setattr("app.routers.proxy.get_api_key", mock_get_api_key)
+    monkeypatch.setattr("app.routers.proxy.get_api_key_cached", mock_get_api_key)
 
     # Get auth token
     token = get_auth_token()
@@ -135,6 +137,35 @@ def test_proxy_request_with_api_key(mock_request, monkeypatch):
     assert called_args["headers"]["X-API-Key"] == "test-api-key-value"
 
 
+@mock.patch("httpx.AsyncClient.request")
+def test_proxy_request_reuses_decrypted_api_key(mock_request):
+    """Test that repeated requests with a stored key hit the key cache"""
+    from app.utils import mock_db
+
+    mock_response = mock.MagicMock()
+    mock_response.status_code = 200
+    mock_response.headers = {"content-type": "application/json"}
+    mock_response.text = "{}"
+    mock_request.return_value = mock_response
+
+    key_id = mock_db.create_api_key("test@example.com", "Cached API", "cached-secret")
+    headers = {"Authorization": f"Bearer {get_auth_token()}"}
+    request_data = {"url": "https://cached.example.com/items", "method": "POST", "api_key_id": key_id}
+
+    before = client.get("/api/proxy/key-cache", headers=headers).json()
+    with mock.patch.object(mock_db, "decrypt_api_key", wraps=mock_db.decrypt_api_key) as decrypt:
+        for _ in range(3):
+            response = client.post("/api/proxy", json=request_data, headers=headers)
+            assert response.status_code == 200
+            assert mock_request.call_args[1]["headers"]["Authorization"] == "cached-secret"
+    assert decrypt.call_count == 1
+
+    after = client.get("/api/proxy/key-cache", headers=headers).json()
+    assert after["hits"] - before["hits"] == 2
+    assert after["size"] >= 1
+
+    mock_db.delete_api_key(key_id)
+
 def test_proxy_request_unauthorized():
     """Test that proxy endpoint requires authentication"""
     request_data = {
@@ -144,4 +175,519 @@ def test_proxy_request_unauthorized():
     
     # Request without token should fail
     response = client.post("/api/proxy", json=request_data)
-    assert response.status_code == 401 
\ No newline at end of file
+    assert response.status_code == 401 
+
+@mock.patch("app.routers.proxy.log_request")
+@mock.patch("httpx.AsyncClient.send")
+def test_proxy_request_stream(mock_send, mock_log_request):
+    """Test that the streaming route pipes upstream bytes through unchanged"""
+    payload = b'{"items": [1, 2, 3]}'
+    mock_send.return_value = httpx.Response(
+        200,
+        headers={
+            "content-type": "application/json",
+            "x-upstream": "yes",
+            "connection": "keep-alive",
+        },
+        stream=httpx.ByteStream(payload),
+    )
+
+    token = get_auth_token()
+    headers = {"Authorization": f"Bearer {token}"}
+
+    request_data = {
+        "url": "https://example.com/export",
+        "method": "GET"
+    }
+
+    response = client.post("/api/proxy/stream", json=request_data, headers=headers)
+
+    # Status, body and end-to-end headers are forwarded as-is
+    assert response.status_code == 200
+    assert response.content == payload
+    assert response.headers["x-upstream"] == "yes"
+    assert response.headers["content-type"] == "application/json"
+
+    # The upstream was asked for a streamed response
+    assert mock_send.call_args[1]["stream"] is True
+
+    # The request is logged exactly once after the stream closes
+    mock_log_request.assert_called_once()
+    assert mock_log_request.call_args[1]["status_code"] == 200
+
+
+@mock.patch("app.routers.proxy.log_request")
+@mock.patch("httpx.AsyncClient.send")
+def test_proxy_request_stream_logs_local_rejections(mock_send, mock_log_request, monkeypatch):
+    """Test that a stream refused by admission control is logged like a buffered one"""
+    from datetime import datetime, timedelta
+    from app.utils.redis_client import store_rate_limit, delete_rate_limit
+
+    monkeypatch.delenv("PROXY_ADMISSION_POLICY", raising=False)
+    monkeypatch.setattr(
+        "app.routers.proxy.get_api_key_cached",
+        lambda key_id: {"id": key_id, "api_name": "Stream Quota API", "api_key": "secret"}
+    )
+    asyncio.run(store_rate_limit(
+        api_name="stream quota api",
+        limit=60,
+        remaining=0,
+        reset_time=datetime.now() + timedelta(seconds=30),
+        user_id="test@example.com",
+        ttl=60
+    ))
+
+    token = get_auth_token()
+    headers = {"Authorization": f"Bearer {token}"}
+    request_data = {
+        "url": "https://api.streamquota.example.com/export",
+        "method": "GET",
+        "api_key_id": "stream-quota-key"
+    }
+
+    response = client.post("/api/proxy/stream", json=request_data, headers=headers)
+
+    assert response.status_code == 429
+    mock_send.assert_not_called()
+    mock_log_request.assert_called_once()
+    assert mock_log_request.call_args[1]["status_code"] == 429
+    assert mock_log_request.call_args[1]["attempts"] == 0
+
+    asyncio.run(delete_rate_limit("stream quota api", "test@example.com"))
+
+
+@mock.patch("httpx.AsyncClient.request")
+def test_proxy_request_batch(mock_request):
+    """Test that a batch returns per-item results in request order"""
+    async def fake_request(method, url, **kwargs):
+        if "broken" in url:
+            raise httpx.ConnectError("connection refused")
+        response = mock.MagicMock()
+        response.status_code = 200
+        response.headers = {"content-type": "application/json"}
+        response.json.return_value = {"url": url}
+        return response
+
+    mock_request.side_effect = fake_request
+
+    token = get_auth_token()
+    headers = {"Authorization": f"Bearer {token}"}
+
+    batch_data = {
+        "requests": [
+            {"url": "https://example.com/one"},
+            {"url": "https://broken.example.com/two", "retry": {"max_attempts": 1}},
+            {"url": "https://example.com/three"},
+        ],
+        "concurrency": 2
+    }
+
+    response = client.post("/api/proxy/batch", json=batch_data, headers=headers)
+
+    assert response.status_code == 200
+    items = response.json()["responses"]
+    assert [item["index"] for item in items] == [0, 1, 2]
+
+    assert items[0]["response"]["body"]["url"] == "https://example.com/one"
+    assert items[2]["response"]["body"]["url"] == "https://example.com/three"
+
+    # A failing item doesn't fail the whole batch
+    assert items[1]["response"] is None
+    assert items[1]["error_status_code"] == 500
+    assert "connection refused" in items[1]["error"]
+    assert mock_request.call_count == 3
+
+
+def test_proxy_request_batch_too_large(monkeypatch):
+    """Test that oversized batches are rejected"""
+    monkeypatch.setattr("app.routers.proxy.PROXY_BATCH_MAX_REQUESTS", 2)
+
+    token = get_auth_token()
+    headers = {"Authorization": f"Bearer {token}"}
+
+    batch_data = {"requests": [{"url": "https://example.com/api"}] * 3}
+
+    response = client.post("/api/proxy/batch", json=batch_data, headers=headers)
+    assert response.status_code == 400
+
+
+@mock.patch("httpx.AsyncClient.request")
+def test_proxy_request_cache_hit_and_revalidation(mock_request):
+    """Test that cacheable GETs are served from cache and revalidated with ETags"""
+    from app.utils import response_cache
+    response_cache.clear()
+
+    fresh_response = mock.MagicMock()
+    fresh_response.status_code = 200
+    fresh_response.headers = {
+        "content-type": "application/json",
+        "cache-control": "max-age=0",
+        "etag": '"v1"',
+    }
+    fresh_response.json.return_value = {"version": 1}
+    mock_request.return_value = fresh_response
+
+    token = get_auth_token()
+    headers = {"Authorization": f"Bearer {token}"}
+    request_data = {"url": "https://example.com/cached", "method": "GET"}
+
+    # First call goes upstream and populates the cache
+    first = client.post("/api/proxy", json=request_data, headers=headers).json()
+    assert first["cache_status"] == "miss"
+    assert first["body"] == {"version": 1}
+
+    # The entry is already stale, so the next call revalidates it
+    not_modified = mock.MagicMock()
+    not_modified.status_code = 304
+    not_modified.headers = {"cache-control": "max-age=60", "etag": '"v1"'}
+    mock_request.return_value = not_modified
+
+    second = client.post("/api/proxy", json=request_data, headers=headers).json()
+    assert second["cache_status"] == "revalidated"
+    assert second["status_code"] == 200
+    assert second["body"] == {"version": 1}
+    assert mock_request.call_args[1]["headers"]["If-None-Match"] == '"v1"'
+
+    # Now fresh for 60 seconds: no upstream call at all
+    third = client.post("/api/proxy", json=request_data, headers=headers).json()
+    assert third["cache_status"] == "hit"
+    assert third["body"] == {"version": 1}
+    assert mock_request.call_count == 2
+
+    response_cache.clear()
+
+
+@mock.patch("app.routers.proxy.log_request")
+@mock.patch("httpx.AsyncClient.request")
+def test_proxy_request_coalesces_identical_gets(mock_request, mock_log_request):
+    """Test that concurrent identical GETs share one upstream call"""
+
+    async def slow_request(method, url, **kwargs):
+        await asyncio.sleep(0.05)
+        response = mock.MagicMock()
+        response.status_code = 200
+        response.headers = {"content-type": "application/json"}
+        response.json.return_value = {"shared": True}
+        return response
+
+    mock_request.side_effect = slow_request
+
+    token = get_auth_token()
+    headers = {"Authorization": f"Bearer {token}"}
+
+    batch_data = {"requests": [{"url": "https://example.com/hot", "method": "GET"}] * 3}
+    response = client.post("/api/proxy/batch", json=batch_data, headers=headers)
+
+    assert response.status_code == 200
+    items = response.json()["responses"]
+    assert all(item["response"]["body"] == {"shared": True} for item in items)
+    assert [item["response"]["coalesced"] for item in items].count(True) == 2
+    assert mock_request.call_count == 1
+
+    # Every caller still gets its own log entry, marked when coalesced
+    assert mock_log_request.call_count == 3
+    coalesced_flags = [call[1]["coalesced"] for call in mock_log_request.call_args_list]
+    assert coalesced_flags.count(True) == 2
+
+
+@mock.patch("app.routers.proxy.log_request")
+@mock.patch("httpx.AsyncClient.request")
+def test_proxy_request_failed_coalesced_gets_logged_as_followers(mock_request, mock_log_request):
+    """Test that callers sharing a failed upstream call aren't logged as upstream calls"""
+
+    async def failing_request(method, url, **kwargs):
+        await asyncio.sleep(0.05)
+        raise httpx.ConnectError("connection refused")
+
+    mock_request.side_effect = failing_request
+
+    token = get_auth_token()
+    headers = {"Authorization": f"Bearer {token}"}
+
+    item = {"url": "https://example.com/down", "method": "GET", "retry": {"max_attempts": 1}}
+    response = client.post("/api/proxy/batch", json={"requests": [item] * 3}, headers=headers)
+
+    assert response.status_code == 200
+    assert all(item["error_status_code"] == 500 for item in response.json()["responses"])
+    assert mock_request.call_count == 1
+
+    # One entry for the call that went upstream, the rest marked as followers
+    logged = [(call[1]["coalesced"], call[1]["attempts"]) for call in mock_log_request.call_args_list]
+    assert sorted(logged) == [(False, 1), (True, 0), (True, 0)]
+
+
+@mock.patch("httpx.AsyncClient.request")
+def test_proxy_request_rejected_when_quota_exhausted(mock_request, monkeypatch):
+    """Test that an exhausted stored rate limit short-circuits with a 429"""
+    from datetime import datetime, timedelta
+    from app.utils.redis_client import store_rate_limit, delete_rate_limit
+
+    monkeypatch.delenv("PROXY_ADMISSION_POLICY", raising=False)
+    monkeypatch.setattr(
+        "app.routers.proxy.get_api_key_cached",
+        lambda key_id: {"id": key_id, "api_name": "Quota API", "api_key": "secret"}
+    )
+    asyncio.run(store_rate_limit(
+        api_name="quota api",
+        limit=60,
+        remaining=0,
+        reset_time=datetime.now() + timedelta(seconds=30),
+        user_id="test@example.com",
+        ttl=60
+    ))
+
+    token = get_auth_token()
+    headers = {"Authorization": f"Bearer {token}"}
+    request_data = {
+        "url": "https://api.quota.example.com/items",
+        "method": "GET",
+        "api_key_id": "quota-key"
+    }
+
+    response = client.post("/api/proxy", json=request_data, headers=headers)
+
+    assert response.status_code == 429
+    assert 1 <= int(response.headers["Retry-After"]) <= 30
+    mock_request.assert_not_called()
+
+    asyncio.run(delete_rate_limit("quota api", "test@example.com"))
+
+
+@mock.patch("app.utils.retry.asyncio.sleep")
+@mock.patch("httpx.AsyncClient.request")
+def test_proxy_request_retries_transient_failures(mock_request, mock_sleep):
+    """Test that transient errors and 503s are retried, honoring Retry-After"""
+    unavailable = mock.MagicMock()
+    unavailable.status_code = 503
+    unavailable.headers = {"retry-after": "2"}
+
+    ok = mock.MagicMock()
+    ok.status_code = 200
+    ok.headers = {"content-type": "application/json"}
+    ok.json.return_value = {"data": "eventually"}
+
+    mock_request.side_effect = [httpx.ConnectError("reset by peer"), unavailable, ok]
+
+    token = get_auth_token()
+    headers = {"Authorization": f"Bearer {token}"}
+    request_data = {"url": "https://flaky.example.com/api", "method": "GET"}
+
+    response = client.post("/api/proxy", json=request_data, headers=headers)
+
+    assert response.status_code == 200
+    data = response.json()
+    assert data["body"]["data"] == "eventually"
+    assert data["attempts"] == 3
+    assert mock_request.call_count == 3
+
+    # The second wait comes straight from Retry-After
+    assert mock_sleep.call_args_list[1][0][0] == 2.0
+    assert data["retry_backoff"] >= 2000
+
+
+@mock.patch("httpx.AsyncClient.request")
+def test_proxy_request_post_not_retried_by_default(mock_request):
+    """Test that non-idempotent requests are only retried when opted in"""
+    unavailable = mock.MagicMock()
+    unavailable.status_code = 503
+    unavailable.headers = {"content-type": "application/json"}
+    unavailable.json.return_value = {"error": "unavailable"}
+    mock_request.return_value = unavailable
+
+    token = get_auth_token()
+    headers = {"Authorization": f"Bearer {token}"}
+    request_data = {
+        "url": "https://flaky.example.com/api",
+        "method": "POST",
+        "body": {"name": "once"}
+    }
+
+    response = client.post("/api/proxy", json=request_data, headers=headers)
+
+    assert response.status_code == 200
+    assert response.json()["status_code"] == 503
+    assert response.json()["attempts"] == 1
+    assert mock_request.call_count == 1
+
+
+@mock.patch("httpx.AsyncClient.request")
+def test_proxy_request_fails_fast_when_circuit_open(mock_request):
+    """Test that an open circuit rejects calls without contacting the upstream"""
+    from app.utils import circuit_breaker
+
+    breaker = circuit_breaker.get_breaker("down.example.com")
+    asyncio.run(breaker._open())
+
+    token = get_auth_token()
+    headers = {"Authorization": f"Bearer {token}"}
+    request_data = {"url": "https://down.example.com/api", "method": "GET"}
+
+    response = client.post("/api/proxy", json=request_data, headers=headers)
+    assert response.status_code == 503
+    assert "Retry-After" in response.headers
+    mock_request.assert_not_called()
+
+    # The dashboard can see which upstreams are tripped
+    circuits = client.get("/api/proxy/circuits", headers=headers).json()
+    down = next(c for c in circuits if c["name"] == "down.example.com")
+    assert down["state"] == "open"
+    assert down["open_until"] is not None
+
+    asyncio.run(breaker._close())
+
+
+@mock.patch("httpx.AsyncClient.request")
+def test_proxy_request_reports_timeout_phase(mock_request):
+    """Test that upstream timeouts map to 504 with the phase that timed out"""
+    mock_request.side_effect = httpx.ReadTimeout("timed out")
+
+    token = get_auth_token()
+    headers = {"Authorization": f"Bearer {token}"}
+    request_data = {
+        "url": "https://slow.example.com/api",
+        "method": "GET",
+        "retry": {"max_attempts": 1},
+        "timeouts": {"connect": 1, "read": 2, "deadline": 5}
+    }
+
+    response = client.post("/api/proxy", json=request_data, headers=headers)
+
+    assert response.status_code == 504
+    assert response.headers["X-Proxy-Timeout-Phase"] == "read"
+
+    # Per-phase timeouts from the request reach the upstream call
+    timeout = mock_request.call_args.kwargs["timeout"]
+    assert timeout.connect <= 1
+    assert timeout.read <= 2
+
+
+@mock.patch("httpx.AsyncClient.request")
+def test_proxy_request_deadline_starts_after_admission_queue(mock_request, monkeypatch):
+    """Test that time spent queued for a rate limit reset isn't charged to the deadline"""
+    from datetime import datetime, timedelta
+    from app.utils.redis_client import store_rate_limit, delete_rate_limit
+
+    monkeypatch.setenv("PROXY_ADMISSION_POLICY", "queue")
+    monkeypatch.setattr(
+        "app.routers.proxy.get_api_key_cached",
+        lambda key_id: {"id": key_id, "api_name": "Queued API", "api_key": "secret"}
+    )
+    asyncio.run(store_rate_limit(
+        api_name="queued api",
+        limit=60,
+        remaining=0,
+        reset_time=datetime.now() + timedelta(seconds=0.5),
+        user_id="test@example.com",
+        ttl=60
+    ))
+
+    ok = mock.MagicMock()
+    ok.status_code = 200
+    ok.headers = {"content-type": "application/json"}
+    ok.json.return_value = {"data": "after reset"}
+    mock_request.return_value = ok
+
+    token = get_auth_token()
+    headers = {"Authorization": f"Bearer {token}"}
+    request_data = {
+        "url": "https://api.queued.example.com/items",
+        "method": "GET",
+        "api_key_id": "queued-key",
+        "timeouts": {"deadline": 0.2}
+    }
+
+    response = client.post("/api/proxy", json=request_data, headers=headers)
+
+    # Queued for longer than the deadline, yet the upstream call still went out
+    assert response.status_code == 200
+    assert response.json()["body"] == {"data": "after reset"}
+    mock_request.assert_called_once()
+
+    asyncio.run(delete_rate_limit("queued api", "test@example.com"))
+
+
+@mock.patch("httpx.AsyncClient.request")
+def test_proxy_request_hanging_upstream_opens_circuit(mock_request, monkeypatch):
+    """Test that attempts cut off by the deadline count against the circuit breaker"""
+    from app.utils import circuit_breaker
+
+    monkeypatch.setattr(circuit_breaker, "BREAKER_MIN_CALLS", 3)
+
+    async def hang(method, url, **kwargs):
+        await asyncio.sleep(10)
+
+    mock_request.side_effect = hang
+
+    token = get_auth_token()
+    headers = {"Authorization": f"Bearer {token}"}
+    request_data = {
+        "url": "https://hung.example.com/api",
+        "method": "GET",
+        "retry": {"max_attempts": 1},
+        "timeouts": {"deadline": 0.05}
+    }
+
+    for _ in range(3):
+        response = client.post("/api/proxy", json=request_data, headers=headers)
+        assert response.status_code == 504
+        assert response.headers["X-Proxy-Timeout-Phase"] == "deadline"
+
+    # Three hung calls were enough to trip the breaker; the next fails fast
+    response = client.post("/api/proxy", json=request_data, headers=headers)
+    assert response.status_code == 503
+    assert mock_request.call_count == 3
+
+    circuits = client.get("/api/proxy/circuits", headers=headers).json()
+    assert next(c for c in circuits if c["name"] == "hung.example.com")["state"] == "open"
+
+    asyncio.run(circuit_breaker.get_breaker("hung.example.com")._close())
+
+
+@mock.patch("httpx.AsyncClient.request")
+def test_proxy_request_coalesced_gets_take_one_pacing_slot(mock_request, monkeypatch):
+    """Test that concurrent identical GETs only pace the call that goes upstream"""
+    from datetime import datetime, timedelta
+    from app.utils import pacing, response_cache
+    from app.utils.redis_client import store_rate_limit, delete_rate_limit
+
+    monkeypatch.setattr(pacing, "PACING_ENABLED", True)
+    monkeypatch.setenv("PROXY_PACING_BURST", "3")
+    monkeypatch.setenv("PROXY_PACING_MAX_WAIT", "1")
+    monkeypatch.setattr(
+        "app.routers.proxy.get_api_key_cached",
+        lambda key_id: {"id": key_id, "api_name": "Paced API", "api_key": "secret"}
+    )
+    # One request every 10 seconds, so only the burst can go right away
+    asyncio.run(store_rate_limit(
+        api_name="paced api",
+        limit=100,
+        remaining=100,
+        reset_time=datetime.now() + timedelta(seconds=1000),
+        user_id="test@example.com",
+        ttl=1000
+    ))
+
+    async def slow_request(method, url, **kwargs):
+        await asyncio.sleep(0.05)
+        response = mock.MagicMock()
+        response.status_code = 200
+        response.headers = {"content-type": "application/json"}
+        response.json.return_value = {"paced": True}
+        return response
+
+    mock_request.side_effect = slow_request
+
+    token = get_auth_token()
+    headers = {"Authorization": f"Bearer {token}"}
+    item = {"url": "https://api.paced.example.com/hot", "method": "GET", "api_key_id": "paced-key"}
+    response = client.post("/api/proxy/batch", json={"requests": [item] * 10}, headers=headers)
+
+    # Ten callers, one upstream call and one pacing slot: nobody is rejected
+    assert response.status_code == 200
+    items = response.json()["responses"]
+    assert all(item["response"]["body"] == {"paced": True} for item in items)
+    assert mock_request.call_count == 1
+
+    asyncio.run(delete_rate_limit("paced api", "test@example.com"))
+    pacing._local_tats.clear()
+    response_cache.clear()
@@ -0,0 +1,72 @@
+import pytest
+import json
+from datetime import datetime, timedelta, timezone
+import sys
+import os
+
+# Add the parent directory to path for imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.utils import rate_limit_codec
+from app.utils.rate_limit_data import RateLimitData
+
+
+def make_rate_limit(**overrides):
+    fields = dict(
+        api_name="github",
+        limit=5000,
+        remaining=4950,
+        reset_time=datetime(2024, 6, 1, 12, 30, 15, 123456),
+        user_id="test@example.com",
+        last_updated=datetime(2024, 6, 1, 12, 0, 0, 654321),
+    )
+    fields.update(overrides)
+    return RateLimitData(**fields)
+
+
+@pytest.mark.parametrize("codec_name", ["json", "struct"])
+@pytest.mark.parametrize("overrides", [
+    {},
+    {"reset_time": None, "user_id": None},
+    {"reset_time": datetime(2024, 6, 1, 12, 30, tzinfo=timezone.utc), "api_name": "Ünïcode API"},
+    {"remaining": 0, "limit": 2 ** 40},
+])
+def test_round_trip(codec_name, overrides):
+    """Test that every codec gives back exactly what was stored"""
+    original = make_rate_limit(**overrides)
+    decoded = rate_limit_codec.decode(rate_limit_codec.get_codec(codec_name).encode(original))
+
+    assert decoded.to_dict() == original.to_dict()
+    if original.reset_time is not None:
+        assert decoded.reset_time == original.reset_time
+        assert (decoded.reset_time.tzinfo is None) == (original.reset_time.tzinfo is None)
+
+
+def test_struct_records_are_smaller():
+    """Test that the binary format beats the JSON document on size"""
+    rate_limit = make_rate_limit()
+    packed = rate_limit_codec.get_codec("struct").encode(rate_limit)
+
+    assert len(packed) < len(json.dumps(rate_limit.to_dict())) / 2
+
+
+def test_reads_legacy_json_and_redis_strings():
+    """Test that existing JSON keys and surrogate-escaped strings both decode"""
+    rate_limit = make_rate_limit()
+
+    legacy = json.dumps(rate_limit.to_dict())
+    assert rate_limit_codec.decode(legacy).remaining == 4950
+
+    # What redis-py returns for binary values with decode_responses=True
+    packed = rate_limit_codec.get_codec("struct").encode(rate_limit)
+    as_str = packed.decode("utf-8", "surrogateescape")
+    assert rate_limit_codec.decode(as_str).to_dict() == rate_limit.to_dict()
+
+
+def test_corrupt_records_raise_value_error():
+    """Test that unreadable data surfaces as ValueError for callers to skip"""
+    packed = rate_limit_codec.get_codec("struct").encode(make_rate_limit())
+
+    for bad in (b"\x09garbage", packed[:10], packed + b"x", "not json", '{"limit": 1}'):
+        with pytest.raises(ValueError):
+            rate_limit_codec.decode(bad)
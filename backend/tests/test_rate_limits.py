@@ -3,13 +3,14 @@ from unittest import mock
 from datetime import datetime, timedelta
 import json
 
-from app.routers.proxy import _extract_rate_limit_headers, _store_rate_limit_info
+from app.routers.proxy import _extract_rate_limit_headers, _store_rate_limit_info, _track_rate_limits
 from app.utils.redis_client import store_rate_limit
 
 @pytest.fixture
 def mock_redis_client():
     """Setup a mock for the Redis client"""
     with mock.patch("app.routers.proxy.redis_client") as mock_client:
+        mock_client.store_rate_limit = mock.AsyncMock()
         yield mock_client
 
 
@@ -100,7 +101,8 @@ def test_extract_rate_limit_headers_twitter():
     assert rate_limit_headers["x-rate-limit-reset"] == "1625097120"
 
 
-def test_store_rate_limit_info_github(mock_redis_client):
+@pytest.mark.asyncio
+async def test_store_rate_limit_info_github(mock_redis_client):
     """Test storing GitHub rate limit information"""
     # Setup test headers
     headers = {
@@ -110,7 +112,7 @@ def test_store_rate_limit_info_github(mock_redis_client):
     }
     
     # Store rate limit info
-    result = _store_rate_limit_info(
+    result = await _store_rate_limit_info(
         rate_limit_headers=headers,
         api_name="GitHub",
         user_id="test-user"
@@ -125,7 +127,7 @@ def test_store_rate_limit_info_github(mock_redis_client):
     assert "ttl" in result
     
     # Verify Redis call
-    mock_redis_client.store_rate_limit.assert_called_once()
+    mock_redis_client.store_rate_limit.assert_awaited_once()
     call_args = mock_redis_client.store_rate_limit.call_args[1]
     assert call_args["api_name"] == "github"
     assert call_args["limit"] == 5000
@@ -134,7 +136,8 @@ def test_store_rate_limit_info_github(mock_redis_client):
     assert call_args["ttl"] > 0
 
 
-def test_store_rate_limit_info_generic(mock_redis_client):
+@pytest.mark.asyncio
+async def test_store_rate_limit_info_generic(mock_redis_client):
     """Test storing generic rate limit information"""
     # Setup test headers
     headers = {
@@ -144,7 +147,7 @@ def test_store_rate_limit_info_generic(mock_redis_client):
     }
     
     # Store rate limit info
-    result = _store_rate_limit_info(
+    result = await _store_rate_limit_info(
         rate_limit_headers=headers,
         api_name="API Service",
         user_id="test-user"
@@ -159,7 +162,7 @@ def test_store_rate_limit_info_generic(mock_redis_client):
     assert "ttl" in result
     
     # Verify Redis call
-    mock_redis_client.store_rate_limit.assert_called_once()
+    mock_redis_client.store_rate_limit.assert_awaited_once()
     call_args = mock_redis_client.store_rate_limit.call_args[1]
     assert call_args["api_name"] == "api service"
     assert call_args["limit"] == 1000
@@ -168,7 +171,8 @@ def test_store_rate_limit_info_generic(mock_redis_client):
     assert 3590 <= call_args["ttl"] <= 3600
 
 
-def test_store_rate_limit_info_missing_reset(mock_redis_client):
+@pytest.mark.asyncio
+async def test_store_rate_limit_info_missing_reset(mock_redis_client):
     """Test storing rate limit info with missing reset time"""
     # Setup test headers with no reset time
     headers = {
@@ -177,7 +181,7 @@ def test_store_rate_limit_info_missing_reset(mock_redis_client):
     }
     
     # Store rate limit info
-    result = _store_rate_limit_info(
+    result = await _store_rate_limit_info(
         rate_limit_headers=headers,
         api_name="API Service",
         user_id="test-user"
@@ -192,6 +196,123 @@ def test_store_rate_limit_info_missing_reset(mock_redis_client):
     assert 3590 <= result["ttl"] <= 3600  # Default 1 hour with small margin of error
     
     # Verify Redis call
-    mock_redis_client.store_rate_limit.assert_called_once()
+    mock_redis_client.store_rate_limit.assert_awaited_once()
     call_args = mock_redis_client.store_rate_limit.call_args[1]
-    assert 3590 <= call_args["ttl"] <= 3600 
\ No newline at end of file
+    assert 3590 <= call_args["ttl"] <= 3600 
+
+def test_parse_openai_dimensions_and_durations():
+    """Test that request and token limits are parsed as separate dimensions"""
+    from app.utils.rate_limit_headers import most_constrained, parse_rate_limit_headers
+
+    now = datetime(2024, 1, 1, 12, 0, 0)
+    headers = {
+        "x-ratelimit-limit-requests": "500",
+        "x-ratelimit-remaining-requests": "499",
+        "x-ratelimit-reset-requests": "120ms",
+        "x-ratelimit-limit-tokens": "30000",
+        "x-ratelimit-remaining-tokens": "1500",
+        "x-ratelimit-reset-tokens": "6m0s",
+    }
+
+    windows = {w.dimension: w for w in parse_rate_limit_headers(headers, now)}
+
+    assert windows["requests"].remaining == 499
+    assert windows["requests"].reset_time == now + timedelta(milliseconds=120)
+    assert windows["tokens"].limit == 30000
+    assert windows["tokens"].reset_time == now + timedelta(minutes=6)
+    # Tokens are nearly used up, so they are what the proxy tracks
+    assert most_constrained(list(windows.values())).dimension == "tokens"
+
+
+def test_parse_reset_delta_and_epoch():
+    """Test that reset values are read as delta-seconds or timestamps"""
+    from app.utils.rate_limit_headers import parse_rate_limit_headers
+
+    now = datetime(2024, 1, 1, 12, 0, 0)
+    epoch = int((now + timedelta(minutes=5)).timestamp())
+
+    delta = parse_rate_limit_headers(
+        {"RateLimit-Limit": "100", "RateLimit-Remaining": "10", "RateLimit-Reset": "30"}, now
+    )[0]
+    assert delta.profile == "ietf"
+    assert delta.reset_time == now + timedelta(seconds=30)
+
+    # The generic X-RateLimit-Reset can be either, decided by magnitude
+    for reset, expected in [("45", now + timedelta(seconds=45)), (str(epoch), now + timedelta(minutes=5))]:
+        window = parse_rate_limit_headers(
+            {"X-RateLimit-Limit": "100", "X-RateLimit-Remaining": "10", "X-RateLimit-Reset": reset}, now
+        )[0]
+        assert window.reset_time == expected
+
+
+def test_parse_structured_and_composite_headers():
+    """Test the IETF structured fields and Shopify's call limit header"""
+    from app.utils.rate_limit_headers import parse_rate_limit_headers
+
+    now = datetime(2024, 1, 1, 12, 0, 0)
+    windows = parse_rate_limit_headers({
+        "RateLimit-Policy": '"burst";q=100;w=60, "daily";q=1000;w=86400',
+        "RateLimit": '"burst";r=40;t=20, "daily";r=900;t=3600',
+    }, now)
+    by_dimension = {w.dimension: w for w in windows}
+    assert by_dimension["burst"].limit == 100
+    assert by_dimension["burst"].remaining == 40
+    assert by_dimension["daily"].reset_time == now + timedelta(hours=1)
+
+    older = parse_rate_limit_headers({"RateLimit": "limit=100, remaining=50, reset=30"}, now)[0]
+    assert (older.limit, older.remaining) == (100, 50)
+
+    shopify = parse_rate_limit_headers({"X-Shopify-Shop-Api-Call-Limit": "32/40"}, now)[0]
+    assert shopify.profile == "shopify"
+    assert (shopify.limit, shopify.remaining) == (40, 8)
+    assert shopify.reset_time is None
+
+
+@pytest.mark.asyncio
+async def test_queued_rate_limit_writes_share_one_round_trip():
+    """Test that a bookkeeping batch stores its rate limits in a single pipeline"""
+    from app.utils import bookkeeping, redis_client
+
+    reset = str(int((datetime.now() + timedelta(hours=1)).timestamp()))
+    await bookkeeping.start()
+
+    with mock.patch.object(redis_client, "_pipeline", wraps=redis_client._pipeline) as pipelines:
+        for api_name, remaining in (("GitHub", "4950"), ("GitHub", "4949"), ("Stripe", "90"), ("OpenAI", "10")):
+            headers = {"x-ratelimit-limit": "5000", "x-ratelimit-remaining": remaining, "x-ratelimit-reset": reset}
+            bookkeeping.submit(
+                _store_rate_limit_info, headers, api_name, "batch-user",
+                key=("rate_limit", api_name.lower(), "batch-user"),
+            )
+        await bookkeeping.stop()
+
+    assert pipelines.call_count == 1
+    stored = await redis_client.get_rate_limits_bulk(["github", "stripe", "openai"], "batch-user")
+    assert stored["github"].remaining == 4949
+    assert stored["stripe"].remaining == 90
+    assert stored["openai"].remaining == 10
+
+    await redis_client.delete_rate_limits_bulk(["github", "stripe", "openai"], "batch-user")
+
+
+@pytest.mark.asyncio
+async def test_header_less_response_keeps_queued_rate_limit():
+    """Test that a response without rate limit headers doesn't supersede one with them"""
+    from app.utils import bookkeeping, redis_client
+
+    reset = str(int((datetime.now() + timedelta(hours=1)).timestamp()))
+    before = bookkeeping.stats()["superseded"]
+    await bookkeeping.start()
+
+    _track_rate_limits(
+        {"x-ratelimit-limit": "60", "x-ratelimit-remaining": "0", "x-ratelimit-reset": reset},
+        "GitHub", "batch-user", True,
+    )
+    _track_rate_limits({"content-type": "application/json"}, "GitHub", "batch-user", True)
+    await bookkeeping.stop()
+
+    stored = await redis_client.get_rate_limit("github", "batch-user")
+    assert stored is not None
+    assert stored.remaining == 0
+    assert bookkeeping.stats()["superseded"] == before
+
+    await redis_client.delete_rate_limit("github", "batch-user")
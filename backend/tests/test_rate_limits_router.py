@@ -126,4 +126,53 @@ def test_delete_rate_limit(auth_client):
     
     # Verify it's deleted
     response = auth_client.get(f"/api/rate-limits/{api_name}")
-    assert response.status_code in [404, 200]  # Either not found or empty result 
\ No newline at end of file
+    assert response.status_code in [404, 200]  # Either not found or empty result 
+
+def test_get_rate_limits_only_returns_schema_fields(auth_client):
+    """Stored records are returned as-is, so check extra attributes stay out"""
+    api_name = "ListFieldsAPI"
+    auth_client.post("/api/rate-limits", json={"api_name": api_name, "limit": 10, "remaining": 5})
+
+    response = auth_client.get("/api/rate-limits")
+    assert response.status_code == 200
+    entry = next(item for item in response.json() if item["api_name"] == api_name)
+    assert set(entry) == {"api_name", "limit", "remaining", "reset_time", "last_updated"}
+
+    auth_client.delete(f"/api/rate-limits/{api_name}")
+
+def test_bulk_store_and_delete_rate_limits(auth_client):
+    """Test replacing and then clearing several rate limits at once"""
+    api_names = [f"BulkAPI{i}" for i in range(5)]
+    response = auth_client.put("/api/rate-limits", json=[
+        {"api_name": api_name, "limit": 100, "remaining": i} for i, api_name in enumerate(api_names)
+    ])
+    assert response.status_code == 200
+    assert [item["remaining"] for item in response.json()] == list(range(5))
+
+    response = auth_client.get(f"/api/rate-limits/{api_names[3]}")
+    assert response.status_code == 200
+    assert response.json()["remaining"] == 3
+
+    response = auth_client.request(
+        "DELETE", "/api/rate-limits", json={"api_names": api_names + ["MissingBulkAPI"]}
+    )
+    assert response.status_code == 200
+    assert response.json() == {"deleted": api_names, "not_found": ["MissingBulkAPI"]}
+    assert auth_client.get(f"/api/rate-limits/{api_names[0]}").status_code == 404
+
+    # Empty batches are rejected
+    assert auth_client.put("/api/rate-limits", json=[]).status_code == 422
+
+def test_bulk_store_rate_limits_resetting_within_a_second(auth_client):
+    """Test that a reset under a second away still gets a valid TTL for every record"""
+    reset_time = (datetime.now() + timedelta(milliseconds=500)).isoformat()
+    response = auth_client.put("/api/rate-limits", json=[
+        {"api_name": "SoonAPI", "limit": 10, "remaining": 0, "reset_time": reset_time},
+        {"api_name": "LaterAPI", "limit": 10, "remaining": 5},
+    ])
+    assert response.status_code == 200
+
+    assert auth_client.get("/api/rate-limits/SoonAPI").json()["remaining"] == 0
+    assert auth_client.get("/api/rate-limits/LaterAPI").json()["remaining"] == 5
+
+    auth_client.request("DELETE", "/api/rate-limits", json={"api_names": ["SoonAPI", "LaterAPI"]})
@@ -1,3 +1,5 @@
+import asyncio
+import dataclasses
 import pytest
 from unittest import mock
 import json
@@ -13,12 +15,17 @@ from app.utils.redis_client import (
     get_rate_limit, 
     delete_rate_limit, 
     get_all_rate_limits,
+    store_rate_limits_bulk,
+    get_rate_limits_bulk,
+    delete_rate_limits_bulk,
 )
+from app.utils.rate_limit_data import RateLimitData
 
 # Test user ID
 TEST_USER_ID = "test-user-id"
 
-def test_store_and_get_rate_limit():
+@pytest.mark.asyncio
+async def test_store_and_get_rate_limit():
     """Test storing and retrieving a rate limit"""
     user_id = TEST_USER_ID
     api_name = "TestAPI"
@@ -27,7 +34,7 @@ def test_store_and_get_rate_limit():
     reset_time = datetime.now() + timedelta(hours=1)
     
     # Store the rate limit
-    store_rate_limit(
+    await store_rate_limit(
         api_name=api_name,
         limit=limit,
         remaining=remaining,
@@ -36,25 +43,31 @@ def test_store_and_get_rate_limit():
     )
     
     # Retrieve the rate limit
-    rate_limit = get_rate_limit(api_name, user_id)
+    rate_limit = await get_rate_limit(api_name, user_id)
     
     assert rate_limit is not None
     assert rate_limit.api_name == api_name
     assert rate_limit.limit == limit
     assert rate_limit.remaining == remaining
 
-def test_get_nonexistent_rate_limit():
+    # Records are shared with the routers, so they can't be changed in place
+    with pytest.raises(dataclasses.FrozenInstanceError):
+        rate_limit.remaining = 0
+
+@pytest.mark.asyncio
+async def test_get_nonexistent_rate_limit():
     """Test getting a non-existent rate limit"""
-    rate_limit = get_rate_limit("NonExistentAPI", TEST_USER_ID)
+    rate_limit = await get_rate_limit("NonExistentAPI", TEST_USER_ID)
     assert rate_limit is None
 
-def test_delete_rate_limit():
+@pytest.mark.asyncio
+async def test_delete_rate_limit():
     """Test deleting a rate limit"""
     user_id = TEST_USER_ID
     api_name = "DeleteAPI"
     
     # First store a rate limit
-    store_rate_limit(
+    await store_rate_limit(
         api_name=api_name,
         limit=1000,
         remaining=900,
@@ -63,23 +76,24 @@ def test_delete_rate_limit():
     )
     
     # Verify it exists
-    assert get_rate_limit(api_name, user_id) is not None
+    assert await get_rate_limit(api_name, user_id) is not None
     
     # Delete it
-    result = delete_rate_limit(api_name, user_id)
+    result = await delete_rate_limit(api_name, user_id)
     assert result is True
     
     # Verify it's gone
-    assert get_rate_limit(api_name, user_id) is None
+    assert await get_rate_limit(api_name, user_id) is None
 
-def test_get_all_rate_limits():
+@pytest.mark.asyncio
+async def test_get_all_rate_limits():
     """Test getting all rate limits for a user"""
     user_id = TEST_USER_ID
     
     # Store multiple rate limits
     apis = ["API1", "API2", "API3"]
     for i, api_name in enumerate(apis):
-        store_rate_limit(
+        await store_rate_limit(
             api_name=api_name,
             limit=1000 * (i + 1),
             remaining=900 * (i + 1),
@@ -88,7 +102,7 @@ def test_get_all_rate_limits():
         )
     
     # Get all rate limits
-    rate_limits = get_all_rate_limits(user_id)
+    rate_limits = await get_all_rate_limits(user_id)
     
     # Verify we got all of them
     assert len(rate_limits) >= len(apis)
@@ -96,4 +110,225 @@ def test_get_all_rate_limits():
     # Check that our test APIs are in the results
     api_names = [rl.api_name for rl in rate_limits]
     for api in apis:
-        assert api in api_names 
\ No newline at end of file
+        assert api in api_names 
+
+@pytest.mark.asyncio
+async def test_async_mock_redis_expiry_and_scan():
+    """Test the in-memory fallback's TTL handling and pattern scans"""
+    from app.utils.redis_client import AsyncMockRedis
+
+    client = AsyncMockRedis()
+    await client.set("rate_limit:a:user", "1", ex=60)
+    await client.set("rate_limit:b:user", "2")
+    await client.set("other:c", "3")
+
+    assert 0 < await client.ttl("rate_limit:a:user") <= 60
+    assert await client.ttl("rate_limit:b:user") == -1
+    assert sorted([key async for key in client.scan_iter(match="rate_limit:*")]) == [
+        "rate_limit:a:user", "rate_limit:b:user"
+    ]
+
+    # Expired keys disappear from reads and scans alike
+    client.expires["rate_limit:a:user"] = datetime.now() - timedelta(seconds=1)
+    assert await client.get("rate_limit:a:user") is None
+    assert [key async for key in client.scan_iter(match="rate_limit:a*")] == []
+    assert await client.delete("rate_limit:b:user", "missing") == 1
+
+
+@pytest.mark.asyncio
+async def test_async_mock_redis_rejects_non_positive_expiry():
+    """Test that the in-memory fallback refuses EX 0 like real Redis does"""
+    import redis
+    from app.utils.redis_client import AsyncMockRedis
+
+    client = AsyncMockRedis()
+    for ex in (0, -5):
+        with pytest.raises(redis.exceptions.ResponseError):
+            await client.set("rate_limit:a:user", "1", ex=ex)
+    assert await client.get("rate_limit:a:user") is None
+
+
+@pytest.mark.asyncio
+async def test_get_all_rate_limits_reads_user_index():
+    """Test that listing a user's limits uses their index instead of scanning"""
+    from app.utils import redis_client
+
+    user_id = "indexed-user"
+    for api_name in ("IndexA", "IndexB"):
+        await store_rate_limit(api_name=api_name, limit=10, remaining=5, user_id=user_id, ttl=60)
+    await store_rate_limit(api_name="IndexA", limit=10, remaining=5, user_id="someone-else", ttl=60)
+
+    with mock.patch.object(redis_client.get_client(), "scan_iter", side_effect=AssertionError("scanned")):
+        rate_limits = await get_all_rate_limits(user_id)
+    assert sorted(rl.api_name for rl in rate_limits) == ["IndexA", "IndexB"]
+
+    # Entries that expired on their own are dropped from the index on read
+    await redis_client.get_client().delete("rate_limit:{indexed-user}:IndexB")
+    assert [rl.api_name for rl in await get_all_rate_limits(user_id)] == ["IndexA"]
+    assert await redis_client.get_client().smembers("rate_limit_index:{indexed-user}") == {"IndexA"}
+
+    assert await delete_rate_limit("IndexA", user_id) is True
+    assert await get_all_rate_limits(user_id) == []
+
+
+@pytest.mark.asyncio
+async def test_index_prune_keeps_entries_stored_after_the_read():
+    """Test that a record written between the listing's read and its prune stays indexed"""
+    from app.utils import redis_client
+
+    user_id = "racing-user"
+    await store_rate_limit(api_name="RaceAPI", limit=10, remaining=5, user_id=user_id, ttl=60)
+    await redis_client.get_client().delete("rate_limit:{racing-user}:RaceAPI")
+    real_mget = redis_client._mget
+
+    async def mget_then_store(client, keys):
+        # The listing sees the record as expired, then a proxy response stores it again
+        values = await real_mget(client, keys)
+        await store_rate_limit(api_name="RaceAPI", limit=10, remaining=4, user_id=user_id, ttl=60)
+        return values
+
+    with mock.patch.object(redis_client, "_mget", side_effect=mget_then_store):
+        assert await get_all_rate_limits(user_id) == []
+
+    assert [rl.remaining for rl in await get_all_rate_limits(user_id)] == [4]
+    assert await delete_rate_limit("RaceAPI", user_id) is True
+
+
+@pytest.mark.asyncio
+async def test_bulk_rate_limit_operations_use_one_round_trip():
+    """Test that bulk store/get/delete each make a single call to Redis"""
+    from app.utils import redis_client
+
+    user_id = "bulk-user"
+    api_names = [f"Bulk{i}" for i in range(50)]
+    records = [RateLimitData(api_name=name, limit=100, remaining=i, user_id=user_id) for i, name in enumerate(api_names)]
+
+    client = redis_client.get_client()
+    with mock.patch.object(client, "pipeline", wraps=client.pipeline) as pipeline:
+        assert await store_rate_limits_bulk(records, ttls=[60] * len(records)) == records
+    assert pipeline.call_count == 1
+    assert await client.smembers("rate_limit_index:{bulk-user}") == set(api_names)
+    assert 0 < await client.ttl("rate_limit:{bulk-user}:Bulk0") <= 60
+
+    with mock.patch.object(client, "mget", wraps=client.mget) as mget:
+        found = await get_rate_limits_bulk(api_names[:3] + ["Missing"], user_id)
+    assert mget.call_count == 1
+    assert [rl.remaining for rl in list(found.values())[:3]] == [0, 1, 2]
+    assert found["Missing"] is None
+
+    with mock.patch.object(client, "pipeline", wraps=client.pipeline) as pipeline:
+        deleted = await delete_rate_limits_bulk(api_names + ["Missing"], user_id)
+    assert pipeline.call_count == 1
+    assert deleted == api_names
+    assert await get_all_rate_limits(user_id) == []
+
+    with pytest.raises(ValueError):
+        await store_rate_limits_bulk(records, ttls=[60])
+
+
+@pytest.mark.asyncio
+async def test_async_mock_redis_sweeps_unread_expired_keys():
+    """Test that expired keys are reclaimed by later writes even if never read"""
+    from app.utils.redis_client import AsyncMockRedis
+
+    client = AsyncMockRedis()
+    for i in range(100):
+        await client.set(f"cache:{i}", "x", ex=60)
+    await client.set("cache:kept", "x", ex=3600)
+
+    # Each write reclaims a batch of due keys
+    later = datetime.now() + timedelta(seconds=120)
+    with mock.patch.object(client, "_now", return_value=later):
+        for i in range(100 // client.SWEEP_BATCH + 1):
+            await client.set(f"other:{i}", "y")
+    assert not [key for key in client.data if key.startswith("cache:") and key != "cache:kept"]
+    assert "cache:kept" in client.data
+
+    # Re-setting a key leaves a stale heap entry that doesn't delete the new value
+    await client.set("rate_limit:a", "1", ex=60)
+    await client.set("rate_limit:a", "2")
+    with mock.patch.object(client, "_now", return_value=later):
+        await client.set("other:last", "y")
+    assert await client.get("rate_limit:a") == "2"
+
+
+@pytest.mark.asyncio
+async def test_async_mock_redis_scan_only_walks_matching_namespace():
+    """Test that a prefixed pattern scan skips keys from other namespaces"""
+    from app.utils.redis_client import AsyncMockRedis
+
+    client = AsyncMockRedis()
+    for i in range(50):
+        await client.set(f"cache:{i}", "x")
+    await client.set("rate_limit:github:alice", "1")
+    await client.set("rate_limit:openai:bob", "2")
+    await client.sadd("rate_limit_index:alice", "github")
+
+    with mock.patch.object(client, "_expire", wraps=client._expire) as expire:
+        keys = [key async for key in client.scan_iter(match="rate_limit:*:alice")]
+    assert keys == ["rate_limit:github:alice"]
+    assert expire.call_count == 2
+
+    assert sorted([key async for key in client.scan_iter(match="rate_limit*")]) == [
+        "rate_limit:github:alice", "rate_limit:openai:bob", "rate_limit_index:alice"
+    ]
+
+    await client.delete("rate_limit:github:alice", "rate_limit:openai:bob")
+    assert [key async for key in client.scan_iter(match="rate_limit:*")] == []
+
+
+@pytest.mark.asyncio
+async def test_create_client_follows_redis_mode(monkeypatch):
+    """Test that the client type and pool settings come from the environment settings"""
+    import redis.asyncio
+    from redis.asyncio.sentinel import SentinelConnectionPool
+    from app.utils import redis_client
+
+    monkeypatch.setattr(redis_client, "REDIS_MAX_CONNECTIONS", 7)
+
+    client = redis_client.create_client()
+    assert isinstance(client.connection_pool, redis.asyncio.BlockingConnectionPool)
+    assert client.connection_pool.max_connections == 7
+    await client.aclose()
+
+    monkeypatch.setattr(redis_client, "REDIS_MODE", "sentinel")
+    monkeypatch.setattr(redis_client, "REDIS_SENTINELS", "sentinel-a:26379, sentinel-b:26380")
+    client = redis_client.create_client()
+    assert isinstance(client.connection_pool, SentinelConnectionPool)
+    assert client.connection_pool.max_connections == 7
+    assert [(s.connection_pool.connection_kwargs["host"], s.connection_pool.connection_kwargs["port"])
+            for s in client.connection_pool.sentinel_manager.sentinels] == [("sentinel-a", 26379), ("sentinel-b", 26380)]
+    await client.aclose()
+
+    monkeypatch.setattr(redis_client, "REDIS_MODE", "cluster")
+    client = redis_client.create_client()
+    assert isinstance(client, redis.asyncio.RedisCluster)
+    await client.aclose()
+
+
+def test_user_keys_share_a_cluster_slot():
+    """Test that a user's records and index hash to the same cluster slot"""
+    from redis.crc import key_slot
+    from app.utils.redis_client import _index_key, _rate_limit_key
+
+    user_id = "alice@example.com"
+    slots = {key_slot(key.encode()) for key in (
+        _rate_limit_key("github", user_id), _rate_limit_key("openai", user_id), _index_key(user_id)
+    )}
+    assert len(slots) == 1
+
+
+def test_client_connects_lazily_and_falls_back(monkeypatch):
+    """Test that no connection is made until first use, and the mock is used without Redis"""
+    from app.utils import redis_client
+
+    monkeypatch.setattr(redis_client, "_client", None)
+    monkeypatch.setattr(redis_client, "REDIS_PORT", 1)
+    monkeypatch.setattr(redis_client, "REDIS_SOCKET_CONNECT_TIMEOUT", 0.5)
+
+    client = redis_client.get_client()
+    assert isinstance(client, redis_client.AsyncMockRedis)
+    assert redis_client.get_client() is client
+
+    monkeypatch.setattr(redis_client, "_client", None)
+    assert isinstance(asyncio.run(redis_client.start_client()), redis_client.AsyncMockRedis)
@@ -0,0 +1,83 @@
+import pytest
+import time
+import sys
+import os
+
+# Add the parent directory to path for imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.utils import response_cache
+
+
+@pytest.fixture(autouse=True)
+def empty_cache():
+    """Start every test with an empty in-process cache"""
+    response_cache.clear()
+    yield
+    response_cache.clear()
+
+
+def test_cache_key_varies_on_user_headers_and_key():
+    """Test that different users, headers or stored keys never share entries"""
+    base = response_cache.cache_key("user-1", "GET", "https://api.github.com/user", {"Accept": "application/json"}, "key-1")
+
+    assert base == response_cache.cache_key("user-1", "GET", "https://api.github.com/user", {"accept": "application/json"}, "key-1")
+    assert base != response_cache.cache_key("user-2", "GET", "https://api.github.com/user", {"Accept": "application/json"}, "key-1")
+    assert base != response_cache.cache_key("user-1", "GET", "https://api.github.com/user", {"Accept": "text/html"}, "key-1")
+    assert base != response_cache.cache_key("user-1", "GET", "https://api.github.com/user", {"Accept": "application/json"}, "key-2")
+
+
+def test_only_idempotent_requests_are_cacheable():
+    """Test that writes and caller-driven conditional requests bypass the cache"""
+    assert response_cache.is_cacheable_request("GET", {})
+    assert response_cache.is_cacheable_request("HEAD", {})
+    assert not response_cache.is_cacheable_request("POST", {})
+    assert not response_cache.is_cacheable_request("GET", {"If-None-Match": '"abc"'})
+
+
+@pytest.mark.asyncio
+async def test_store_respects_cache_control():
+    """Test freshness from max-age and refusal of no-store responses"""
+    fresh = await response_cache.store("fresh", 200, {"Cache-Control": "max-age=60"}, {"ok": True})
+    assert fresh is not None
+    assert fresh.is_fresh
+    assert 55 <= fresh.expires_at - time.time() <= 60
+
+    assert await response_cache.store("secret", 200, {"Cache-Control": "no-store, max-age=60"}, {}) is None
+    assert await response_cache.get("secret") is None
+
+    # Nothing to go on: no freshness information and no validators
+    assert await response_cache.store("plain", 200, {"content-type": "application/json"}, {}) is None
+
+    # Errors are never cached
+    assert await response_cache.store("error", 500, {"Cache-Control": "max-age=60"}, {}) is None
+
+
+@pytest.mark.asyncio
+async def test_no_cache_with_validator_is_stored_stale():
+    """Test that no-cache responses are kept only for revalidation"""
+    entry = await response_cache.store("etag", 200, {"Cache-Control": "no-cache", "ETag": '"v1"'}, {"v": 1})
+
+    assert entry is not None
+    assert not entry.is_fresh
+    assert entry.can_revalidate
+    assert response_cache.conditional_headers(entry) == {"If-None-Match": '"v1"'}
+
+    refreshed = await response_cache.refresh("etag", entry, {"Cache-Control": "max-age=30", "ETag": '"v1"'})
+    assert refreshed.is_fresh
+    assert refreshed.body == {"v": 1}
+
+
+@pytest.mark.asyncio
+async def test_lru_evicts_least_recently_used(monkeypatch):
+    """Test that the in-process tier stays bounded"""
+    monkeypatch.setattr(response_cache, "CACHE_MAX_ENTRIES", 2)
+
+    await response_cache.store("a", 200, {"Cache-Control": "max-age=60"}, "a")
+    await response_cache.store("b", 200, {"Cache-Control": "max-age=60"}, "b")
+    assert await response_cache.get("a") is not None  # "a" is now most recently used
+    await response_cache.store("c", 200, {"Cache-Control": "max-age=60"}, "c")
+
+    assert await response_cache.get("a") is not None
+    assert await response_cache.get("b") is None
+    assert await response_cache.get("c") is not None
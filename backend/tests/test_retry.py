@@ -0,0 +1,68 @@
+import pytest
+import httpx
+from unittest import mock
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime
+import sys
+import os
+
+# Add the parent directory to path for imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.utils.retry import RetryPolicy, RetryStats, retry_after_seconds, send_with_retry
+
+
+def test_backoff_uses_full_jitter():
+    """Test that backoff stays within the exponential ceiling"""
+    policy = RetryPolicy(base_delay=0.5, max_delay=3.0)
+
+    for attempt, ceiling in [(1, 0.5), (2, 1.0), (3, 2.0), (4, 3.0), (10, 3.0)]:
+        for _ in range(20):
+            assert 0 <= policy.backoff(attempt) <= ceiling
+
+
+def test_only_idempotent_methods_retry_by_default():
+    """Test the method allow-list and opt-in for other methods"""
+    policy = RetryPolicy()
+    assert policy.allows("GET")
+    assert policy.allows("PUT")
+    assert not policy.allows("POST")
+    assert RetryPolicy(retry_non_idempotent=True).allows("POST")
+
+
+def test_retry_after_parsing():
+    """Test Retry-After as delta-seconds and as an HTTP-date"""
+    assert retry_after_seconds({"Retry-After": "7"}) == 7.0
+    assert retry_after_seconds({}) is None
+    assert retry_after_seconds({"retry-after": "soon"}) is None
+
+    in_ten_seconds = format_datetime(datetime.now(timezone.utc) + timedelta(seconds=10), usegmt=True)
+    assert 8 <= retry_after_seconds({"Retry-After": in_ten_seconds}) <= 10
+
+
+@pytest.mark.asyncio
+async def test_gives_up_after_max_attempts():
+    """Test that the last transport error is raised once attempts run out"""
+    send = mock.AsyncMock(side_effect=httpx.ConnectError("down"))
+    stats = RetryStats()
+
+    with mock.patch("app.utils.retry.asyncio.sleep"):
+        with pytest.raises(httpx.ConnectError):
+            await send_with_retry(send, "GET", RetryPolicy(max_attempts=3), stats)
+
+    assert send.call_count == 3
+    assert stats.attempts == 3
+
+
+@pytest.mark.asyncio
+async def test_deadline_stops_retries():
+    """Test that a Retry-After beyond the deadline returns the last response"""
+    throttled = httpx.Response(429, headers={"Retry-After": "60"})
+    send = mock.AsyncMock(return_value=throttled)
+    stats = RetryStats()
+
+    response = await send_with_retry(send, "GET", RetryPolicy(max_attempts=5, deadline=10), stats)
+
+    assert response.status_code == 429
+    assert stats.attempts == 1
+    assert stats.backoff == 0.0
@@ -0,0 +1,81 @@
+import pytest
+import asyncio
+import sys
+import os
+
+# Add the parent directory to path for imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.utils.single_flight import SingleFlight
+
+
+@pytest.mark.asyncio
+async def test_concurrent_calls_share_one_execution():
+    """Test that identical concurrent calls run the work once"""
+    flight = SingleFlight()
+    calls = 0
+
+    async def work():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.01)
+        return {"value": 42}
+
+    results = await asyncio.gather(*(flight.do("key", work) for _ in range(5)))
+
+    assert calls == 1
+    assert [result for result, _ in results] == [{"value": 42}] * 5
+    # Exactly one caller led, the others joined
+    assert [shared for _, shared in results].count(False) == 1
+    assert flight.in_flight() == 0
+
+
+@pytest.mark.asyncio
+async def test_errors_propagate_to_every_caller():
+    """Test that a failed call fails all joined callers and is not remembered"""
+    flight = SingleFlight()
+
+    async def failing():
+        await asyncio.sleep(0.01)
+        raise ValueError("upstream down")
+
+    results = await asyncio.gather(
+        flight.do("key", failing), flight.do("key", failing), return_exceptions=True
+    )
+    assert all(isinstance(result, ValueError) for result in results)
+
+    # The next call starts fresh
+    async def working():
+        return "ok"
+
+    assert await flight.do("key", working) == ("ok", False)
+
+
+@pytest.mark.asyncio
+async def test_different_keys_do_not_share():
+    """Test that only calls with the same key are coalesced"""
+    flight = SingleFlight()
+
+    async def work():
+        await asyncio.sleep(0.01)
+        return "done"
+
+    results = await asyncio.gather(flight.do("a", work), flight.do("b", work))
+    assert [shared for _, shared in results] == [False, False]
+
+
+@pytest.mark.asyncio
+async def test_join_reports_shared_before_the_call_finishes():
+    """Test that joined callers know they were followers even when the call fails"""
+    flight = SingleFlight()
+
+    async def failing():
+        await asyncio.sleep(0.01)
+        raise ValueError("upstream down")
+
+    leader, leader_shared = flight.join("key", failing)
+    follower, follower_shared = flight.join("key", failing)
+    assert (leader_shared, follower_shared) == (False, True)
+
+    results = await asyncio.gather(leader, follower, return_exceptions=True)
+    assert all(isinstance(result, ValueError) for result in results)
@@ -0,0 +1,73 @@
+import pytest
+import asyncio
+import httpx
+from unittest import mock
+import sys
+import os
+
+# Add the parent directory to path for imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.utils import timeouts
+from app.utils.timeouts import DeadlineExceeded, TimeoutBudget, resolve_budget, timeout_phase
+
+
+def test_resolve_budget_caps_requested_values(monkeypatch):
+    """Test that requested timeouts can't exceed the server-side maximums"""
+    monkeypatch.setattr(timeouts, "PROXY_MAX_TIMEOUT", 10.0)
+    monkeypatch.setattr(timeouts, "PROXY_MAX_DEADLINE", 20.0)
+
+    budget = resolve_budget(None, connect=2, read=500, deadline=1000)
+
+    assert budget.connect == 2
+    assert budget.read == 10.0
+    assert budget.deadline == 20.0
+
+
+def test_resolve_budget_per_api_override(monkeypatch):
+    """Test that per-API settings win over the global ones"""
+    monkeypatch.setenv("PROXY_TIMEOUT_READ", "8")
+    monkeypatch.setenv("PROXY_TIMEOUT_READ_SLOWAPI", "25")
+    monkeypatch.setenv("PROXY_DEADLINE_SLOWAPI", "40")
+
+    assert resolve_budget("other").read == 8
+    budget = resolve_budget("slowapi")
+    assert budget.read == 25
+    assert budget.deadline == 40
+    # A value from the request still wins
+    assert resolve_budget("slowapi", read=3).read == 3
+
+
+def test_httpx_timeout_trimmed_to_remaining_budget():
+    """Test that later attempts only get what is left of the deadline"""
+    budget = TimeoutBudget(connect=5, read=30, write=30, pool=5, deadline=10)
+
+    with mock.patch("app.utils.timeouts.time.monotonic", return_value=budget.started + 8):
+        timeout = budget.httpx_timeout()
+    assert timeout.connect == pytest.approx(2)
+    assert timeout.read == pytest.approx(2)
+
+    with mock.patch("app.utils.timeouts.time.monotonic", return_value=budget.started + 11):
+        with pytest.raises(DeadlineExceeded):
+            budget.httpx_timeout()
+
+
+@pytest.mark.asyncio
+async def test_run_raises_deadline_exceeded():
+    """Test that run() cancels work that outlives the budget"""
+    budget = TimeoutBudget(connect=1, read=1, write=1, pool=1, deadline=0.05)
+
+    with pytest.raises(DeadlineExceeded):
+        await budget.run(asyncio.sleep(1))
+
+    assert await TimeoutBudget(1, 1, 1, 1, deadline=1).run(asyncio.sleep(0, result="ok")) == "ok"
+
+
+def test_timeout_phase():
+    """Test mapping errors to the phase that timed out"""
+    assert timeout_phase(DeadlineExceeded(5)) == "deadline"
+    assert timeout_phase(httpx.ConnectTimeout("x")) == "connect"
+    assert timeout_phase(httpx.ReadTimeout("x")) == "read"
+    assert timeout_phase(httpx.WriteTimeout("x")) == "write"
+    assert timeout_phase(httpx.PoolTimeout("x")) == "pool"
+    assert timeout_phase(httpx.ConnectError("x")) is None
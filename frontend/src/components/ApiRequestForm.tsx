@@ -10,11 +10,10 @@ import { Loader2 } from 'lucide-react';
 import { api } from '../lib/api';
 import { useRequestBuilder } from '../contexts/use-request-builder';
 
-// Define API key interface
+// Define API key interface (metadata only, the secret stays server-side)
 interface ApiKey {
   id: string;
   api_name: string;
-  api_key: string;
   created_at: string;
   updated_at: string;
 }
@@ -51,7 +50,7 @@ export function ApiRequestForm() {
       setIsLoadingKeys(true);
       try {
         // Our API directly returns the array of keys, not wrapped in a data property
-        const keys = await api.get('/api/keys');
+        const keys = await api.get('/api/keys/metadata');
         console.log('API keys received:', keys);
         
         if (keys && Array.isArray(keys)) {